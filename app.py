@@ -1,8 +1,18 @@
 import streamlit as st
-import requests
 import pandas as pd
-import json
-import re
+import os
+import time
+
+from soicau.core import (
+    get_pos_map, get_prize_map_no_gdb,
+    make_copy_text, pair_table, parse_smart_text,
+)
+from soicau import archive, engine, index, live, memo, multi, perf, regions, stream, sweep, walkforward
+from soicau.tracker import LiveTracker
+
+# Số dòng mỗi trang của bảng cầu và số box mỗi trang của lưới cầu VIP
+PAGE_SIZE = 20
+GRID_PAGE_SIZE = 40
 
 # -----------------------------------------------------------------------------
 # 1. CẤU HÌNH & CSS (ĐÃ CHỈNH SIÊU NHỎ GỌN)
@@ -32,6 +42,7 @@ st.markdown("""
     }
     .hot-title-vip {font-size: 9px; color: #e65100; line-height: 1.1; overflow: hidden; white-space: nowrap; text-overflow: ellipsis;}
     .hot-val-vip {font-size: 18px; color: #d32f2f; font-weight: 900; line-height: 1.2;}
+    .hot-grid {display: grid; grid-template-columns: repeat(8, 1fr); gap: 0px 4px;}
 
     /* Box 1 Ngày - Màu Xanh */
     .hot-box-1d {
@@ -59,327 +70,115 @@ st.markdown("""
 # -----------------------------------------------------------------------------
 # 2. DỮ LIỆU & API
 # -----------------------------------------------------------------------------
-def get_api_url(limit=50):
-    return f"https://www.kqxs88.live/api/front/open/lottery/history/list/game?limitNum={limit}&gameCode=miba"
-
-XSMB_STRUCTURE = [
-    ("GĐB", 1, 5), ("G1", 1, 5), ("G2", 2, 5), ("G3", 6, 5),
-    ("G4", 4, 4), ("G5", 6, 4), ("G6", 3, 3), ("G7", 4, 2)
-]
-
-BO_DE_DICT = {
-    "00": ["00","55","05","50"], "11": ["11","66","16","61"], "22": ["22","77","27","72"], "33": ["33","88","38","83"],
-    "44": ["44","99","49","94"], "01": ["01","10","06","60","51","15","56","65"], "02": ["02","20","07","70","52","25","57","75"],
-    "03": ["03","30","08","80","53","35","58","85"], "04": ["04","40","09","90","54","45","59","95"],
-    "12": ["12","21","17","71","62","26","67","76"], "13": ["13","31","18","81","63","36","68","86"],
-    "14": ["14","41","19","91","64","46","69","96"], "23": ["23","32","28","82","73","37","78","87"],
-    "24": ["24","42","29","92","74","47","79","97"], "34": ["34","43","39","93","84","48","89", "98"]
-}
-NUMBER_TO_SET_MAP = {str(n): s for s, nums in BO_DE_DICT.items() for n in nums}
-
-@st.cache_data(ttl=60)
-def fetch_history(limit=50):
-    try:
-        url = get_api_url(limit)
-        r = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=10).json()
-        return r.get('t', {}).get('issueList', [])
-    except Exception as e:
-        st.error(f"Lỗi kết nối API: {e}")
-        return []
-
-def fetch_daiphat_live():
+def load_history(limit=50):
+    arc = archive.get_archive()
     try:
-        from bs4 import BeautifulSoup
-        url = "https://xosodaiphat.com/xsmb-truc-tiep.html"
-        r = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=5)
-        soup = BeautifulSoup(r.content, 'html.parser')
-        
-        mapping = {
-            'ĐB': 'DB', 'G1': '1', 'G2': '2', 'G3': '3',
-            'G4': '4', 'G5': '5', 'G6': '6', 'G7': '7'
-        }
-        
-        results = []
-        for label, code in mapping.items():
-            nums = []
-            idx = 0
-            while True:
-                # ID pattern: mb_prize_DB_item_0, mb_prize_1_item_0, ...
-                element_id = f"mb_prize_{code}_item_{idx}"
-                span = soup.find('span', id=element_id)
-                if span:
-                    text = span.get_text(strip=True)
-                    if text and text.isdigit():
-                        nums.append(text)
-                    idx += 1
-                else:
-                    break
-            
-            if nums:
-                results.append(f"{label}: {', '.join(nums)}")
-                
-        return "\n".join(results)
+        arc.sync(limit)
     except Exception as e:
-        return ""
-
-def fetch_live_data():
-    # 1. Thử Minh Ngọc
-    try:
-        from bs4 import BeautifulSoup
-        url = "https://www.minhngoc.net.vn/xo-so-truc-tiep/mien-bac.html"
-        r = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=5)
-        soup = BeautifulSoup(r.content, 'html.parser')
-        
-        mapping = {
-            'ĐB': 'giaidb', 'G1': 'giai1', 'G2': 'giai2', 'G3': 'giai3',
-            'G4': 'giai4', 'G5': 'giai5', 'G6': 'giai6', 'G7': 'giai7'
-        }
-        
-        results = []
-        box = soup.find('div', class_='box_kqxs')
-        if box:
-            for label, cls in mapping.items():
-                row = box.find(class_=cls)
-                if row:
-                    nums = [span.get_text(strip=True) for span in row.find_all('div', recursive=True) if span.get_text(strip=True).isdigit()]
-                    if not nums:
-                        tmp = []
-                        for s in row.find_all(string=True):
-                            s_text = str(s).strip()
-                            if s_text.isdigit() and len(s_text) > 1:
-                                tmp.append(s_text)
-                        nums = tmp
-                    if nums:
-                        results.append(f"{label}: {', '.join(nums)}")
-            
-            if results: return "\n".join(results)
-    except: pass
-
-    # 2. Fallback sang Đại Phát
-    return fetch_daiphat_live()
-
-def parse_detail_json(d_str):
-    try: return "".join([g.replace(",", "").strip() for g in json.loads(d_str)])
-    except: return ""
-
-def get_set(n): return NUMBER_TO_SET_MAP.get(str(n), "?")
-
-def process_data(raw):
-    p = []
-    for r in raw:
-        f = parse_detail_json(r.get('detail', ''))
-        if len(f) != 107: continue
-        de = f[2:5][1:] 
-        p.append({"issue": r.get('turnNum'), "de": de, "de_rev": de[::-1], "de_set": get_set(de), "body": f})
-    return p
-
-def get_pos_map():
-    m = []
-    for p, c, l in XSMB_STRUCTURE:
-        for i in range(1, c+1):
-            for j in range(1, l+1): m.append(f"{p}.{i}.{j}")
-    return m
-
-def get_prize_map_no_gdb():
-    m = {}; curr = 0
-    for p, c, l in XSMB_STRUCTURE:
-        for i in range(1, c+1):
-            s, e = curr, curr + l
-            if p != "GĐB": m[f"{p}" if c==1 else f"{p}.{i}"] = (s, e)
-            curr += l
-    return m
-
-# -----------------------------------------------------------------------------
-# 3. THUẬT TOÁN
-# -----------------------------------------------------------------------------
-def scan_positions_auto(data, mode, allow_rev, bridge_type="same_day", min_streak=2):
-    if not data: return []
-    results = []
-    
-    # Xác định phạm vi quét
-    # same_day: Quét trên chính bản ghi đó (bỏ qua GĐB vì GĐB là kết quả) -> start_idx = 5 (GĐB có 5 ký tự)
-    # cross_day: Quét trên bản ghi ngày hôm trước (lấy cả GĐB) -> start_idx = 0
-    start_idx = 5 if bridge_type == "same_day" else 0
-    
-    # Lấy mẫu để tìm candidates
-    # Nếu cross_day: Cần ít nhất 2 ngày dữ liệu (Hôm nay và Hôm qua) để check 1 nhịp
-    if bridge_type == "cross_day" and len(data) < 2: return []
-    
-    day0 = data[0] # Ngày hiện tại (Kết quả cần soi)
-    source_day = data[0] if bridge_type == "same_day" else data[1] # Nguồn dữ liệu để soi
-    
-    body = source_day['body']
-    cand = []
-    
-    # 1. Tìm Candidate: Cặp vị trí (i, j) trên source_day tạo ra kết quả của day0
-    for i in range(start_idx, len(body)):
-        for j in range(start_idx, len(body)):
-            if i == j: continue
-            val = body[i] + body[j]
-            match = False
-            
-            # So sánh với kết quả của day0
-            if mode == "straight":
-                if val == day0['de']: match = True
-                elif allow_rev and val == day0['de_rev']: match = True
-            else: # mode == "set"
-                if get_set(val) == day0['de_set']: match = True
-            
-            if match: cand.append((i, j))
-    
-    # 2. Check Streak cho từng candidate
-    for (i, j) in cand:
-        streak = 0
-        max_k = len(data) - 1 if bridge_type == "cross_day" else len(data)
-        
-        for k in range(max_k):
-            current_res_day = data[k]
-            current_src_day = data[k] if bridge_type == "same_day" else data[k+1]
-            
-            val = current_src_day['body'][i] + current_src_day['body'][j]
-            match = False
-            
-            if mode == "straight":
-                if val == current_res_day['de']: match = True
-                elif allow_rev and val == current_res_day['de_rev']: match = True
-            else:
-                if get_set(val) == current_res_day['de_set']: match = True
-            
-            if match: streak += 1
-            else: break 
-            
-        if streak >= min_streak:
-            results.append({"i": i, "j": j, "streak": streak})
-            
-    results.sort(key=lambda x: x['streak'], reverse=True)
-    return results
-
-def scan_prizes_auto(data, mode, bridge_type="same_day", min_streak=1):
-    pmap = get_prize_map_no_gdb(); res = []
-    
-    # Nếu cross_day: Cần ít nhất 2 ngày
-    if bridge_type == "cross_day" and len(data) < 2: return []
-    
-    max_k = len(data) - 1 if bridge_type == "cross_day" else len(data)
-
-    for p, (s, e) in pmap.items():
-        streak = 0
-        for k in range(max_k):
-            current_res_day = data[k]
-            current_src_day = data[k] if bridge_type == "same_day" else data[k+1]
-            
-            digits = set(current_src_day['body'][s:e])
-            match = False
-            if mode == "straight": match = (current_res_day['de'][0] in digits and current_res_day['de'][1] in digits)
-            else:
-                for n in BO_DE_DICT.get(get_set(current_res_day['de']), []):
-                    if n[0] in digits and n[1] in digits: match = True; break
-            if match: streak += 1
-            else: break
-        if streak >= min_streak: res.append({"prize": p, "streak": streak, "val": data[0]['body'][s:e] if bridge_type == "same_day" else data[1]['body'][s:e]})
-    res.sort(key=lambda x: x['streak'], reverse=True)
-    return res
-
-def backtest_positions(data, mode, allow_rev, bridge_type, candidates):
-    max_k = len(data) - 1 if bridge_type == "cross_day" else len(data)
-    out = []
-    for br in candidates:
-        i, j = br['i'], br['j']
-        hits = 0
-        for k in range(max_k):
-            current_res_day = data[k]
-            current_src_day = data[k] if bridge_type == "same_day" else data[k+1]
-            if i < len(current_src_day['body']) and j < len(current_src_day['body']):
-                val = current_src_day['body'][i] + current_src_day['body'][j]
-                match = False
-                if mode == "straight":
-                    if val == current_res_day['de']: match = True
-                    elif allow_rev and val == current_res_day['de_rev']: match = True
-                else:
-                    if get_set(val) == current_res_day['de_set']: match = True
-                if match: hits += 1
-        out.append({"i": i, "j": j, "hits": hits, "days": max_k})
-    out.sort(key=lambda x: x['hits'], reverse=True)
-    return out
-
-def backtest_prizes(data, mode, bridge_type, entries):
+        if arc.count() == 0:
+            st.error(f"Lỗi kết nối API: {e}")
+            return []
+        st.warning(f"Không kết nối được API, dùng dữ liệu đã lưu: {e}")
+    return arc.window(limit)
+
+def prize_table(prizes, mode):
+    # Bảng Bước 1 của Cầu Giải: nhị hợp (soi thẳng / lô) hoặc bộ đào (soi bộ) của từng giải
+    col_name = "Bộ Đào" if mode == "set" else "Nhị Hợp"
+    return [{"Giải": p['prize'], "Thông": f"{p['streak']}n", col_name: ", ".join(pair_table(p['val'], mode)[0]) or "-"} for p in prizes]
+
+def live_prize_table(prizes, body, mode):
+    # Bảng Bước 3: giải đã đủ số trong ``body``, nhị hợp / bộ đào theo tần suất
     pmap = get_prize_map_no_gdb()
-    max_k = len(data) - 1 if bridge_type == "cross_day" else len(data)
-    out = []
-    for p in entries:
-        pname = p['prize']
-        s, e = pmap.get(pname)
-        hits = 0
-        for k in range(max_k):
-            current_res_day = data[k]
-            current_src_day = data[k] if bridge_type == "same_day" else data[k+1]
-            digits = set(current_src_day['body'][s:e])
-            match = False
-            if mode == "straight":
-                match = (current_res_day['de'][0] in digits and current_res_day['de'][1] in digits)
-            else:
-                for n in BO_DE_DICT.get(get_set(current_res_day['de']), []):
-                    if n[0] in digits and n[1] in digits:
-                        match = True
-                        break
-            if match: hits += 1
-        out.append({"prize": pname, "hits": hits, "days": max_k})
-    out.sort(key=lambda x: x['hits'], reverse=True)
-    return out
+    col_name = "Bộ Đào (Tần suất)" if mode == "set" else "Nhị Hợp (Tần suất)"
+    rows = []
+    for p in prizes:
+        s, e = pmap[p['prize']]
+        digits = body[s:e]
+        if e <= len(body) and '?' not in digits:
+            rows.append({"Giải": p['prize'], "Thông": f"{p['streak']}n", "Số gốc": digits, col_name: ", ".join(pair_table(digits, mode)[1])})
+    return rows
+
+def page_slice(n, key, size=PAGE_SIZE):
+    """Trang đang xem của danh sách ``n`` dòng; ô chọn trang chỉ hiện khi có hơn 1 trang.
+
+    Chỉ dựng dòng của trang này nên thời gian vẽ không tăng theo số cầu.
+    """
+    pages = max((n + size - 1) // size, 1)
+    page = st.number_input(f"Trang (/{pages})", 1, pages, 1, key=key) if pages > 1 else 1
+    return slice((page - 1) * size, min(page * size, n))
+
+def vip_grid(matches, key):
+    # Các cầu VIP đã nổ: một khối HTML (lưới 8 cột) cho cả trang thay vì mỗi box một phần tử
+    sl = page_slice(len(matches), key, GRID_PAGE_SIZE)
+    boxes = "".join(f"<div class='hot-box-vip'><div class='hot-title-vip'>#{m['idx']} ({m['streak']}n)</div><div class='hot-val-vip'>{m['val']}</div></div>" for m in matches[sl])
+    st.markdown(f"<div class='hot-grid'>{boxes}</div>", unsafe_allow_html=True)
+
+def multi_table(bridges, pos_map, start=0):
+    return [{"#": start+i+1, "Vị trí": " + ".join(pos_map[p] for p in br['pos']), "Thông": f"{br['streak']}n"} for i, br in enumerate(bridges)]
+
+@st.cache_data(show_spinner=False)
+def load_leaderboard(mtime):
+    # mtime chỉ để đọc lại khi sweep ghi file mới
+    return sweep.load()
+
+def leaderboard_panel(method_key, mode, allow_rev, bridge_type, min_streak):
+    """Sidebar: bảng xếp hạng của sweep (python -m soicau sweep) theo cấu hình đang chọn."""
+    try: mtime = os.path.getmtime(sweep.LEADERBOARD_PATH)
+    except OSError: return
+    board = load_leaderboard(mtime)
+    if not board: return
+    with st.sidebar.expander("🏆 Bảng xếp hạng (sweep)", expanded=False):
+        st.caption(f"Kỳ {board['meta']['latest']} · {board['meta']['created']}")
+        days = st.selectbox("Cửa sổ (ngày)", ["Tất cả"] + board['meta']['windows'])
+        rows = [r for r in board['rows'] if r['method'] == method_key and r['mode'] == mode and r['allow_rev'] == allow_rev
+                and r['bridge_type'] == bridge_type and r['streak'] >= min_streak and (days == "Tất cả" or r['days'] == days)]
+        if not rows: st.caption("Không có cầu phù hợp."); return
+        st.dataframe(pd.DataFrame([{"Cầu": r['bridge'], "Ngày": r['days'], "Thông": r['streak'], "Tỷ lệ (%)": round(r['rate'] * 100, 1)} for r in rows[:100]]), use_container_width=True)
+
+@st.fragment(run_every=2)
+def live_watch():
+    # Chỉ đọc snapshot của poller nền (rất nhẹ); có số mới mới chạy lại cả trang
+    snap = live.get_poller().touch()
+    if snap['version'] != st.session_state.get('live_version'):
+        st.session_state['live_version'] = snap['version']
+        if snap['text']:
+            st.session_state['live_text'] = snap['text']
+            st.session_state['live_source'] = snap
+            st.rerun()
+    if snap['updated_at']:
+        st.caption(f"🟢 Live: {snap['digits']}/107 số · {time.strftime('%H:%M:%S', time.localtime(snap['updated_at']))}")
+    else:
+        st.caption("🟢 Live: đang chờ kết quả...")
 
 # -----------------------------------------------------------------------------
-# 4. SMART PARSER
+# 3. GIAO DIỆN CHÍNH
 # -----------------------------------------------------------------------------
-def parse_smart_text(text, has_gdb_checkbox):
-    text = text.lower()
-    buckets = {'db': '', '1': '', '2': '', '3': '', '4': '', '5': '', '6': '', '7': ''}
-    current_bucket = None
-    lines = text.split('\n')
-    for line in lines:
-        line_clean = line.strip()
-        if not line_clean: continue
-        if 'đặc biệt' in line_clean or 'đb' in line_clean or 'db' in line_clean: current_bucket = 'db'
-        elif 'nhất' in line_clean or 'g.1' in line_clean or 'g1' in line_clean: current_bucket = '1'
-        elif 'nhì' in line_clean or 'g.2' in line_clean or 'g2' in line_clean: current_bucket = '2'
-        elif 'ba' in line_clean or 'g.3' in line_clean or 'g3' in line_clean: current_bucket = '3'
-        elif 'tư' in line_clean or 'g.4' in line_clean or 'g4' in line_clean: current_bucket = '4'
-        elif 'năm' in line_clean or 'g.5' in line_clean or 'g5' in line_clean: current_bucket = '5'
-        elif 'sáu' in line_clean or 'g.6' in line_clean or 'g6' in line_clean: current_bucket = '6'
-        elif 'bảy' in line_clean or 'g.7' in line_clean or 'g7' in line_clean: current_bucket = '7'
-        if current_bucket:
-            nums = re.findall(r'\d+', line_clean)
-            buckets[current_bucket] += "".join(nums)
-
-    RULES = [('db',1,5), ('1',1,5), ('2',2,5), ('3',6,5), ('4',4,4), ('5',6,4), ('6',3,3), ('7',4,2)]
-    full_str = ""
-    preview_list = []
-    for key, count, length in RULES:
-        raw_str = buckets[key]
-        if key == 'db' and not has_gdb_checkbox:
-            full_str += "?" * 5
-            preview_list.append(f"GĐB: (Bỏ qua)")
-            continue
-        current_segment = ""
-        display_segment = []
-        current_pos = 0
-        for i in range(count):
-            start = current_pos; end = start + length
-            val = "?" * length
-            if end <= len(raw_str):
-                val = raw_str[start:end]; current_pos += length
-            elif start < len(raw_str):
-                partial = raw_str[start:]; val = partial.ljust(length, '?'); current_pos += len(partial)
-            current_segment += val
-            display_segment.append(val)
-        full_str += current_segment
-        status = "✅" if '?' not in current_segment else "⏳"
-        label = "ĐB" if key == 'db' else key
-        preview_list.append(f"G{label} ({status}): {', '.join(display_segment)}")
-    return full_str, preview_list
+# Backtest toàn bộ cặp: số dòng hiển thị và giới hạn thời gian (giây)
+BT_TOP = 500
+BT_BUDGET_S = 10
+
+WEEKDAYS = ["Thứ Hai", "Thứ Ba", "Thứ Tư", "Thứ Năm", "Thứ Sáu", "Thứ Bảy", "Chủ Nhật"]
+
+def region_view(region, kind, mode, allow_rev, bridge_type, limit_days, min_streak):
+    """Miền Nam / Miền Trung: quét song song các đài quay trong tối đã chọn."""
+    weekday = st.selectbox("Tối quay", range(7), index=time.localtime().tm_wday, format_func=lambda d: WEEKDAYS[d])
+    # Đồng bộ API tối đa 1 lần mỗi SYNC_INTERVAL giây, giống Miền Bắc
+    key = ("scan_region", region, weekday, kind, mode, allow_rev, bridge_type, limit_days, min_streak, int(time.time() // archive.SYNC_INTERVAL))
+    with st.spinner("Đang quét các đài..."):
+        res = memo.RESULTS.get_or_compute(key, lambda: regions.scan_region(
+            region, weekday, kind, mode, allow_rev, bridge_type, limit_days, min_streak, processes=False))
+    for code, r in res.items():
+        st.markdown(f"<div class='step-header'>{r['name']}</div>", unsafe_allow_html=True)
+        if r.get('error'): st.error(f"Lỗi kết nối API: {r['error']}"); continue
+        if r.get('warning'): st.warning(f"Không kết nối được API, dùng dữ liệu đã lưu: {r['warning']}")
+        vip = [b for b in r['results'] if b['streak'] >= 2]
+        st.caption(f"Kỳ {r['latest']} · {r['days']} ngày · {len(r['results'])} cầu ({len(vip)} VIP)")
+        if kind == "positions":
+            rows = [{"#": i+1, "Vị trí": f"{b['pos_i']} + {b['pos_j']}", "Thông": f"{b['streak']}n"} for i, b in enumerate(r['results'][:20])]
+        else:
+            rows = [{"Giải": b['prize'], "Thông": f"{b['streak']}n", "Số": b['val']} for b in r['results']]
+        if rows: st.dataframe(pd.DataFrame(rows), use_container_width=True)
 
-# -----------------------------------------------------------------------------
-# 5. GIAO DIỆN CHÍNH
-# -----------------------------------------------------------------------------
 def main():
     st.title("🎯 Siêu Gà Súp pờ soi")
 
@@ -392,37 +191,72 @@ def main():
     # --- MENU ---
     c1, c2, c3 = st.columns([2, 1.5, 1.5])
     with c1: 
-        method = st.selectbox("PHƯƠNG PHÁP", ["Cầu Vị Trí (Ghép 2 số)", "Cầu Giải (Nhị Hợp)"])
+        # Chỉ Miền Bắc trừ khi bật SOICAU_UNVERIFIED_REGIONS (xem soicau.regions)
+        region = st.selectbox("MIỀN", list(regions.REGIONS), format_func=regions.REGIONS.get) if len(regions.REGIONS) > 1 else "mb"
+        method = st.selectbox("PHƯƠNG PHÁP", ["Cầu Vị Trí (Ghép 2 số)", "Cầu Giải (Nhị Hợp)", "Cầu Đa Điểm (Bộ 3-5 số)"])
+        is_multi = "Đa Điểm" in method
         
         b_type_label = st.radio("Loại Cầu", ["Cầu Trong Ngày (Live)", "Cầu Ngày Trước (Cross-day)"])
         bridge_type = "same_day" if "Trong Ngày" in b_type_label else "cross_day"
             
     with c2: 
-        is_set = st.checkbox("Soi Bộ Đào", False)
-        mode = "set" if is_set else "straight"
-        limit_days = st.slider("Số ngày", 10, 100, 50)
+        # Lô: trúng nếu số của cầu là 2 số cuối của bất kỳ giải nào (27 số)
+        mode_label = st.radio("Soi theo", ["Số Thẳng", "Bộ Đào", "Lô (27 giải)"], horizontal=True)
+        mode = "lo" if "Lô" in mode_label else "set" if "Bộ" in mode_label else "straight"
+        is_set = mode == "set"
+        limit_days = st.slider("Số ngày", 10, 1000, 50)
         
     with c3: 
-        allow_rev = st.checkbox("Đảo AB", True) if not is_set and "Vị Trí" in method else True
+        allow_rev = st.checkbox("Đảo AB", True) if not is_set and "Cầu Giải" not in method else True
         min_streak = st.number_input("Min Streak", 1, 20, 1)
-        enable_backtest = st.checkbox("Backtest theo ngày", False)
+        if is_multi:
+            # Cầu k vị trí: trúng nếu 2 trong k vị trí ghép ra đề; giới hạn thời gian để không treo
+            multi_k = st.number_input("Số vị trí (k)", multi.K_MIN, multi.K_MAX, 3)
+            multi_budget = st.slider("Giới hạn thời gian (giây)", 1, 30, int(multi.BUDGET_S))
+        enable_backtest = st.checkbox("Backtest theo ngày", False) if not is_multi else False
+
+    if region != "mb":
+        if is_multi: st.warning("Cầu Đa Điểm hiện chỉ soi Miền Bắc."); return
+        region_view(region, "positions" if "Vị Trí" in method else "prizes", mode, allow_rev, bridge_type, limit_days, min_streak)
+        return
+    if not is_multi: leaderboard_panel("positions" if "Vị Trí" in method else "prizes", mode, allow_rev, bridge_type, min_streak)
 
     # --- LOAD DATA ---
-    raw = fetch_history(limit_days)
-    data = process_data(raw)
+    perf.mark("menu")
+    data = load_history(limit_days)
+    perf.mark("load_history")
+    perf.count("days", len(data))
     if not data: st.error("Lỗi API"); return
     pos_map = get_pos_map()
     
+    # --- BƯỚC 1: KẾT QUẢ QUÉT (THU GỌN) ---
+    st.markdown("<div class='step-header'>BƯỚC 1: KẾT QUẢ QUÉT LỊCH SỬ</div>", unsafe_allow_html=True)
+
     # --- AUTO SCAN ---
     final_bridges = []
     final_prizes = []
+    final_multi = []
 
+    # Kết quả nhớ theo (kỳ mới nhất, số ngày, tham số): gõ live / tick GĐB không quét lại
+    params = (mode, allow_rev, bridge_type, min_streak)
     if "Vị Trí" in method:
-        res = scan_positions_auto(data, mode, allow_rev, bridge_type, min_streak)
+        res = memo.cached("scan_positions", data, params, lambda: index.scan_incremental(data, "positions", mode, allow_rev, bridge_type, min_streak))
         final_bridges = res
     elif "Cầu Giải" in method:
-        res = scan_prizes_auto(data, mode, bridge_type, min_streak)
+        res = memo.cached("scan_prizes", data, params, lambda: index.scan_incremental(data, "prizes", mode, allow_rev, bridge_type, min_streak))
         final_prizes = res
+    elif is_multi:
+        # Vẽ dần top 20 trong lúc quét (quét chạy nền dùng chung, mỗi session tự vẽ), bảng đầy đủ ở dưới khi xong
+        multi_box = st.empty()
+        def show_multi(snap):
+            with multi_box.container():
+                st.caption(f"⏳ Đang quét {snap['seeds_done']}/{snap['seeds']} cặp gốc · {snap['elapsed_s']}s")
+                if snap['results']: st.dataframe(pd.DataFrame(multi_table(snap['results'][:20], pos_map)), use_container_width=True)
+        res_multi = memo.streamed("scan_multi", data, params + (multi_k, multi_budget), lambda: multi.iter_scan_multi(data, multi_k, mode, allow_rev, bridge_type, min_streak, budget_s=multi_budget), show_multi)
+        multi_box.empty()
+        final_multi = res_multi['results']
+    perf.mark("scan")
+    perf.count("bridges", len(final_bridges) + len(final_prizes) + len(final_multi))
 
     vip_bridges = [b for b in final_bridges if b['streak'] >= 2]
     oneday_bridges = [b for b in final_bridges if b['streak'] == 1]
@@ -430,14 +264,15 @@ def main():
     vip_prizes = [p for p in final_prizes if p['streak'] >= 2]
     oneday_prizes = [p for p in final_prizes if p['streak'] == 1]
 
-    # --- BƯỚC 1: KẾT QUẢ QUÉT (THU GỌN) ---
-    st.markdown("<div class='step-header'>BƯỚC 1: KẾT QUẢ QUÉT LỊCH SỬ</div>", unsafe_allow_html=True)
-    
+    vip_multi = [b for b in final_multi if b['streak'] >= 2]
+    oneday_multi = [b for b in final_multi if b['streak'] == 1]
+
     if "Vị Trí" in method:
         if vip_bridges:
             st.success(f"🔥 {len(vip_bridges)} Cầu VIP (Max {vip_bridges[0]['streak']}n)")
             # HIỂN THỊ LUÔN BẢNG (KHÔNG ẨN)
-            df_vip = [{"#": i+1, "Vị trí": f"{pos_map[br['i']]} + {pos_map[br['j']]}", "Thông": f"{br['streak']}n"} for i,br in enumerate(vip_bridges[:20])]
+            sl = page_slice(len(vip_bridges), "page_vip")
+            df_vip = [{"#": sl.start+i+1, "Vị trí": f"{pos_map[br['i']]} + {pos_map[br['j']]}", "Thông": f"{br['streak']}n"} for i,br in enumerate(vip_bridges[sl])]
             st.dataframe(pd.DataFrame(df_vip), use_container_width=True)
         
         if oneday_bridges:
@@ -447,78 +282,77 @@ def main():
         if vip_prizes: 
             st.success(f"🔥 {len(vip_prizes)} Giải VIP")
             # HIỂN THỊ LUÔN BẢNG
-            df_vip_prize = []
-            for p in vip_prizes:
-                val_str = p['val']
-                
-                if mode == "set":
-                    # Tìm tất cả bộ có thể tạo từ val của prize này
-                    bo_sets = set()
-                    for i in range(len(val_str)):
-                        for j in range(len(val_str)):
-                            if i != j:
-                                pair = val_str[i] + val_str[j]
-                                bo = get_set(pair)
-                                if bo != "?":
-                                    bo_sets.add(bo)
-                    display_val = ", ".join(sorted(list(bo_sets))) if bo_sets else "-"
-                    col_name = "Bộ Đào"
-                else:
-                    # Tìm tất cả cặp 2 số (nhị hợp) - kể cả kép
-                    pairs = set()
-                    for i in range(len(val_str)):
-                        for j in range(len(val_str)):
-                            pair = val_str[i] + val_str[j]
-                            pairs.add(pair)
-                    display_val = ", ".join(sorted(list(pairs))) if pairs else "-"
-                    col_name = "Nhị Hợp"
-                
-                df_vip_prize.append({"Giải": p['prize'], "Thông": f"{p['streak']}n", col_name: display_val})
-            st.dataframe(pd.DataFrame(df_vip_prize), use_container_width=True)
+            st.dataframe(pd.DataFrame(prize_table(vip_prizes, mode)), use_container_width=True)
             
         if oneday_prizes: 
             st.info(f"✅ {len(oneday_prizes)} Giải 1 Ngày")
-            df_1d_prize = []
-            for p in oneday_prizes:
-                val_str = p['val']
-                
-                if mode == "set":
-                    # Tìm tất cả bộ có thể tạo từ val của prize này
-                    bo_sets = set()
-                    for i in range(len(val_str)):
-                        for j in range(len(val_str)):
-                            if i != j:
-                                pair = val_str[i] + val_str[j]
-                                bo = get_set(pair)
-                                if bo != "?":
-                                    bo_sets.add(bo)
-                    display_val = ", ".join(sorted(list(bo_sets))) if bo_sets else "-"
-                    col_name = "Bộ Đào"
-                else:
-                    # Tìm tất cả cặp 2 số (nhị hợp) - kể cả kép
-                    pairs = set()
-                    for i in range(len(val_str)):
-                        for j in range(len(val_str)):
-                            pair = val_str[i] + val_str[j]
-                            pairs.add(pair)
-                    display_val = ", ".join(sorted(list(pairs))) if pairs else "-"
-                    col_name = "Nhị Hợp"
-
-                
-                df_1d_prize.append({"Giải": p['prize'], "Thông": f"{p['streak']}n", col_name: display_val})
-            st.dataframe(pd.DataFrame(df_1d_prize), use_container_width=True)
+            st.dataframe(pd.DataFrame(prize_table(oneday_prizes, mode)), use_container_width=True)
+
+    elif is_multi:
+        if not res_multi['complete']:
+            st.warning(f"⏱️ Hết {multi_budget}s: mới quét {res_multi['seeds_done']}/{res_multi['seeds']} cặp gốc, kết quả chưa đủ.")
+        if vip_multi:
+            st.success(f"🔥 {len(vip_multi)} Cầu VIP {multi_k} vị trí (Max {vip_multi[0]['streak']}n)")
+            sl = page_slice(len(vip_multi), "page_multi")
+            st.dataframe(pd.DataFrame(multi_table(vip_multi[sl], pos_map, sl.start)), use_container_width=True)
+        if oneday_multi:
+            st.info(f"✅ {len(oneday_multi)} Cầu 1 Ngày")
+    perf.mark("render_step1")
 
     if enable_backtest:
         st.markdown("<div class='step-header'>BACKTEST THEO NGÀY</div>", unsafe_allow_html=True)
-        if "Vị Trí" in method and final_bridges:
-            bt = backtest_positions(data, mode, allow_rev, bridge_type, final_bridges[:30])
+        full_bt = st.checkbox("Toàn bộ cặp vị trí (107×106)", False) if "Vị Trí" in method else False
+        if full_bt:
+            f1, f2, f3 = st.columns(3)
+            with f1: sort_by = st.selectbox("Sắp xếp theo", ["Tỷ lệ", "Max Streak", "Streak hiện tại"])
+            with f2: min_rate = st.slider("Tỷ lệ tối thiểu (%)", 0, 100, 0)
+            with f3: min_longest = st.number_input("Max Streak tối thiểu", 0, 100, 0)
+            sort_col = {"Tỷ lệ": "hits", "Max Streak": "longest", "Streak hiện tại": "current"}[sort_by]
+            # Quét theo khối, vẽ dần top BT_TOP cặp; quá BT_BUDGET_S giây thì dừng
+            bt_box = st.empty()
+            def show_bt(snap, final=False):
+                with bt_box.container():
+                    note = "" if snap['complete'] else (" · ⏳ đang quét..." if snap['elapsed_s'] < BT_BUDGET_S else " · ⏱️ hết giờ")
+                    st.caption(f"Top {len(snap['results'])} cặp · đã quét {snap['done']}/{snap['total']} cặp{note}")
+                    # Đang quét chỉ vẽ trang đầu; ô chọn trang khi đã có kết quả cuối
+                    rows = snap['results'][page_slice(len(snap['results']), "page_bt", PAGE_SIZE * 5)] if final else snap['results'][:PAGE_SIZE * 5]
+                    if rows: st.dataframe(pd.DataFrame({
+                        "Vị trí": [f"{pos_map[r['i']]} + {pos_map[r['j']]}" for r in rows],
+                        "Hits": [r['hits'] for r in rows],
+                        "Tỷ lệ (%)": [round(r['rate'] * 100, 1) for r in rows],
+                        "Max Streak": [r['longest'] for r in rows],
+                        "Streak hiện tại": [r['current'] for r in rows],
+                    }), use_container_width=True)
+            snap = memo.streamed("backtest_all", data, (mode, allow_rev, bridge_type, sort_col, min_rate, min_longest),
+                                 lambda: stream.iter_positions(data, mode, allow_rev, bridge_type, sort_col, BT_TOP, min_rate / 100, min_longest, deadline=time.time() + BT_BUDGET_S),
+                                 show_bt)
+            show_bt(snap, final=True)
+        elif "Vị Trí" in method and final_bridges:
+            bt = memo.cached("backtest_positions", data, params, lambda: engine.backtest_positions(data, mode, allow_rev, bridge_type, final_bridges[:30]))
             df_bt = [{"#": i+1, "Vị trí": f"{pos_map[b['i']]} + {pos_map[b['j']]}", "Hits": b['hits'], "Tỷ lệ": f"{b['hits']}/{b['days']}"} for i,b in enumerate(bt)]
             st.dataframe(pd.DataFrame(df_bt), use_container_width=True)
         elif "Cầu Giải" in method and final_prizes:
-            bt = backtest_prizes(data, mode, bridge_type, final_prizes[:30])
+            bt = memo.cached("backtest_prizes", data, params, lambda: engine.backtest_prizes(data, mode, bridge_type, final_prizes[:30]))
             df_bt = [{"#": i+1, "Giải": b['prize'], "Hits": b['hits'], "Tỷ lệ": f"{b['hits']}/{b['days']}"} for i,b in enumerate(bt)]
             st.dataframe(pd.DataFrame(df_bt), use_container_width=True)
 
+        # Ngoài mẫu: mỗi ngày chỉ chọn cầu bằng các ngày trước nó
+        if not is_multi and st.checkbox("Walk-forward (ngoài mẫu)", False):
+            wf_days = st.slider("Số ngày kiểm tra", 30, 1000, 200)
+            wf_data = load_history(limit_days + wf_days)
+            kind = "positions" if "Vị Trí" in method else "prizes"
+            wf = memo.cached("walk_forward", wf_data, (kind, limit_days) + params, lambda: walkforward.walk_forward(wf_data, kind, mode, allow_rev, bridge_type, limit_days, min_streak, wf_days))
+            s = wf['summary']
+            m1, m2, m3 = st.columns(3)
+            m1.metric("Ngày có cầu", f"{s['active_days']}/{s['test_days']}")
+            m2.metric("Ngày trúng", f"{s['day_hit_rate'] * 100:.1f}%")
+            m3.metric("Tỷ lệ cầu trúng", f"{s['bridge_hit_rate'] * 100:.1f}%")
+            df_wf = pd.DataFrame(wf['days'][::-1])
+            if not df_wf.empty:
+                df_wf["% ngày trúng (20 kỳ)"] = df_wf['hit'].rolling(20, min_periods=1).mean() * 100
+                st.line_chart(df_wf.set_index('issue')["% ngày trúng (20 kỳ)"])
+        perf.mark("backtest")
+
     # --- BƯỚC 2: DÁN LIVE ---
     st.markdown("<div class='step-header'>BƯỚC 2: DÁN KẾT QUẢ LIVE</div>", unsafe_allow_html=True)
     col_input, col_check = st.columns([2, 1])
@@ -529,21 +363,24 @@ def main():
     with col_check:
         st.write("Tự động lấy KQ:")
         if st.button("🔄 Cập nhật Live (Auto)"):
-            live_data = fetch_live_data()
-            if live_data:
-                st.session_state['live_text'] = live_data
+            perf.mark("render_step2_pre")
+            live_res = live.fetch_live_result(min_digits=live.count_digits(st.session_state['live_text']))
+            perf.mark("live_fetch")
+            if live_res['text']:
+                st.session_state['live_text'] = live_res['text']
+                st.session_state['live_source'] = live_res
                 st.rerun()
             else:
                 st.warning("Chưa lấy được dữ liệu hoặc lỗi.")
+        if st.session_state.get('live_source'):
+            lr = st.session_state['live_source']
+            times = ", ".join(f"{k} {v}s" if v is not None else f"{k} (bỏ)" for k, v in lr['timings'].items())
+            st.caption(f"Nguồn: {lr['source']} ({lr['digits']}/107 số) · {times}")
         
         auto = st.checkbox("Tự động (10s/lần)", value=st.session_state['auto_refresh'])
-        if auto:
-            st.session_state['auto_refresh'] = True
-            import time
-            time.sleep(10)
-            st.rerun()
-        else:
-            st.session_state['auto_refresh'] = False
+        st.session_state['auto_refresh'] = auto
+        if auto: live_watch()
+    perf.mark("render_step2")
         
     # --- BƯỚC 3: ỐP CẦU ---
     if raw_text or bridge_type == "cross_day":
@@ -553,10 +390,12 @@ def main():
         if raw_text:
             live_str_107, preview_info = parse_smart_text(raw_text, has_gdb)
             filled = 107 - live_str_107.count('?')
+            perf.mark("parse_live")
+            perf.count("live_digits", filled)
             st.progress(filled/107, f"Tiến độ: {filled}/107 số")
         elif bridge_type == "cross_day":
-             live_str_107 = data[0]['body']
-             st.info(f"🔮 Dự đoán cho ngày tiếp theo (Dựa trên KQ ngày {data[0]['issue']})")
+             live_str_107 = data.body(0)
+             st.info(f"🔮 Dự đoán cho ngày tiếp theo (Dựa trên KQ ngày {data.issues[0]})")
 
         # --- 1. TÍNH TOÁN KẾT QUẢ ---
         collected_predictions = set()
@@ -564,214 +403,84 @@ def main():
         vip_matches = [] # Lưu lại để hiển thị box
 
         if "Vị Trí" in method:
-            # VIP
-            for idx, br in enumerate(vip_bridges):
-                i, j = br['i'], br['j']
-                vi, vj = '?', '?'
-                if i < len(live_str_107) and j < len(live_str_107):
-                    vi, vj = live_str_107[i], live_str_107[j]
-                
-                if vi != '?' and vj != '?':
-                    pred = vi + vj
-                    collected_predictions.add(pred)
-                    vip_matches.append({"idx": idx+1, "streak": br['streak'], "val": pred})
-
-            # 1 DAY
-            for br in oneday_bridges:
-                i, j = br['i'], br['j']
-                vi, vj = '?', '?'
-                if i < len(live_str_107) and j < len(live_str_107):
-                    vi, vj = live_str_107[i], live_str_107[j]
-                
-                if vi != '?' and vj != '?':
-                    pred = vi + vj
-                    oneday_predictions.add(pred)
+            # Giữ tracker qua các lần rerun: chỉ tính lại cầu dùng vị trí vừa có số
+            tracker_key = (mode, allow_rev, bridge_type, min_streak, len(data), data.issues[0])
+            is_new_tracker = st.session_state.get('tracker_key') != tracker_key
+            if is_new_tracker:
+                st.session_state['tracker'] = LiveTracker(vip_bridges + oneday_bridges, ["vip"] * len(vip_bridges) + ["1d"] * len(oneday_bridges))
+                st.session_state['tracker_key'] = tracker_key
+                st.session_state['last_new'] = None
+            tracker = st.session_state['tracker']
+            delta = tracker.update(live_str_107)
+            perf.mark("tracker")
+
+            collected_predictions = tracker.predictions("vip")
+            oneday_predictions = tracker.predictions("1d")
+            vip_matches = [{"idx": k+1, "streak": vip_bridges[k]['streak'], "val": v} for k, v in tracker.matches("vip")]
+
+            new_vip, new_1d = delta['new_numbers'].get("vip", []), delta['new_numbers'].get("1d", [])
+            if not is_new_tracker and (new_vip or new_1d):
+                st.session_state['last_new'] = (new_vip, new_1d)
+            if st.session_state.get('last_new'):
+                new_vip, new_1d = st.session_state['last_new']
+                st.info(f"🆕 Vừa nổ — VIP: {', '.join(new_vip) or '-'} | 1 Ngày: {', '.join(new_1d) or '-'}")
+
+        elif is_multi:
+            collected_predictions = multi.predictions(vip_multi, live_str_107, allow_rev)
+            oneday_predictions = multi.predictions(oneday_multi, live_str_107, allow_rev)
 
         # --- 2. HIỂN THỊ COPY (ĐƯA LÊN ĐẦU) ---
-        if "Vị Trí" in method and (collected_predictions or oneday_predictions):
+        if ("Vị Trí" in method or is_multi) and (collected_predictions or oneday_predictions):
             st.markdown("<div class='step-header'>📋 COPY DÀN SỐ</div>", unsafe_allow_html=True)
-            
-            def make_text(pred_set, mode, simple=False):
-                if not pred_set: return ""
-                sorted_list = sorted(list(pred_set))
-                
-                # Nếu simple=True (cho 1 ngày) hoặc mode straight -> Chỉ hiện số
-                if mode == "straight" or simple:
-                    count = len(sorted_list)
-                    chunk_size = 15
-                    chunks = [sorted_list[i:i+chunk_size] for i in range(0, count, chunk_size)]
-                    rows = [", ".join(c) for c in chunks]
-                    content = ",\n".join(rows)
-                    return f"(SL: {count}) {content}"
-                else:
-                    # Mode Bộ
-                    sets = set()
-                    nums = set()
-                    for n in pred_set:
-                        s = get_set(n)
-                        sets.add(s)
-                        if s in BO_DE_DICT: nums.update(BO_DE_DICT[s])
-                    
-                    sorted_sets = sorted(list(sets))
-                    sorted_nums = sorted(list(nums))
-                    
-                    set_chunks = [sorted_sets[i:i+15] for i in range(0, len(sorted_sets), 15)]
-                    set_rows = [", ".join(c) for c in set_chunks]
-                    set_str = ",\n".join(set_rows)
-                    
-                    num_chunks = [sorted_nums[i:i+15] for i in range(0, len(sorted_nums), 15)]
-                    num_rows = [", ".join(c) for c in num_chunks]
-                    num_str = ",\n".join(num_rows)
-                    
-                    return f"BỘ ({len(sorted_sets)}): {set_str}\n\nSỐ ({len(sorted_nums)}): {num_str}"
 
             c_vip, c_1d = st.columns(2)
             with c_vip:
                 st.markdown("🔥 **VIP (2+ Ngày):**")
-                st.code(make_text(collected_predictions, mode, simple=False), language='text')
+                st.code(make_copy_text(collected_predictions, mode, simple=False), language='text')
             with c_1d:
                 st.markdown("✅ **1 Ngày (Chỉ số):**")
                 # simple=True để chỉ hiện số, không hiện bộ
-                st.code(make_text(oneday_predictions, mode, simple=True), language='text')
+                st.code(make_copy_text(oneday_predictions, mode, simple=True), language='text')
 
         # --- 3. HIỂN THỊ VISUAL (CHỈ VIP) ---
         if "Vị Trí" in method:
             if vip_matches:
                 st.write("**🔥 Chi tiết Cầu VIP:**")
-                cols = st.columns(8) 
-                for k, m in enumerate(vip_matches):
-                    with cols[k%8]:
-                        st.markdown(f"""<div class='hot-box-vip'><div class='hot-title-vip'>#{m['idx']} ({m['streak']}n)</div><div class='hot-val-vip'>{m['val']}</div></div>""", unsafe_allow_html=True)
-                if not vip_matches: st.caption("Chưa có cầu VIP nổ.")
+                vip_grid(vip_matches, "page_vip_grid")
             
             # 1 DAY: Đã bỏ visual box theo yêu cầu "k cần màu mè"
 
         elif "Cầu Giải" in method:
-            pmap = get_prize_map_no_gdb()
-            
-            from collections import Counter
-            
-            # VIP
-            if vip_prizes:
-                st.write("🔥 **Giải VIP:**")
-                vip_table_data = []
-                
-                for p in vip_prizes:
-                    pname = p['prize']; s, e = pmap.get(pname)
-                    
-                    src_body = live_str_107
-                    if bridge_type == "cross_day": src_body = data[0]['body']
-                    
-                    if e <= len(src_body) and '?' not in src_body[s:e]:
-                        digits = src_body[s:e]
-                        
-                        # Tính nhị hợp hoặc bộ đào
-                        if mode == "set":
-                            # Tìm tất cả bộ có thể tạo từ digits
-                            bo_sets = []
-                            for i in range(len(digits)):
-                                for j in range(len(digits)):
-                                    if i != j:
-                                        pair = digits[i] + digits[j]
-                                        bo_set = get_set(pair)
-                                        if bo_set != "?":
-                                            bo_sets.append(bo_set)
-                            
-                            # Đếm tần suất
-                            bo_counter = Counter(bo_sets)
-                            freq_display = ", ".join([bo for bo, count in bo_counter.most_common()])
-                            
-                            vip_table_data.append({
-                                "Giải": pname,
-                                "Thông": f"{p['streak']}n",
-                                "Số gốc": digits,
-                                "Bộ Đào (Tần suất)": freq_display
-                            })
-                        else:
-                            # Tìm tất cả cặp 2 số (nhị hợp)
-                            pairs = []
-                            for i in range(len(digits)):
-                                for j in range(len(digits)):
-                                    pair = digits[i] + digits[j]
-                                    pairs.append(pair)
-                            
-                            # Đếm tần suất
-                            pair_counter = Counter(pairs)
-                            freq_display = ", ".join([num for num, count in pair_counter.most_common()])
-                            
-                            vip_table_data.append({
-                                "Giải": pname,
-                                "Thông": f"{p['streak']}n",
-                                "Số gốc": digits,
-                                "Nhị Hợp (Tần suất)": freq_display
-                            })
-                
-                if vip_table_data:
-                    st.dataframe(pd.DataFrame(vip_table_data), use_container_width=True)
-                else:
-                    st.caption("Chưa đủ dữ liệu...")
-            
-            # 1 DAY
-            if oneday_prizes:
-                st.write("✅ **Giải 1 Ngày:**")
-                oneday_table_data = []
-                
-                for p in oneday_prizes:
-                    pname = p['prize']; s, e = pmap.get(pname)
-                    
-                    src_body = live_str_107
-                    if bridge_type == "cross_day": src_body = data[0]['body']
-
-                    if e <= len(src_body) and '?' not in src_body[s:e]:
-                        digits = src_body[s:e]
-                        
-                        # Tính nhị hợp hoặc bộ đào
-                        if mode == "set":
-                            # Tìm tất cả bộ có thể tạo từ digits
-                            bo_sets = []
-                            for i in range(len(digits)):
-                                for j in range(len(digits)):
-                                    if i != j:
-                                        pair = digits[i] + digits[j]
-                                        bo_set = get_set(pair)
-                                        if bo_set != "?":
-                                            bo_sets.append(bo_set)
-                            
-                            # Đếm tần suất
-                            bo_counter = Counter(bo_sets)
-                            freq_display = ", ".join([bo for bo, count in bo_counter.most_common()])
-                            
-                            oneday_table_data.append({
-                                "Giải": pname,
-                                "Thông": f"{p['streak']}n",
-                                "Số gốc": digits,
-                                "Bộ Đào (Tần suất)": freq_display
-                            })
-                        else:
-                            # Tìm tất cả cặp 2 số (nhị hợp)
-                            pairs = []
-                            for i in range(len(digits)):
-                                for j in range(len(digits)):
-                                    pair = digits[i] + digits[j]
-                                    pairs.append(pair)
-                            
-                            # Đếm tần suất
-                            pair_counter = Counter(pairs)
-                            freq_display = ", ".join([num for num, count in pair_counter.most_common()])
-                            
-                            oneday_table_data.append({
-                                "Giải": pname,
-                                "Thông": f"{p['streak']}n",
-                                "Số gốc": digits,
-                                "Nhị Hợp (Tần suất)": freq_display
-                            })
-                
-                if oneday_table_data:
-                    st.dataframe(pd.DataFrame(oneday_table_data), use_container_width=True)
-                else:
-                    st.caption("Chưa đủ dữ liệu...")
-
+            # Cầu ngày trước ốp trên KQ hôm qua; nhị hợp / bộ đào tra từ pair_table (dùng chung với Bước 1)
+            src_body = data.body(0) if bridge_type == "cross_day" else live_str_107
+            for title, group in (("🔥 **Giải VIP:**", vip_prizes), ("✅ **Giải 1 Ngày:**", oneday_prizes)):
+                if not group: continue
+                st.write(title)
+                rows = live_prize_table(group, src_body, mode)
+                if rows: st.dataframe(pd.DataFrame(rows), use_container_width=True)
+                else: st.caption("Chưa đủ dữ liệu...")
+        perf.mark("render_step3")
+
+
+def perf_panel(history):
+    """Sidebar: thời gian từng bước của các lần rerun gần nhất trong session (SOICAU_PERF=1)."""
+    if not perf.ENABLED: return
+    with st.sidebar.expander("⏱ Hiệu năng", expanded=False):
+        runs = list(history)[::-1]
+        if not runs: st.caption("Chưa có lần chạy nào."); return
+        last = runs[0]
+        st.caption(f"Lần trước: {last['total_ms']:.0f} ms · {last['time']}")
+        st.dataframe(pd.DataFrame([{"Bước": k, "ms": v} for k, v in last['stages_ms'].items()]), use_container_width=True)
+        if last['counters']: st.caption(" · ".join(f"{k}: {v}" for k, v in last['counters'].items()))
+        rows = [{"#": r['seq'], "Lúc": r['time'][11:], "Tổng (ms)": r['total_ms'], **r['stages_ms']} for r in runs]
+        st.dataframe(pd.DataFrame(rows).fillna(0), use_container_width=True)
+        if last.get('profile'): st.caption(f"cProfile: {last['profile']}")
+        ms = memo.RESULTS.stats
+        st.caption(f"Cache kết quả: {len(memo.RESULTS)}/{memo.RESULTS.maxsize} mục · hit {ms['hits']} · miss {ms['misses']} · chờ {ms['waits']}")
 
 
 if __name__ == "__main__":
-    main()
+    perf_history = st.session_state.setdefault("perf_history", perf.new_history())
+    with perf.run(history=perf_history):
+        main()
+    perf_panel(perf_history)
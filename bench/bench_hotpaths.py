@@ -0,0 +1,204 @@
+"""Benchmark các đường nóng: xử lý dữ liệu, quét cầu, backtest, parse live.
+
+Chạy độc lập, không cần Streamlit hay mạng:
+
+    python bench/bench_hotpaths.py                      # 50, 100, 1000, 10000 ngày
+    python bench/bench_hotpaths.py --sizes 50 100 --repeat 5
+    python bench/bench_hotpaths.py --compare bench/results/cu.json
+
+Mỗi hàm được đo với mọi tổ hợp mode / đảo AB / bridge_type trên lịch sử giả
+lập (bench/synthetic.py). Đồng thời đối chiếu kết quả của engine NumPy và
+chỉ mục tăng dần với bản thuần Python trong soicau.core; sai khác nào cũng
+làm script thoát với mã 1. Kết quả ghi ra file JSON để so sánh giữa các lần.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("SOICAU_CACHE_DIR", tempfile.mkdtemp(prefix="soicau-bench-"))
+
+import numpy as np
+
+from soicau import core, engine, index, stream
+from soicau.history import DrawHistory
+from synthetic import live_text, synthetic_raw
+
+SIZES = [50, 100, 1000, 10000]
+COMBOS = [
+    ("straight", True), ("straight", False), ("set", True),
+]
+BRIDGE_TYPES = ["same_day", "cross_day"]
+
+
+def timed(fn, repeat):
+    """Thời gian nhỏ nhất (giây) qua ``repeat`` lần; hàm chậm (>1s) chỉ chạy 1 lần."""
+    best, out = None, None
+    for k in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+        if dt > 1: break
+    return best, out
+
+
+class Suite:
+    def __init__(self, repeat):
+        self.repeat = repeat
+        self.results = []
+        self.checks = []
+
+    def time(self, name, days, params, fn):
+        sec, out = timed(fn, self.repeat)
+        self.record(name, days, params, sec)
+        return out
+
+    def record(self, name, days, params, sec):
+        self.results.append({"name": name, "days": days, "params": params, "ms": round(sec * 1000, 3)})
+        print(f"  {name:<34}{days:>7}  {json.dumps(params, ensure_ascii=False):<58}{sec * 1000:>10.2f} ms")
+
+    def check(self, name, days, params, ok):
+        self.checks.append({"name": name, "days": days, "params": params, "ok": bool(ok)})
+        if not ok: print(f"  !! KHÁC KẾT QUẢ: {name} {days} {params}")
+
+
+def bench_size(suite, days):
+    raw = synthetic_raw(days + 1)
+    data = suite.time("core.process_data", days, {}, lambda: core.process_data(raw[:days]))
+    hist = suite.time("DrawHistory.from_draws", days, {}, lambda: DrawHistory.from_draws(data))
+    suite.check("DrawHistory", days, {}, list(hist) == data)
+    prev = core.process_data(raw[1:])  # cửa sổ của hôm trước, để đo cập nhật tăng dần
+
+    for mode, allow_rev in COMBOS:
+        for bt in BRIDGE_TYPES:
+            p = {"mode": mode, "allow_rev": allow_rev, "bridge_type": bt}
+            ref = suite.time("core.scan_positions_auto", days, p, lambda: core.scan_positions_auto(data, mode, allow_rev, bt, 1))
+            got = suite.time("engine.scan_positions_auto", days, p, lambda: engine.scan_positions_auto(data, mode, allow_rev, bt, 1))
+            suite.check("engine.scan_positions_auto", days, p, got == ref)
+            got = suite.time("engine.scan_positions_auto (DrawHistory)", days, p, lambda: engine.scan_positions_auto(hist, mode, allow_rev, bt, 1))
+            suite.check("engine.scan_positions_auto (DrawHistory)", days, p, got == ref)
+
+            index._INDEXES.clear()
+            suite.time("index.rebuild", days, p, lambda: index.StreakIndex("positions", mode, allow_rev, bt, len(data)).rebuild(data))
+            got = index.scan_incremental(data, "positions", mode, allow_rev, bt, 1)
+            suite.check("index.scan_incremental", days, p, got == ref)
+            suite.time("index.scan_incremental (có sẵn)", days, p, lambda: index.scan_incremental(data, "positions", mode, allow_rev, bt, 1))
+            sec, idx, status = time_advance(prev, data, mode, allow_rev, bt, suite.repeat)
+            suite.record("index.advance (1 kỳ)", days, p, sec)
+            suite.check("index.advance", days, p, status == "advance" and idx.scan(data, 1) == ref)
+
+            cands = ref[:30]
+            ref_bt = suite.time("core.backtest_positions (30)", days, p, lambda: core.backtest_positions(data, mode, allow_rev, bt, cands))
+            got_bt = suite.time("engine.backtest_positions (30)", days, p, lambda: engine.backtest_positions(data, mode, allow_rev, bt, cands))
+            suite.check("engine.backtest_positions", days, p, got_bt == ref_bt)
+            full = suite.time("engine.backtest_all_positions", days, p, lambda: engine.backtest_all_positions(data, mode, allow_rev, bt))
+            sample = full[::max(len(full) // 200, 1)]
+            ref_hits = core.backtest_positions(data, mode, allow_rev, bt, sample)
+            hits = {(r['i'], r['j']): r['hits'] for r in ref_hits}
+            suite.check("engine.backtest_all_positions", days, p, all(hits[(r['i'], r['j'])] == r['hits'] for r in sample))
+            top = suite.time("stream.iter_positions (top 100)", days, p, lambda: list(stream.iter_positions(data, mode, allow_rev, bt, "hits", 100))[-1])
+            suite.check("stream.iter_positions", days, p, [(r['i'], r['j']) for r in top['results']] == [(r['i'], r['j']) for r in full[:100]])
+
+    for mode in ("straight", "set"):
+        for bt in BRIDGE_TYPES:
+            p = {"mode": mode, "bridge_type": bt}
+            ref = suite.time("core.scan_prizes_auto", days, p, lambda: core.scan_prizes_auto(data, mode, bt, 1))
+            got = suite.time("engine.scan_prizes_auto", days, p, lambda: engine.scan_prizes_auto(data, mode, bt, 1))
+            suite.check("engine.scan_prizes_auto", days, p, got == ref)
+            ref_bt = suite.time("core.backtest_prizes", days, p, lambda: core.backtest_prizes(data, mode, bt, ref))
+            got_bt = suite.time("engine.backtest_prizes", days, p, lambda: engine.backtest_prizes(data, mode, bt, ref))
+            suite.check("engine.backtest_prizes", days, p, got_bt == ref_bt)
+            index._INDEXES.clear()
+            suite.check("index.scan_incremental (giải)", days, p, index.scan_incremental(data, "prizes", mode, False, bt, 1) == ref)
+
+    # Soi lô: không có bản thuần Python, so engine với chỉ mục tăng dần
+    for bt in BRIDGE_TYPES:
+        p = {"mode": "lo", "allow_rev": True, "bridge_type": bt}
+        ref = suite.time("engine.scan_positions_auto", days, p, lambda: engine.scan_positions_auto(hist, "lo", True, bt, 1))
+        suite.time("engine.backtest_all_positions", days, p, lambda: engine.backtest_all_positions(hist, "lo", True, bt))
+        index._INDEXES.clear()
+        suite.check("index.scan_incremental", days, p, index.scan_incremental(hist, "positions", "lo", True, bt, 1) == ref)
+        suite.time("engine.scan_prizes_auto", days, {"mode": "lo", "bridge_type": bt}, lambda: engine.scan_prizes_auto(hist, "lo", bt, 1))
+
+
+def time_advance(prev, data, mode, allow_rev, bt, repeat):
+    """Thời gian (giây) để chỉ mục dựng trên ``prev`` trượt sang ``data`` (thêm 1 kỳ)."""
+    best, idx = None, None
+    for _ in range(repeat):
+        idx = index.StreakIndex("positions", mode, allow_rev, bt, len(data))
+        idx.rebuild(prev)
+        t0 = time.perf_counter()
+        status = idx.sync(data)
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best, idx, status
+
+
+def bench_parse(suite):
+    body = core.process_data(synthetic_raw(1))[0]['body']
+    for upto in (27, 58, 107):
+        text = live_text(body, upto)
+        suite.time("core.parse_smart_text", 1, {"digits": upto}, lambda: core.parse_smart_text(text, True))
+    suite.check("core.parse_smart_text", 1, {}, core.parse_smart_text(live_text(body), True)[0] == body)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def compare(old_path, results):
+    with open(old_path, encoding="utf-8") as f: old = json.load(f)
+    key = lambda r: (r["name"], r["days"], json.dumps(r["params"], sort_keys=True))
+    before = {key(r): r["ms"] for r in old["results"]}
+    print(f"\nSo với {old_path} ({old['meta'].get('commit', '?')}):")
+    for r in results:
+        if key(r) in before and before[key(r)] > 0:
+            ratio = r["ms"] / before[key(r)]
+            flag = "  <-- chậm hơn" if ratio > 1.2 else ""
+            print(f"  {r['name']:<34}{r['days']:>7}  {before[key(r)]:>10.2f} -> {r['ms']:>10.2f} ms  x{ratio:.2f}{flag}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--out", default=None, help="file JSON kết quả (mặc định bench/results/hotpaths-<thời gian>.json)")
+    ap.add_argument("--compare", default=None, help="file JSON của lần chạy trước để so sánh")
+    args = ap.parse_args()
+
+    suite = Suite(args.repeat)
+    for days in args.sizes:
+        print(f"\n== {days} ngày ==")
+        bench_size(suite, days)
+    print("\n== parse ==")
+    bench_parse(suite)
+
+    out = args.out or os.path.join(ROOT, "bench", "results", time.strftime("hotpaths-%Y%m%d-%H%M%S.json"))
+    if os.path.dirname(out): os.makedirs(os.path.dirname(out), exist_ok=True)
+    meta = {
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"), "commit": git_commit(), "python": platform.python_version(),
+        "numpy": np.__version__, "machine": platform.machine(), "cpus": os.cpu_count(), "repeat": args.repeat,
+    }
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": suite.results, "checks": suite.checks}, f, ensure_ascii=False, indent=1)
+    print(f"\nĐã ghi {out}")
+    if args.compare: compare(args.compare, suite.results)
+
+    failed = [c for c in suite.checks if not c["ok"]]
+    print(f"Đối chiếu: {len(suite.checks) - len(failed)}/{len(suite.checks)} khớp")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""So sánh chi phí parse mỗi lần poll: bộ tách regex vs BeautifulSoup.
+
+Chạy: python bench/bench_live_parse.py [số lần lặp] [thư mục ...]
+Mặc định dùng các trang giả lập trong fixtures/synthetic_live: dựng tay theo
+markup mà hai bộ parse và debug_scrape.py dựa vào (đủ giải, đang quay dở,
+chưa quay, ô giải có thẻ cùng tên lồng bên trong), độn thêm script / menu
+cho gần kích thước trang thật; không phải trang tải về, nên tỉ lệ tăng tốc
+chỉ là ước lượng. Để đo trên trang thật, ghi bằng
+``python bench/fakeserver.py record DIR`` rồi truyền DIR (file
+DIR/<nguồn>/*.html). Kết quả hai bộ parse phải giống hệt.
+"""
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from soicau import live
+
+FIXTURES = os.path.join(ROOT, "fixtures", "synthetic_live")
+PARSERS = {
+    "minhngoc": (live.parse_minhngoc_html, live.parse_minhngoc_html_bs4),
+    "daiphat": (live.parse_daiphat_html, live.parse_daiphat_html_bs4),
+}
+
+
+def pages(dirs):
+    """(tên, nguồn, đường dẫn) các trang: <nguồn>_*.html hoặc <nguồn>/*.html."""
+    for d in dirs:
+        for root, _, names in os.walk(d):
+            for name in sorted(names):
+                source = name.split("_")[0] if name.split("_")[0] in PARSERS else os.path.basename(root)
+                if source in PARSERS and name.endswith(".html"):
+                    yield os.path.relpath(os.path.join(root, name), d), source, os.path.join(root, name)
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print(f"{'fixture':<28}{'KB':>6}{'regex (ms)':>12}{'bs4 (ms)':>12}{'x':>8}")
+    for name, source, path in pages(sys.argv[2:] or [FIXTURES]):
+        with open(path, "rb") as f: content = f.read()
+        fast, ref = PARSERS[source]
+        if fast(content) != ref(content):
+            print(f"{name}: KẾT QUẢ KHÁC NHAU")
+            sys.exit(1)
+        t_fast = min(timeit.repeat(lambda: fast(content), number=number, repeat=3)) / number * 1000
+        t_ref = min(timeit.repeat(lambda: ref(content), number=max(number // 10, 1), repeat=3)) / max(number // 10, 1) * 1000
+        print(f"{name:<28}{len(content) / 1024:>6.0f}{t_fast:>12.3f}{t_ref:>12.2f}{t_ref / t_fast:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+"""Server giả lập nguồn dữ liệu: API lịch sử và hai trang tường thuật live.
+
+Phục vụ trên một cổng, đúng đường dẫn của nguồn thật, nên chỉ cần trỏ
+SOICAU_API_BASE / SOICAU_MINHNGOC_URL / SOICAU_DAIPHAT_URL vào đây là app,
+CLI hay bench/replay.py chạy được không cần mạng. Trang live đổi theo đồng hồ
+của kịch bản (tính từ lúc khởi động hoặc gọi /_reset):
+
+- kịch bản giả lập: lịch sử từ bench/synthetic.py, kỳ đang quay hiện dần
+  từng chữ số theo thứ tự quay XSMB (giải nhất ... giải bảy, đặc biệt sau
+  cùng), ``--step`` giây một chữ số, HTML dựng từ trang mẫu giả lập trong
+  fixtures/synthetic_live; quay xong thì kỳ đó có trong API lịch sử.
+- phát lại bản ghi thật (``--replay DIR``, ghi bằng lệnh ``record``):
+  history.json và DIR/<nguồn>/<mili giây>.html theo đúng nhịp đã ghi.
+
+Mỗi đường dẫn có thể chậm (``--delay`` + ``--jitter``), trả lỗi 500
+(``--fail-rate``) hoặc treo quá timeout của client (``--hang-rate``).
+Các đường dẫn điều khiển (không bị lỗi giả): /_reset, /_timeline (thời điểm
+mỗi chữ số xuất hiện trên từng trang và kết quả thật), /_stats.
+
+Chạy:
+  python bench/fakeserver.py serve [--port 8765] [--step 0.5] [--fail-rate 0.05]
+  python bench/fakeserver.py serve --replay DIR
+  python bench/fakeserver.py record DIR          # ghi trang live thật trong lúc quay
+"""
+import argparse
+import bisect
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from soicau import archive, live, net
+from soicau.core import XSMB_STRUCTURE, get_api_url, parse_detail_json, parse_smart_text
+from synthetic import synthetic_raw
+
+FIXTURES = os.path.join(ROOT, "fixtures", "synthetic_live")
+API_PATH = "/api/front/open/lottery/history/list/game"
+# nguồn -> (đường dẫn trên server giả, bộ parse của app)
+SOURCES = {
+    "minhngoc": (urlsplit(live.MINHNGOC_URL).path, live.parse_minhngoc_html),
+    "daiphat": (urlsplit(live.DAIPHAT_URL).path, live.parse_daiphat_html),
+}
+LOADING = {"minhngoc": b'<img src="/images/load.gif" alt="">', "daiphat": b'<img src="/Content/images/loading.gif" class="img-loading">'}
+# XSMB quay giải nhất trước, giải đặc biệt sau cùng
+DRAW_ORDER = ["G1", "G2", "G3", "G4", "G5", "G6", "G7", "GĐB"]
+FULL_DIGITS = sum(c * l for _, c, l in XSMB_STRUCTURE)
+
+_DP_SPAN_RE = re.compile(rb'(<span\b[^>]*?\bid\s*=\s*["\']mb_prize_(DB|\d)_item_(\d+)["\'][^>]*>)(.*?)(</span\s*>)', re.S | re.I)
+_MN_CELL_RE = re.compile(rb'(<td\b[^>]*?\bclass\s*=\s*["\'](giaidb|giai[1-7])["\'][^>]*>)(.*?)(</td\s*>)', re.S | re.I)
+
+
+# -----------------------------------------------------------------------------
+# DỰNG TRANG LIVE TỪ TRANG MẪU
+# -----------------------------------------------------------------------------
+def slots():
+    """Các số của một kỳ theo thứ tự trên trang: [(giải, vị trí đầu, độ dài)]."""
+    out, pos = [], 0
+    for name, count, length in XSMB_STRUCTURE:
+        for _ in range(count):
+            out.append((name, pos, length))
+            pos += length
+    return out
+
+
+def draw_order():
+    """Thứ tự hiện chữ số (vị trí trong body) khi quay: theo DRAW_ORDER, trái sang phải."""
+    return [p for prize in DRAW_ORDER for name, start, length in slots() if name == prize for p in range(start, start + length)]
+
+
+def shown_numbers(body, revealed):
+    """Số hiện trên trang khi các vị trí ``revealed`` đã quay: phần đầu đã có của mỗi số."""
+    out = []
+    for _, start, length in slots():
+        k = 0
+        while k < length and start + k in revealed: k += 1
+        out.append(body[start:start + k])
+    return out
+
+
+def render(source, template, numbers):
+    """HTML của ``source`` từ trang mẫu, thay ô số thứ k bằng ``numbers[k]`` ("" là đang quay)."""
+    first = {}
+    for k, (name, _, _) in enumerate(slots()): first.setdefault(name, k)
+    cell = lambda v: v.encode("ascii") if v else LOADING[source]
+    seen = set()
+    if source == "daiphat":
+        def span(m):
+            key = (m.group(2).upper(), int(m.group(3)))
+            if key in seen: return m.group(0)
+            seen.add(key)
+            k = first["GĐB" if key[0] == b"DB" else f"G{key[0].decode()}"] + key[1]
+            return m.group(1) + cell(numbers[k]) + m.group(5)
+        return _DP_SPAN_RE.sub(span, template)
+
+    def td(m):
+        cls = m.group(2).lower()
+        if cls in seen: return m.group(0)
+        seen.add(cls)
+        name = "GĐB" if cls == b"giaidb" else f"G{cls[4:].decode()}"
+        nums = [numbers[k] for k, s in enumerate(slots()) if s[0] == name]
+        return m.group(1) + b"".join(b"<div>" + cell(v) + b"</div>" for v in nums) + m.group(4)
+    return _MN_CELL_RE.sub(td, template)
+
+
+# -----------------------------------------------------------------------------
+# KỊCH BẢN
+# -----------------------------------------------------------------------------
+class Faults:
+    """Lỗi giả của một đường dẫn: trễ, trả 500, treo."""
+
+    def __init__(self, delay=0.0, jitter=0.0, fail_rate=0.0, hang_rate=0.0, hang_s=30.0, seed=0):
+        self.delay, self.jitter, self.fail_rate, self.hang_rate, self.hang_s = delay, jitter, fail_rate, hang_rate, hang_s
+        self._rnd = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def apply(self):
+        """Ngủ theo độ trễ; trả về "fail", "hang" hoặc None."""
+        with self._lock: r, j = self._rnd.random(), self._rnd.uniform(0, self.jitter)
+        time.sleep(self.delay + j)
+        if r < self.hang_rate:
+            time.sleep(self.hang_s)
+            return "hang"
+        if r < self.hang_rate + self.fail_rate: return "fail"
+        return None
+
+
+class Scenario:
+    def __init__(self, history, snapshots, final=None, faults=None, etag=False):
+        """``history``: bản ghi thô của API (mới nhất trước, chưa có kỳ đang quay);
+        ``snapshots``: {nguồn: [(giây, html bytes)]} tăng dần theo thời gian;
+        ``final``: bản ghi thô của kỳ đang quay, có trong API khi quay xong;
+        ``faults``: {đường dẫn ("api" hoặc nguồn): Faults}."""
+        self.history = history
+        self.snapshots = snapshots
+        self.times = {s: [t for t, _ in snaps] for s, snaps in snapshots.items()}
+        self.final = final
+        self.end = max((t[-1] for t in self.times.values() if t), default=0.0)
+        self.faults = faults or {}
+        self.etag = etag
+        self.start = None  # chưa chạy: đồng hồ đứng ở 0
+        self.stats = Counter()
+        self._timeline = None
+
+    @classmethod
+    def synthetic(cls, days=120, step=0.5, seed=0, **kw):
+        """Lịch sử ``days`` kỳ giả lập và kỳ kế tiếp quay dần ``step`` giây mỗi chữ số."""
+        raw = synthetic_raw(days + 1, seed)
+        body = parse_detail_json(raw[0]["detail"])
+        order = draw_order()
+        snapshots = {}
+        for source in SOURCES:
+            with open(os.path.join(FIXTURES, f"{source}_full.html"), "rb") as f: template = f.read()
+            snapshots[source] = [(round(k * step, 3), render(source, template, shown_numbers(body, set(order[:k]))))
+                                 for k in range(len(order) + 1)]
+        return cls(raw[1:], snapshots, final=raw[0], **kw)
+
+    @classmethod
+    def from_recording(cls, path, **kw):
+        """Bản ghi của lệnh ``record``: history.json và <nguồn>/<mili giây>.html."""
+        with open(os.path.join(path, "history.json"), "rb") as f: history = archive.parse_history_json(f.read())
+        snapshots = {}
+        for source in SOURCES:
+            d = os.path.join(path, source)
+            if not os.path.isdir(d): continue
+            names = sorted((n for n in os.listdir(d) if n.endswith(".html")), key=lambda n: int(n[:-5]))
+            snapshots[source] = []
+            for n in names:
+                with open(os.path.join(d, n), "rb") as f: snapshots[source].append((int(n[:-5]) / 1000, f.read()))
+        return cls(history, snapshots, **kw)
+
+    def reset(self):
+        self.start = time.time()
+
+    def clock(self):
+        return 0.0 if self.start is None else time.time() - self.start
+
+    def page(self, source):
+        snaps = self.snapshots[source]
+        return snaps[max(bisect.bisect_right(self.times[source], self.clock()) - 1, 0)][1]
+
+    def history_page(self, limit):
+        raw = ([self.final] if self.final and self.clock() >= self.end else []) + self.history
+        return raw[:limit]
+
+    def timeline(self):
+        """{start, end, body, reveal: {nguồn: [giây chữ số thứ p xuất hiện, None nếu không]}}.
+
+        Tính bằng chính bộ parse của app trên từng trang, nên đúng cả với bản ghi thật.
+        """
+        if self._timeline is None:
+            reveal, body = {}, None
+            for source, snaps in self.snapshots.items():
+                parse = SOURCES[source][1]
+                seen = [None] * FULL_DIGITS
+                for t, html in snaps:
+                    live_str = parse_smart_text(parse(html), True)[0]
+                    for p, c in enumerate(live_str):
+                        if c != '?' and seen[p] is None: seen[p] = t
+                    if '?' not in live_str: body = live_str
+                reveal[source] = seen
+            if self.final: body = parse_detail_json(self.final["detail"])
+            self._timeline = {"end": self.end, "body": body, "reveal": reveal}
+        return {**self._timeline, "start": self.start}
+
+
+# -----------------------------------------------------------------------------
+# HTTP
+# -----------------------------------------------------------------------------
+def make_handler(scn):
+    routes = {path: source for source, (path, _) in SOURCES.items()}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive như nguồn thật
+        disable_nagle_algorithm = True  # header và body ghi riêng: không chờ ACK trễ (~40 ms)
+
+        def log_message(self, *args):
+            pass
+
+        def send(self, code, body=b"", ctype="text/html; charset=utf-8", headers=()):
+            try:
+                self.send_response(code)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                for k, v in headers: self.send_header(k, v)
+                self.end_headers()
+                if body: self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # client đã bỏ (timeout)
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path == "/_reset":
+                scn.reset()
+                return self.send(200, b"{}", "application/json")
+            if url.path == "/_timeline": return self.send(200, json.dumps(scn.timeline()).encode(), "application/json")
+            if url.path == "/_stats": return self.send(200, json.dumps(dict(scn.stats)).encode(), "application/json")
+            route = "api" if url.path == API_PATH else routes.get(url.path)
+            if route is None: return self.send(404)
+            fault = scn.faults[route].apply() if route in scn.faults else None
+            scn.stats[f"{route} {fault or 'ok'}"] += 1
+            if fault == "fail": return self.send(500)
+            if route == "api":
+                q = parse_qs(url.query)
+                raw = scn.history_page(int(q.get("limitNum", ["50"])[0])) if q.get("gameCode", ["miba"])[0] == "miba" else []
+                return self.send(200, json.dumps({"t": {"issueList": raw}}).encode(), "application/json")
+            body = scn.page(route)
+            if scn.etag:
+                tag = '"%s"' % hashlib.blake2b(body, digest_size=8).hexdigest()
+                if self.headers.get("If-None-Match") == tag: return self.send(304, headers=[("ETag", tag)])
+                return self.send(200, body, headers=[("ETag", tag)])
+            self.send(200, body)
+
+    return Handler
+
+
+def start(scn, host="127.0.0.1", port=0):
+    """Chạy server trong luồng nền; trả về (server, địa chỉ gốc)."""
+    server = ThreadingHTTPServer((host, port), make_handler(scn))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fakeserver", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def env(base):
+    """Biến môi trường trỏ soicau vào server giả tại ``base``."""
+    return {"SOICAU_API_BASE": base, "SOICAU_MINHNGOC_URL": base + SOURCES["minhngoc"][0],
+            "SOICAU_DAIPHAT_URL": base + SOURCES["daiphat"][0]}
+
+
+def point_to(base):
+    """Trỏ tiến trình hiện tại (đã import soicau) vào server giả."""
+    from soicau import core
+    core.API_BASE = base
+    live.MINHNGOC_URL, live.DAIPHAT_URL = base + SOURCES["minhngoc"][0], base + SOURCES["daiphat"][0]
+
+
+def add_scenario_args(p):
+    p.add_argument("--replay", metavar="DIR", help="phát lại bản ghi thật thay cho kịch bản giả lập")
+    p.add_argument("--days", type=int, default=120, help="số kỳ lịch sử giả lập")
+    p.add_argument("--step", type=float, default=0.5, help="giây giữa hai chữ số khi quay giả lập")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--delay", type=float, default=0.0, help="độ trễ mỗi request (giây)")
+    p.add_argument("--jitter", type=float, default=0.0, help="độ trễ ngẫu nhiên thêm tối đa (giây)")
+    p.add_argument("--fail-rate", type=float, default=0.0, help="tỷ lệ request trả 500")
+    p.add_argument("--hang-rate", type=float, default=0.0, help="tỷ lệ request treo --hang-s giây")
+    p.add_argument("--hang-s", type=float, default=30.0)
+    p.add_argument("--etag", action="store_true", help="trả ETag / 304 cho trang live")
+
+
+def scenario_from_args(args):
+    faults = {route: Faults(args.delay, args.jitter, args.fail_rate, args.hang_rate, args.hang_s, seed=args.seed + k)
+              for k, route in enumerate(["api", *SOURCES])}
+    if args.replay: return Scenario.from_recording(args.replay, faults=faults, etag=args.etag)
+    return Scenario.synthetic(args.days, args.step, args.seed, faults=faults, etag=args.etag)
+
+
+# -----------------------------------------------------------------------------
+# GHI BẢN GHI THẬT
+# -----------------------------------------------------------------------------
+def record(path, every=2.0, duration=3600.0, days=120):
+    """Ghi lịch sử và các trang live thật mỗi khi nội dung đổi, tới khi đủ 107 số hoặc hết ``duration``."""
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, "history.json"), "wb") as f: f.write(net.get(get_api_url(days), timeout=10).content)
+    urls = {"minhngoc": live.MINHNGOC_URL, "daiphat": live.DAIPHAT_URL}
+    last, full = {}, set()
+    for source in urls: os.makedirs(os.path.join(path, source), exist_ok=True)
+    t0 = time.time()
+    while len(full) < len(urls) and time.time() - t0 < duration:
+        for source, url in urls.items():
+            if source in full: continue
+            try: content = net.get(url, timeout=5).content
+            except Exception as e:
+                print(f"{source}: {e}")
+                continue
+            digest = hashlib.blake2b(content, digest_size=16).digest()
+            if digest == last.get(source): continue
+            last[source] = digest
+            with open(os.path.join(path, source, f"{int((time.time() - t0) * 1000)}.html"), "wb") as f: f.write(content)
+            n = FULL_DIGITS - parse_smart_text(SOURCES[source][1](content), True)[0].count('?')
+            print(f"{time.time() - t0:8.1f}s {source}: {n}/{FULL_DIGITS} số")
+            if n >= FULL_DIGITS: full.add(source)
+        time.sleep(every)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("serve", help="chạy server giả")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    add_scenario_args(p)
+    p = sub.add_parser("record", help="ghi lịch sử và trang live thật")
+    p.add_argument("path")
+    p.add_argument("--every", type=float, default=2.0, help="giây giữa hai lần tải")
+    p.add_argument("--duration", type=float, default=3600.0)
+    p.add_argument("--days", type=int, default=120)
+    args = ap.parse_args()
+    if args.cmd == "record": return record(args.path, args.every, args.duration, args.days)
+    scn = scenario_from_args(args)
+    server, base = start(scn, args.host, args.port)
+    scn.reset()
+    print(" ".join(f"{k}={v}" for k, v in env(base).items()))
+    print(f"Quay trong {scn.end:.0f}s; /_reset để quay lại từ đầu. Ctrl+C để dừng.")
+    try:
+        while True: time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
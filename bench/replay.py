@@ -0,0 +1,174 @@
+"""Phát lại một buổi quay qua server giả lập, đo độ trễ và thông lượng Bước 3.
+
+Chạy bench/fakeserver.py trong tiến trình (hoặc dùng server có sẵn với
+``--url``), trỏ soicau vào đó rồi đi đúng đường của app: tải lịch sử qua
+archive, quét cầu vị trí, rồi mỗi session theo dõi live như Bước 2-3:
+
+- ``--poll shared`` (mặc định): một LivePoller cho cả tiến trình, mỗi session
+  đọc snapshot mỗi ``--tick`` giây như fragment live_watch;
+- ``--poll direct``: mỗi session tự gọi fetch_live_result mỗi ``--interval``
+  giây (nút Cập nhật Live).
+
+Có số mới thì parse_smart_text -> LiveTracker.update -> lấy dàn số dự đoán.
+Báo cáo độ trễ từ lúc một chữ số xuất hiện trên trang (sớm nhất trong các
+nguồn, theo dòng thời gian của server) tới lúc dự đoán có chữ số đó được
+tính xong, gộp mọi session; số request server nhận và lỗi; chi phí mỗi lần
+cập nhật; và chuỗi live cuối cùng có khớp kết quả thật không.
+
+Chạy:
+  python bench/replay.py                                    # 1 session, 107 chữ số x 0.5s
+  python bench/replay.py --sessions 200 --step 0.2 --fail-rate 0.05
+  python bench/replay.py --poll direct --sessions 50 --interval 2 --delay 0.2 --jitter 0.3
+  python bench/replay.py --replay DIR                       # bản ghi thật (fakeserver.py record)
+  python bench/replay.py --url http://127.0.0.1:8765        # server chạy riêng
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import fakeserver
+from soicau import archive, engine, live, net
+from soicau.core import parse_smart_text
+from soicau.tracker import LiveTracker
+
+
+class Session:
+    """Một người dùng ở Bước 3: tracker riêng, ghi lại lúc mỗi vị trí có trong dự đoán."""
+
+    def __init__(self, vip, oneday):
+        self.tracker = LiveTracker(vip + oneday, ["vip"] * len(vip) + ["1d"] * len(oneday))
+        self.shown = np.full(fakeserver.FULL_DIGITS, np.nan)
+        self.live_str = ""
+        self.updates, self.cost, self.polls = 0, 0.0, 0
+
+    def show(self, text):
+        t0 = time.perf_counter()
+        live_str, _ = parse_smart_text(text, True)
+        delta = self.tracker.update(live_str)
+        self.tracker.predictions("vip"), self.tracker.predictions("1d")
+        now = time.time()
+        self.cost += time.perf_counter() - t0
+        self.updates += 1
+        self.live_str = live_str
+        for p in delta["filled"]:
+            if np.isnan(self.shown[p]): self.shown[p] = now
+
+
+def run_shared(sess, poller, tick, stop):
+    # Như live_watch: đọc snapshot của poller chung, đổi version mới tính lại
+    stop.wait(random.uniform(0, tick))
+    version = None
+    while not stop.is_set():
+        snap = poller.touch()
+        sess.polls += 1
+        if snap["version"] != version:
+            version = snap["version"]
+            if snap["text"]: sess.show(snap["text"])
+        stop.wait(tick)
+
+
+def run_direct(sess, interval, stop):
+    # Như nút Cập nhật Live: tự gọi các nguồn
+    stop.wait(random.uniform(0, interval))
+    last = None
+    while not stop.is_set():
+        res = live.fetch_live_result(min_digits=live.count_digits(last or ""))
+        sess.polls += 1
+        if res["text"] and res["text"] != last:
+            last = res["text"]
+            sess.show(res["text"])
+        stop.wait(interval)
+
+
+def get_json(base, path):
+    return json.loads(net.get(base + path, timeout=10).content)
+
+
+def percentiles(x):
+    if not len(x): return "-"
+    p50, p95, p99 = np.percentile(x, [50, 95, 99])
+    return f"p50 {p50:.2f} · p95 {p95:.2f} · p99 {p99:.2f} · max {np.max(x):.2f}"
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--url", help="dùng server giả đang chạy thay vì chạy trong tiến trình")
+    fakeserver.add_scenario_args(ap)
+    ap.add_argument("--sessions", type=int, default=1)
+    ap.add_argument("--poll", choices=["shared", "direct"], default="shared")
+    ap.add_argument("--interval", type=float, default=live.LIVE_INTERVAL, help="giây giữa hai lần gọi nguồn")
+    ap.add_argument("--tick", type=float, default=2.0, help="chu kỳ đọc snapshot của mỗi session (shared)")
+    ap.add_argument("--history", type=int, default=60, help="số ngày lịch sử để quét cầu")
+    ap.add_argument("--mode", choices=["straight", "set", "lo"], default="straight")
+    ap.add_argument("--grace", type=float, default=None, help="chờ thêm sau khi quay xong (giây)")
+    args = ap.parse_args()
+
+    if args.url:
+        base = args.url.rstrip("/")
+    else:
+        scn = fakeserver.scenario_from_args(args)
+        _, base = fakeserver.start(scn)
+    fakeserver.point_to(base)
+
+    # Lịch sử qua API giả vào kho tạm (không đụng kho thật)
+    tmp = tempfile.mkdtemp(prefix="soicau_replay_")
+    arc = archive.DrawArchive(path=os.path.join(tmp, "draws.sqlite"), bin_path=os.path.join(tmp, "draws.bin"))
+    arc.sync(args.history, force=True)
+    data = arc.window(args.history)
+    bridges = engine.scan_positions_auto(data, args.mode, True, "same_day", 1)
+    vip = [b for b in bridges if b["streak"] >= 2]
+    oneday = [b for b in bridges if b["streak"] == 1]
+    print(f"Lịch sử {len(data)} kỳ (mới nhất {data.issues[0]}), {len(vip)} cầu VIP + {len(oneday)} cầu 1 ngày")
+
+    sessions = [Session(vip, oneday) for _ in range(args.sessions)]
+    get_json(base, "/_reset")
+    stats0 = get_json(base, "/_stats")
+    tl = get_json(base, "/_timeline")
+    reveal = np.array([min((r[p] for r in tl["reveal"].values() if r[p] is not None), default=np.nan)
+                       for p in range(fakeserver.FULL_DIGITS)], dtype=float) + tl["start"]
+    stop = threading.Event()
+    if args.poll == "shared":
+        poller = live.LivePoller(interval=args.interval)
+        threads = [threading.Thread(target=run_shared, args=(s, poller, args.tick, stop), daemon=True) for s in sessions]
+    else:
+        threads = [threading.Thread(target=run_direct, args=(s, args.interval, stop), daemon=True) for s in sessions]
+    for t in threads: t.start()
+
+    grace = args.grace if args.grace is not None else args.interval + args.tick + live.LIVE_TIMEOUT + 2
+    want = ~np.isnan(reveal)
+    while time.time() < tl["start"] + tl["end"] + grace:
+        if all((~np.isnan(s.shown[want])).all() for s in sessions): break
+        time.sleep(0.2)
+    stop.set()
+    elapsed = time.time() - tl["start"]
+    for t in threads: t.join(timeout=live.LIVE_TIMEOUT + 1)
+
+    stats = {k: v - stats0.get(k, 0) for k, v in get_json(base, "/_stats").items() if v > stats0.get(k, 0)}
+    lat = np.concatenate([s.shown[want] - reveal[want] for s in sessions])
+    missing = int(np.isnan(lat).sum())
+    updates = sum(s.updates for s in sessions)
+    cost = sum(s.cost for s in sessions)
+    requests = sum(stats.values())
+    wrong = [k for k, s in enumerate(sessions) if tl["body"] and s.live_str != tl["body"]]
+    print(f"{args.sessions} session ({args.poll}, gọi nguồn {args.interval}s" + (f", đọc snapshot {args.tick}s" if args.poll == "shared" else "") +
+          f") · {int(want.sum())} chữ số trong {tl['end']:.0f}s · chạy {elapsed:.1f}s")
+    print(f"Độ trễ xuất hiện -> dự đoán (s): {percentiles(lat[~np.isnan(lat)])}" + (f" · {missing} lượt chưa thấy" if missing else ""))
+    print(f"Cập nhật: {updates} lần, {cost / max(updates, 1) * 1000:.2f} ms/lần (parse + tracker + dự đoán), "
+          f"{updates / elapsed:.1f} lần/s · {sum(s.polls for s in sessions) / elapsed:.1f} lượt hỏi/s")
+    print(f"Server: {requests} request ({requests / elapsed:.1f}/s) · " + ", ".join(f"{k}: {v}" for k, v in sorted(stats.items())))
+    print("Chuỗi live cuối: " + ("khớp kết quả thật" if not wrong else f"SAI ở {len(wrong)}/{len(sessions)} session"))
+    if wrong or missing: sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
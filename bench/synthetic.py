@@ -0,0 +1,56 @@
+"""Lịch sử XSMB giả lập cho benchmark (không cần mạng).
+
+Sinh các bản ghi thô giống API lịch sử (turnNum + detail JSON) với các chữ số
+ngẫu nhiên theo seed, có cài sẵn vài cầu vị trí chạy nhiều ngày để các hàm
+quét và backtest có streak dài mà kiểm tra.
+"""
+import json
+import random
+
+from soicau.core import XSMB_STRUCTURE
+
+# (i, j, số ngày) cầu trong ngày: body[i] + body[j] == đề
+PLANTED_SAME_DAY = [(10, 20, 6), (50, 7, 4), (106, 30, 3), (30, 31, 9)]
+# (i, j, số ngày) cầu ngày trước: body hôm trước [i] + [j] == đề đảo hôm nay
+PLANTED_CROSS_DAY = [(12, 40, 5), (0, 1, 3)]
+
+
+def synthetic_bodies(days, seed=0):
+    rnd = random.Random(seed)
+    bodies = [[rnd.choice("0123456789") for _ in range(107)] for _ in range(days)]
+    for i, j, n in PLANTED_SAME_DAY:
+        for k in range(min(n, days)):
+            bodies[k][i], bodies[k][j] = bodies[k][3], bodies[k][4]
+    for i, j, n in PLANTED_CROSS_DAY:
+        for k in range(min(n, days - 1)):
+            bodies[k + 1][i], bodies[k + 1][j] = bodies[k][4], bodies[k][3]
+    return ["".join(b) for b in bodies]
+
+
+def to_detail(body):
+    """Chuỗi 107 số -> detail JSON như API (các số trong một giải cách nhau dấu phẩy)."""
+    groups, pos = [], 0
+    for _, count, length in XSMB_STRUCTURE:
+        nums = [body[pos + k * length:pos + (k + 1) * length] for k in range(count)]
+        groups.append(",".join(nums))
+        pos += count * length
+    return json.dumps(groups)
+
+
+def synthetic_raw(days, seed=0, first_issue=20_000_000):
+    """``days`` bản ghi thô, mới nhất trước, turnNum giảm dần."""
+    return [
+        {"turnNum": str(first_issue - k), "openTime": "", "detail": to_detail(body)}
+        for k, body in enumerate(synthetic_bodies(days, seed))
+    ]
+
+
+def live_text(body, upto=107):
+    """Text dán live kiểu Minh Ngọc cho ``upto`` số đầu của ``body``."""
+    labels = ["Đặc biệt", "Giải nhất", "Giải nhì", "Giải ba", "Giải tư", "Giải năm", "Giải sáu", "Giải bảy"]
+    lines, pos = [], 0
+    for label, (_, count, length) in zip(labels, XSMB_STRUCTURE):
+        nums = [body[pos + k * length:pos + (k + 1) * length] for k in range(count) if pos + (k + 1) * length <= upto]
+        if nums: lines.append(f"{label}: {', '.join(nums)}")
+        pos += count * length
+    return "\n".join(lines)
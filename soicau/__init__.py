@@ -0,0 +1,25 @@
+"""Bộ soi cầu XSMB: thuật toán, engine NumPy và các tiện ích dùng chung.
+
+Không phụ thuộc Streamlit. Các module con chỉ được import khi dùng tới
+(``soicau.engine`` kéo theo numpy, ``soicau.archive`` kéo theo requests), nên
+``import soicau`` gần như không tốn gì; script/cron dùng trực tiếp:
+
+    from soicau import archive, engine
+    data = archive.load_window(100)
+    bridges = engine.scan_positions_auto(data, "straight", True)
+
+hoặc qua dòng lệnh: ``python -m soicau scan --days 100``.
+"""
+import importlib
+
+_SUBMODULES = ("api", "archive", "binfile", "cli", "core", "engine", "history", "index", "live", "memo", "multi", "net", "perf", "regions", "stream", "sweep", "tracker", "walkforward")
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_SUBMODULES))
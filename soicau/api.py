@@ -0,0 +1,298 @@
+"""API HTTP/JSON cho bot và tích hợp nhóm chat, dùng đúng các hàm tải / quét /
+dự đoán của app (không cần Streamlit, chỉ thư viện chuẩn).
+
+    python -m soicau api --port 8080
+
+Endpoint (GET, tham số qua query string, trả {"meta", "results"} như CLI):
+
+    /history?days=50                         các kỳ mới nhất: issue, de, body
+    /bridges?days=50&method=positions        cầu đang thông (positions / prizes / multi&k=3)
+    /backtest?days=365&by=hits&top=100       backtest toàn bộ cặp vị trí
+    /live                                    kết quả live hiện có (poller nền)
+    /predictions?days=50&method=positions    dàn số dự đoán như ô COPY DÀN SỐ
+    /stats                                   số mục cache, hit / miss
+
+Tham số chung: mode (straight / set / lo), rev (0 / 1), cross_day (0 / 1),
+min_streak, top (0 = tất cả). Mỗi response được nhớ nguyên dạng bytes theo
+(đường dẫn, kỳ mới nhất, tham số), thêm phiên bản live với /live và
+/predictions: có kỳ mới hay có số live mới thì khoá tự đổi, bản cũ rơi khỏi
+LRU. Cache hit chỉ là tra dict rồi ghi socket; nhiều request cùng khoá chưa
+có thì chỉ một request tính (memo.ResultCache). Kết quả quét hết giờ
+(meta.complete = false) không được nhớ, request sau tính lại. Kho được kiểm tra kỳ mới tối
+đa một lần mỗi REFRESH_S giây (gọi API theo nhịp archive.SYNC_INTERVAL),
+request đến lúc đang đồng bộ dùng cửa sổ cũ thay vì chờ. Response có ETag,
+client gửi If-None-Match được 304.
+"""
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from . import archive, index, live, memo, multi, stream
+from .core import make_copy_text, parse_smart_text
+from .tracker import LiveTracker
+
+# Số response nhớ tối đa
+CACHE_SIZE = 1024
+# Kiểm tra kỳ mới trong kho tối đa 1 lần trong khoảng này (giây)
+REFRESH_S = 5
+MAX_DAYS = 2000
+# Backtest toàn bộ cặp / cầu k vị trí: giới hạn thời gian (giây) như app
+BT_TOP = 500
+BT_BUDGET_S = 10
+MULTI_BUDGET_S = 10
+
+RESPONSES = memo.ResultCache(CACHE_SIZE)
+WINDOWS = memo.ResultCache(32)
+SYNC = True
+
+_latest = {}  # số ngày -> kỳ mới nhất ở lần kiểm tra cuối
+_checked = {}  # số ngày -> thời điểm kiểm tra cuối
+_sync_lock = threading.Lock()
+
+
+# -----------------------------------------------------------------------------
+# THAM SỐ
+# -----------------------------------------------------------------------------
+def _get(q, name, default):
+    return q.get(name, [default])[0]
+
+
+def _int(q, name, default, lo=0, hi=None):
+    v = int(_get(q, name, default))
+    if v < lo or (hi is not None and v > hi): raise ValueError(f"{name} phải trong khoảng {lo}-{hi}" if hi is not None else f"{name} phải >= {lo}")
+    return v
+
+
+def _flag(q, name, default):
+    return _get(q, name, "1" if default else "0").lower() in ("1", "true", "yes")
+
+
+def _choice(q, name, choices):
+    v = _get(q, name, choices[0])
+    if v not in choices: raise ValueError(f"{name} phải là một trong {', '.join(choices)}")
+    return v
+
+
+def _options(q, method="positions"):
+    mode = _choice(q, "mode", ("straight", "set", "lo"))
+    # Giống app / CLI: đảo AB chỉ có ý nghĩa với cầu vị trí, soi thẳng
+    allow_rev = True if mode == "set" or method == "prizes" else _flag(q, "rev", True)
+    bridge_type = "cross_day" if _flag(q, "cross_day", False) else "same_day"
+    return {"mode": mode, "allow_rev": allow_rev, "bridge_type": bridge_type}
+
+
+# -----------------------------------------------------------------------------
+# DỮ LIỆU
+# -----------------------------------------------------------------------------
+def window(days):
+    """(kỳ mới nhất, DrawHistory ``days`` kỳ) từ kho, đồng bộ tối đa 1 lần mỗi REFRESH_S."""
+    arc = archive.get_archive()
+    if time.time() - _checked.get(days, 0) > REFRESH_S and _sync_lock.acquire(blocking=days not in _latest):
+        try:
+            if SYNC:
+                try: arc.sync(days)
+                except Exception:
+                    if arc.count() == 0: raise
+            _latest[days], _checked[days] = arc.latest_issue(), time.time()
+        finally:
+            _sync_lock.release()
+    latest = _latest[days]
+    return latest, WINDOWS.get_or_compute((latest, days), lambda: arc.window(days))
+
+
+def _data(q):
+    days = _int(q, "days", 50, 1, MAX_DAYS)
+    latest, data = window(days)
+    if not data: raise LookupError("Kho chưa có dữ liệu")
+    return days, latest, data
+
+
+def _scan(data, method, opt, min_streak, k=3):
+    # Cùng khoá memo với app: một tiến trình chạy cả hai thì dùng chung kết quả
+    params = (opt['mode'], opt['allow_rev'], opt['bridge_type'], min_streak)
+    if method == "multi":
+        return memo.cached("scan_multi", data, params + (k, MULTI_BUDGET_S), lambda: multi.scan_multi_positions(
+            data, k, opt['mode'], opt['allow_rev'], opt['bridge_type'], min_streak, budget_s=MULTI_BUDGET_S), memo.complete)
+    return memo.cached(f"scan_{method}", data, params, lambda: index.scan_incremental(
+        data, method, opt['mode'], opt['allow_rev'], opt['bridge_type'], min_streak))
+
+
+def _named(rows, method, pos_map):
+    if method == "positions": return [{**r, "pos_i": pos_map[r['i']], "pos_j": pos_map[r['j']]} for r in rows]
+    if method == "multi": return [{**r, "names": " + ".join(pos_map[p] for p in r['pos'])} for r in rows]
+    return rows
+
+
+def _top(rows, top):
+    return rows[:top] if top else rows
+
+
+# -----------------------------------------------------------------------------
+# ENDPOINT: mỗi hàm trả về (khoá cache, hàm tạo {"meta", "results"})
+# -----------------------------------------------------------------------------
+def ep_history(q):
+    days, latest, data = _data(q)
+    return ("history", latest, days), lambda: {
+        "meta": {"latest": latest, "days": len(data)},
+        "results": [{"issue": data.issues[k], "de": f"{data.de[k]:02d}", "body": data.body(k)} for k in range(len(data))]}
+
+
+def ep_bridges(q):
+    days, latest, data = _data(q)
+    method = _choice(q, "method", ("positions", "prizes", "multi"))
+    opt = _options(q, method)
+    min_streak = _int(q, "min_streak", 2 if method == "multi" else 1, 1)
+    k = _int(q, "k", 3, multi.K_MIN, multi.K_MAX) if method == "multi" else None
+    top = _int(q, "top", 0)
+
+    def build():
+        res = _scan(data, method, opt, min_streak, k)
+        meta = {"latest": latest, "days": len(data), "method": method, **opt, "min_streak": min_streak}
+        if method == "multi":
+            meta.update(k=k, complete=res['complete'], seeds=res['seeds'], seeds_done=res['seeds_done'])
+            res = res['results']
+        return {"meta": {**meta, "total": len(res)}, "results": _named(_top(res, top), method, data.layout.pos_map)}
+    return ("bridges", latest, days, method, tuple(opt.values()), min_streak, k, top), build
+
+
+def ep_backtest(q):
+    days, latest, data = _data(q)
+    opt = _options(q)
+    by = _choice(q, "by", tuple(stream.SORT_COLUMNS))
+    min_rate = _int(q, "min_rate", 0, 0, 100)
+    min_longest = _int(q, "min_longest", 0)
+    top = _int(q, "top", 100, 0, BT_TOP)
+
+    def build():
+        # Giống Bước 1 của app: top BT_TOP trong giới hạn BT_BUDGET_S giây
+        def scan():
+            for snap in stream.iter_positions(data, opt['mode'], opt['allow_rev'], opt['bridge_type'], by, BT_TOP,
+                                              min_rate / 100, min_longest, deadline=time.time() + BT_BUDGET_S): pass
+            return snap
+        snap = memo.cached("backtest_all", data, tuple(opt.values()) + (by, min_rate, min_longest), scan, memo.complete)
+        rows = [{**r, "rate": round(r['rate'], 4)} for r in _top(snap['results'], top)]
+        return {"meta": {"latest": latest, "days": len(data), **opt, "by": by, "complete": snap['complete'],
+                         "done": snap['done'], "total": snap['total']},
+                "results": _named(rows, "positions", data.layout.pos_map)}
+    return ("backtest", latest, days, tuple(opt.values()), by, min_rate, min_longest, top), build
+
+
+def ep_live(q):
+    snap = live.get_poller().touch()
+    has_gdb = _flag(q, "gdb", True)
+
+    def build():
+        body = parse_smart_text(snap['text'], has_gdb)[0] if snap['text'] else ""
+        return {"meta": {k: snap[k] for k in ("source", "digits", "version", "updated_at")},
+                "results": [{"text": snap['text'], "body": body}] if snap['text'] else []}
+    return ("live", snap['version'], has_gdb), build
+
+
+def ep_predictions(q):
+    days, latest, data = _data(q)
+    method = _choice(q, "method", ("positions", "multi"))
+    opt = _options(q, method)
+    min_streak = _int(q, "min_streak", 2 if method == "multi" else 1, 1)
+    k = _int(q, "k", 3, multi.K_MIN, multi.K_MAX) if method == "multi" else None
+    has_gdb = _flag(q, "gdb", True)
+    # Như Bước 3: cầu ngày trước dự đoán theo kỳ mới nhất, cầu trong ngày theo live
+    snap = None if opt['bridge_type'] == "cross_day" else live.get_poller().touch()
+    version = snap['version'] if snap else None
+
+    def build():
+        if snap is None: live_str = data.body(0)
+        else: live_str = parse_smart_text(snap['text'], has_gdb)[0] if snap['text'] else "?" * data.layout.body_len
+        res = _scan(data, method, opt, min_streak, k)
+        bridges = res['results'] if method == "multi" else res
+        vip, oneday = [b for b in bridges if b['streak'] >= 2], [b for b in bridges if b['streak'] == 1]
+        if method == "multi":
+            preds = {"vip": multi.predictions(vip, live_str, opt['allow_rev']), "1d": multi.predictions(oneday, live_str, opt['allow_rev'])}
+        else:
+            tracker = LiveTracker(vip + oneday, ["vip"] * len(vip) + ["1d"] * len(oneday))
+            tracker.update(live_str)
+            preds = {g: tracker.predictions(g) for g in ("vip", "1d")}
+        meta = {"latest": latest, "days": len(data), "method": method, **opt, "min_streak": min_streak,
+                "live_digits": len(live_str) - live_str.count('?'), "live_version": version,
+                "bridges": {"vip": len(vip), "1d": len(oneday)}}
+        if method == "multi": meta["complete"] = res['complete']
+        return {"meta": meta, "results": [
+            {"group": g, "numbers": sorted(p), "text": make_copy_text(p, opt['mode'], simple=g == "1d")} for g, p in preds.items()]}
+    return ("predictions", latest, days, method, tuple(opt.values()), min_streak, k, has_gdb, version), build
+
+
+def ep_stats(q):
+    return None, lambda: {"meta": {"size": len(RESPONSES), "maxsize": RESPONSES.maxsize, **RESPONSES.stats,
+                                   "memo": dict(memo.RESULTS.stats)}, "results": []}
+
+
+ROUTES = {"/history": ep_history, "/bridges": ep_bridges, "/backtest": ep_backtest, "/live": ep_live,
+          "/predictions": ep_predictions, "/stats": ep_stats}
+
+
+def _encode(obj):
+    body = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+    return body, '"%s"' % hashlib.blake2b(body, digest_size=12).hexdigest()
+
+
+def _response(build):
+    # (body, etag, complete): response của lần quét hết giờ không vào RESPONSES
+    obj = build()
+    return *_encode(obj), obj["meta"].get("complete", True)
+
+
+def handle(path, query):
+    """(mã HTTP, bytes JSON, ETag) cho một request; dùng được không cần server."""
+    route = ROUTES.get(path.rstrip("/"))
+    if route is None: return 404, *_encode({"error": f"Không có endpoint {path}", "endpoints": list(ROUTES)})
+    try:
+        key, build = route(parse_qs(query))
+        if key is None: return 200, *_encode(build())
+        body, etag, _ = RESPONSES.get_or_compute((route.__name__,) + key, lambda: _response(build), lambda r: r[2])
+        return 200, body, etag
+    except ValueError as e:
+        return 400, *_encode({"error": str(e)})
+    except Exception as e:
+        # Kho trống và API lỗi, ...
+        return 503, *_encode({"error": str(e)})
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive: bot gọi liên tục không phải mở kết nối mới
+    server_version = "soicau-api"
+    disable_nagle_algorithm = True  # header và body ghi riêng: không chờ ACK trễ (~40 ms)
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        code, body, etag = handle(url.path, url.query)
+        if code == 200 and self.headers.get("If-None-Match") == etag: code, body = 304, b""
+        try:
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+def serve(host="127.0.0.1", port=8080, sync=True):
+    """Chạy API tới khi bị ngắt (Ctrl+C); ``sync=False`` chỉ dùng dữ liệu đã lưu."""
+    global SYNC
+    SYNC = sync
+    server = Server((host, port), Handler)
+    try: server.serve_forever()
+    except KeyboardInterrupt: pass
+    finally: server.server_close()
@@ -0,0 +1,171 @@
+"""Kho lưu kết quả XSMB trên đĩa (SQLite), đồng bộ tăng dần từ API lịch sử.
+
+Mỗi kỳ lưu một dòng: turnNum, giờ mở thưởng và chuỗi 107 số đã parse. Khi
+đồng bộ chỉ tải các kỳ mới hơn kỳ cuối đã có (tăng dần limitNum cho tới khi
+gặp lại kỳ đã lưu); mọi cửa sổ số ngày đều đọc từ kho, kể cả khi API chậm
+hoặc lỗi.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from . import binfile, net
+from .core import CACHE_DIR, get_api_url, parse_detail_json
+from .history import DrawHistory
+
+DB_PATH = os.environ.get("SOICAU_DB", os.path.join(CACHE_DIR, "draws.sqlite"))
+
+# Số kỳ tải ở lần thử đầu khi đồng bộ, nhân đôi nếu chưa gặp kỳ đã lưu
+SYNC_STEP = 5
+SYNC_MAX = 2000
+# Không gọi API quá 1 lần trong khoảng này (giây), giống ttl cũ của fetch_history
+SYNC_INTERVAL = 60
+
+
+def parse_history_json(content):
+    return json.loads(content).get('t', {}).get('issueList', [])
+
+
+def fetch_history_page(limit=50, game_code="miba"):
+    """Tải ``limit`` kỳ mới nhất từ API (danh sách bản ghi thô)."""
+    return net.get_parsed(get_api_url(limit, game_code), parse_history_json, timeout=10)
+
+
+class DrawArchive:
+    def __init__(self, path=DB_PATH, fetch=fetch_history_page, bin_path=binfile.BIN_PATH, body_len=107):
+        if os.path.dirname(path): os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.body_len = body_len
+        self.bin_path = bin_path
+        self.fetch = fetch
+        self._lock = threading.Lock()
+        self._last_sync = 0.0
+        # Lần gọi API lỗi gần nhất: trong SYNC_INTERVAL báo lại lỗi này thay vì chờ timeout lần nữa
+        self._last_attempt = 0.0
+        self._last_error = None
+        self._backfilled = 0  # số kỳ lớn nhất đã từng tải bù
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS draws (issue TEXT PRIMARY KEY, open_time TEXT, body TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM draws").fetchone()[0]
+
+    def latest_issue(self):
+        # turnNum là chuỗi số: sắp theo (độ dài, giá trị) để đúng thứ tự số học
+        with self._lock:
+            row = self._conn.execute("SELECT issue FROM draws ORDER BY LENGTH(issue) DESC, issue DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    def add_raw(self, raw):
+        """Lưu các bản ghi thô từ API, bỏ qua bản ghi lỗi (sai số chữ số). Trả về số kỳ mới."""
+        rows = []
+        for r in raw:
+            f = parse_detail_json(r.get('detail', ''))
+            if len(f) != self.body_len or not r.get('turnNum'): continue
+            rows.append((str(r['turnNum']), r.get('openTime'), f))
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany("INSERT OR IGNORE INTO draws VALUES (?, ?, ?)", rows)
+            self._conn.commit()
+            return self._conn.total_changes - before
+
+    def window(self, limit):
+        """DrawHistory của ``limit`` kỳ mới nhất (mới nhất trước).
+
+        Đọc từ file nhị phân mmap nếu có, nếu không thì từ SQLite.
+        """
+        if self.bin_path and os.path.exists(self.bin_path):
+            try: return binfile.open_file(self.bin_path).window(limit)
+            except ValueError: pass
+        with self._lock:
+            rows = self._conn.execute("SELECT issue, body FROM draws ORDER BY LENGTH(issue) DESC, issue DESC LIMIT ?", (limit,)).fetchall()
+        return DrawHistory.from_bodies([r[0] for r in rows], [r[1] for r in rows], self.body_len)
+
+    def export_binary(self):
+        """Cập nhật file nhị phân theo kho: ghi nối các kỳ mới, ghi lại cả file
+        nếu có kỳ cũ hơn vừa được tải bù."""
+        with self._lock:
+            rows = self._conn.execute("SELECT issue, open_time, body FROM draws ORDER BY LENGTH(issue), issue").fetchall()
+        try: f = binfile.DrawFile(self.bin_path)
+        except (OSError, ValueError): f = None
+        if f is not None and len(f):
+            last = f.latest_issue()
+            newer = [r for r in rows if int(r[0]) > last]
+            if len(f) + len(newer) == len(rows):
+                if newer: binfile.append(self.bin_path, newer, self.body_len)
+                return
+        binfile.write(self.bin_path, rows, self.body_len)
+
+    def sync(self, want=0, force=False):
+        """Tải các kỳ mới hơn kỳ cuối đã lưu; tải bù nếu kho có ít hơn ``want`` kỳ.
+
+        Trả về số kỳ mới được lưu. Lỗi mạng được ném ra để bên gọi quyết định
+        có dùng tạm dữ liệu đã lưu hay không; trong SYNC_INTERVAL sau lần lỗi
+        thì ném lại lỗi đó ngay, không gọi API (API sập chỉ tốn một lần
+        timeout mỗi khoảng, không phải mỗi lần rerun).
+        """
+        now = time.time()
+        if not force and self._last_error is not None and now - self._last_attempt < SYNC_INTERVAL:
+            raise self._last_error.with_traceback(None)
+        # API có thể không đủ ``want`` kỳ: đã tải bù một lần thì coi như đủ
+        need_backfill = self.count() < want and want > self._backfilled
+        # Lần gọi đang chạy (hoặc vừa xong) trong khoảng này: dùng dữ liệu đã lưu
+        if not force and not need_backfill and now - max(self._last_sync, self._last_attempt) < SYNC_INTERVAL: return 0
+        self._last_attempt = now
+        try:
+            added = self._fetch_new(want, need_backfill)
+        except Exception as e:
+            self._last_error = e
+            raise
+        self._last_error = None
+        self._last_sync = time.time()
+        return added
+
+    def _fetch_new(self, want, need_backfill):
+        latest = self.latest_issue()
+        if latest is None or need_backfill:
+            added = self.add_raw(self.fetch(max(want, SYNC_STEP)))
+            self._backfilled = max(self._backfilled, want)
+        else:
+            added, n = 0, SYNC_STEP
+            while True:
+                raw = self.fetch(n)
+                added += self.add_raw(raw)
+                issues = {str(r.get('turnNum')) for r in raw}
+                if latest in issues or len(raw) < n or n >= SYNC_MAX: break
+                n *= 2
+        if self.bin_path and (added or not os.path.exists(self.bin_path)): self.export_binary()
+        return added
+
+
+_ARCHIVE = None
+_ARCHIVE_LOCK = threading.Lock()
+
+
+def get_archive():
+    """Kho dùng chung của tiến trình."""
+    global _ARCHIVE
+    with _ARCHIVE_LOCK:
+        if _ARCHIVE is None: _ARCHIVE = DrawArchive()
+        return _ARCHIVE
+
+
+def load_window(limit=50, sync=True):
+    """DrawHistory của ``limit`` kỳ mới nhất cho script/CLI.
+
+    Lỗi mạng chỉ được ném ra khi kho còn trống; ngược lại dùng dữ liệu đã lưu.
+    """
+    arc = get_archive()
+    if sync:
+        try:
+            arc.sync(limit)
+        except Exception:
+            if arc.count() == 0: raise
+    return arc.window(limit)
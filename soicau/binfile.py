@@ -0,0 +1,110 @@
+"""Định dạng nhị phân bản ghi cố định cho lịch sử XSMB, đọc bằng mmap.
+
+Mỗi kỳ là một bản ghi 119 byte: turnNum (uint64), ngày yyyymmdd (uint32) và
+107 chữ số (mỗi số 1 byte, giá trị 0-9); đài Miền Nam/Trung 82 chữ số, số
+chữ số ghi trong header. Bản ghi xếp theo thời gian (cũ
+trước) để kỳ mới chỉ cần ghi nối vào cuối file. File được mở bằng
+``np.memmap`` chỉ đọc: ma trận chữ số là view trực tiếp trên trang nhớ của
+hệ điều hành, nên mọi session Streamlit và mọi tiến trình worker dùng chung
+một bản, không ai phải parse lại; ``window()`` chỉ chép đúng cửa sổ cần dùng
+ra một DrawHistory liền bộ nhớ.
+"""
+import os
+import threading
+
+import numpy as np
+
+from .core import CACHE_DIR
+from .history import LAYOUTS, DrawHistory
+
+BIN_PATH = os.environ.get("SOICAU_BIN", os.path.join(CACHE_DIR, "draws.bin"))
+
+MAGIC = b"SOICAU1"
+HEADER = np.dtype([("magic", "S8"), ("body_len", "<u4"), ("reserved", "<u4")])
+
+
+def record_dtype(body_len=107):
+    return np.dtype([("issue", "<u8"), ("date", "<u4"), ("body", "u1", (body_len,))])
+
+
+RECORD = record_dtype(107)
+
+
+def parse_date(open_time):
+    """"2024-05-12 18:30:00" -> 20240512 (0 nếu không rõ)."""
+    digits = "".join(c for c in str(open_time or "")[:10] if c.isdigit())
+    return int(digits) if len(digits) == 8 else 0
+
+
+def to_records(rows, body_len=107):
+    """Mảng bản ghi từ các bộ (issue, open_time, body) theo thứ tự thời gian."""
+    rec = np.zeros(len(rows), dtype=record_dtype(body_len))
+    if not rows: return rec
+    rec["issue"] = [int(issue) for issue, _, _ in rows]
+    rec["date"] = [parse_date(t) for _, t, _ in rows]
+    buf = "".join(body for _, _, body in rows).encode("ascii")
+    rec["body"] = np.frombuffer(buf, dtype=np.uint8).reshape(len(rows), body_len) - 48
+    return rec
+
+
+def write(path, rows, body_len=107):
+    """Ghi lại toàn bộ file (ghi ra file tạm rồi đổi tên)."""
+    if os.path.dirname(path): os.makedirs(os.path.dirname(path), exist_ok=True)
+    header = np.array([(MAGIC, body_len, 0)], dtype=HEADER)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(header.tobytes())
+        f.write(to_records(rows, body_len).tobytes())
+    os.replace(tmp, path)
+
+
+def append(path, rows, body_len=107):
+    """Ghi nối các kỳ mới hơn kỳ cuối của file."""
+    if not os.path.exists(path): return write(path, rows, body_len)
+    with open(path, "ab") as f:
+        f.write(to_records(rows, body_len).tobytes())
+
+
+class DrawFile:
+    """View chỉ đọc trên file nhị phân; các thuộc tính xếp mới nhất trước."""
+
+    def __init__(self, path=BIN_PATH):
+        self.path = path
+        header = np.fromfile(path, dtype=HEADER, count=1)
+        if len(header) != 1 or header[0]["magic"] != MAGIC or int(header[0]["body_len"]) not in LAYOUTS:
+            raise ValueError(f"{path}: không phải file lịch sử xổ số")
+        self.body_len = int(header[0]["body_len"])
+        record = record_dtype(self.body_len)
+        n = (os.path.getsize(path) - HEADER.itemsize) // record.itemsize
+        if n: self._mm = np.memmap(path, dtype=record, mode="r", offset=HEADER.itemsize, shape=(n,))
+        else: self._mm = np.zeros(0, dtype=record)
+        rev = self._mm[::-1]
+        self.digits = rev["body"]  # (số kỳ, số chữ số) uint8, không sao chép
+        self.issues = rev["issue"]
+        self.dates = rev["date"]
+
+    def __len__(self):
+        return len(self._mm)
+
+    def latest_issue(self):
+        return int(self.issues[0]) if len(self) else None
+
+    def window(self, limit):
+        """DrawHistory của ``limit`` kỳ mới nhất (chép cửa sổ ra buffer liền)."""
+        return DrawHistory(self.issues[:limit].tolist(), self.digits[:limit])
+
+
+_FILES = {}
+_FILES_LOCK = threading.Lock()
+
+
+def open_file(path=BIN_PATH):
+    """DrawFile dùng chung của tiến trình; mở lại khi file thay đổi."""
+    st = os.stat(path)
+    stamp = (st.st_size, st.st_mtime_ns, st.st_ino)
+    with _FILES_LOCK:
+        cached = _FILES.get(path)
+        if cached is None or cached[0] != stamp:
+            cached = (stamp, DrawFile(path))
+            _FILES[path] = cached
+        return cached[1]
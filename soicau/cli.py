@@ -0,0 +1,252 @@
+"""Dòng lệnh cho cron/script, dùng đúng thuật toán của app (không cần Streamlit).
+
+    python -m soicau scan --days 100                      # cầu vị trí, in JSON
+    python -m soicau scan --method prizes --set --format csv --out giai.csv
+    python -m soicau scan --lo --backtest --top 30        # soi lô (27 số mỗi ngày)
+    python -m soicau backtest --days 365 --top 50         # toàn bộ cặp vị trí
+    python -m soicau parse < live.txt                     # chuỗi 107 số
+    python -m soicau live                                 # lấy KQ live
+    python -m soicau sweep --windows 50 100 365 --top 20  # cả lưới tham số, song song
+    python -m soicau walkforward --days 50 --test-days 500 --min-streak 2
+    python -m soicau multi --k 3 --days 100 --top 20      # cầu 3 vị trí
+    python -m soicau region --region mn --weekday 5       # các đài Miền Nam tối thứ Bảy (SOICAU_UNVERIFIED_REGIONS=1)
+    python -m soicau api --port 8080                      # API HTTP/JSON cho bot (soicau.api)
+
+Dữ liệu lấy từ kho trên đĩa (đồng bộ API trước, ``--offline`` để bỏ qua).
+Các module nặng chỉ được import trong lệnh cần tới chúng.
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+
+
+def _mode(args):
+    return "lo" if args.lo else "set" if args.set else "straight"
+
+
+def _options(data, args):
+    mode = _mode(args)
+    # Giống app: đảo AB chỉ có ý nghĩa với cầu vị trí, soi thẳng
+    allow_rev = True if mode == "set" or getattr(args, "method", "positions") == "prizes" else not args.no_rev
+    bridge_type = "cross_day" if args.cross_day else "same_day"
+    return {"days": len(data), "latest": data[0]['issue'] if data else None,
+            "mode": mode, "allow_rev": allow_rev, "bridge_type": bridge_type}
+
+
+def _load(args):
+    from . import archive
+    return archive.load_window(args.days, sync=not args.offline)
+
+
+def _with_names(rows):
+    from .core import get_pos_map
+    pos_map = get_pos_map()
+    return [{**r, "pos_i": pos_map[r['i']], "pos_j": pos_map[r['j']]} for r in rows]
+
+
+def cmd_scan(args):
+    from . import engine, index
+    data = _load(args)
+    opt = _options(data, args)
+    kind = args.method
+    rows = index.scan_incremental(data, kind, opt['mode'], opt['allow_rev'], opt['bridge_type'], args.min_streak)
+    if args.backtest and rows:
+        if kind == "positions": bt = engine.backtest_positions(data, opt['mode'], opt['allow_rev'], opt['bridge_type'], rows)
+        else: bt = engine.backtest_prizes(data, opt['mode'], opt['bridge_type'], rows)
+        key = (lambda r: (r['i'], r['j'])) if kind == "positions" else (lambda r: r['prize'])
+        hits = {key(b): b for b in bt}
+        rows = [{**r, "hits": hits[key(r)]['hits'], "bt_days": hits[key(r)]['days']} for r in rows]
+    if kind == "positions": rows = _with_names(rows)
+    return {**opt, "method": kind, "min_streak": args.min_streak}, rows[:args.top] if args.top else rows
+
+
+def cmd_backtest(args):
+    from . import engine
+    data = _load(args)
+    opt = _options(data, args)
+    rows = engine.backtest_all_positions(data, opt['mode'], opt['allow_rev'], opt['bridge_type'])
+    rows = [r for r in rows if r['longest'] >= args.min_longest]
+    rows = _with_names(rows[:args.top] if args.top else rows)
+    return opt, [{**r, "rate": round(r['rate'], 4)} for r in rows]
+
+
+def cmd_parse(args):
+    from .core import parse_smart_text
+    text = open(args.file, encoding="utf-8").read() if args.file else sys.stdin.read()
+    body, _ = parse_smart_text(text, not args.no_gdb)
+    return {"digits": 107 - body.count('?')}, [{"body": body}]
+
+
+def cmd_live(args):
+    from . import live
+    res = live.fetch_live_result()
+    return {"source": res['source'], "digits": res['digits'], "timings": res['timings']}, [{"text": res['text']}]
+
+
+def cmd_sweep(args):
+    from . import archive, sweep
+    archive.load_window(max(args.windows), sync=not args.offline)
+    board = sweep.run_sweep(args.windows, args.workers)
+    rows = [{k: r[k] for k in sweep.FIELDS} for r in board['rows'] if r['streak'] >= args.min_streak]
+    return {**board['meta'], "path": sweep.LEADERBOARD_PATH, "rows": len(rows)}, rows[:args.top] if args.top else rows
+
+
+def cmd_walkforward(args):
+    from . import archive, walkforward
+    data = archive.load_window(args.days + args.test_days, sync=not args.offline)
+    opt = _options(data, args)
+    wf = walkforward.walk_forward(data, args.method, opt['mode'], opt['allow_rev'], opt['bridge_type'],
+                                  args.days, args.min_streak, args.test_days)
+    rows = [{**r, "rate": round(r['rate'], 4)} for r in wf['days']]
+    return {**opt, "days": args.days, "method": args.method, "min_streak": args.min_streak, **wf['summary']}, rows
+
+
+def cmd_multi(args):
+    from . import multi
+    from .core import get_pos_map
+    data = _load(args)
+    opt = _options(data, args)
+    res = multi.scan_multi_positions(data, args.k, opt['mode'], opt['allow_rev'], opt['bridge_type'], args.min_streak,
+                                     budget_s=args.budget, max_rows=args.max_rows, workers=args.workers, top=args.top or None)
+    pos_map = get_pos_map()
+    rows = [{"pos": " ".join(map(str, r['pos'])), "names": " + ".join(pos_map[p] for p in r['pos']), "streak": r['streak']}
+            for r in res['results']]
+    meta = {**opt, "k": args.k, "min_streak": args.min_streak,
+            **{key: res[key] for key in ("complete", "seeds", "seeds_done")}, "scan_s": res['elapsed_s']}
+    return meta, rows
+
+
+def cmd_region(args):
+    from . import regions
+    weekday = time.localtime().tm_wday if args.weekday is None else args.weekday
+    mode = _mode(args)
+    allow_rev = True if mode == "set" or args.method == "prizes" else not args.no_rev
+    bridge_type = "cross_day" if args.cross_day else "same_day"
+    res = regions.scan_region(args.region, weekday, args.method, mode, allow_rev, bridge_type, args.days, args.min_streak,
+                              sync=not args.offline, workers=args.workers)
+    rows = []
+    for code, r in res.items():
+        if r.get('error'): print(f"{r['name']}: {r['error']}", file=sys.stderr); continue
+        found = r['results'][:args.top] if args.top else r['results']
+        rows.extend({"province": code, "name": r['name'], "latest": r['latest'], **b} for b in found)
+    meta = {"region": args.region, "weekday": weekday, "provinces": list(res), "method": args.method,
+            "mode": mode, "allow_rev": allow_rev, "bridge_type": bridge_type, "days": args.days, "min_streak": args.min_streak}
+    return meta, rows
+
+
+def cmd_api(args):
+    from . import api
+    print(f"API: http://{args.host}:{args.port}/ ({', '.join(api.ROUTES)}); Ctrl+C để dừng", file=sys.stderr)
+    api.serve(args.host, args.port, sync=not args.offline)
+    return {"host": args.host, "port": args.port, **api.RESPONSES.stats}, []
+
+
+def write_output(meta, rows, fmt, out):
+    f = open(out, "w", encoding="utf-8", newline="") if out else sys.stdout
+    try:
+        if fmt == "csv":
+            if rows:
+                w = csv.DictWriter(f, fieldnames=list(rows[0]))
+                w.writeheader()
+                w.writerows(rows)
+        else:
+            json.dump({"meta": meta, "results": rows}, f, ensure_ascii=False, indent=1)
+            f.write("\n")
+    finally:
+        if out: f.close()
+
+
+def build_parser():
+    ap = argparse.ArgumentParser(prog="python -m soicau", description="Soi cầu XSMB từ dòng lệnh.")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    def common(p):
+        p.add_argument("--days", type=int, default=50, help="số ngày lịch sử (mặc định 50)")
+        p.add_argument("--set", action="store_true", help="soi bộ đề")
+        p.add_argument("--lo", action="store_true", help="soi lô (2 số cuối mọi giải) thay cho đề")
+        p.add_argument("--no-rev", action="store_true", help="không đảo AB")
+        p.add_argument("--cross-day", action="store_true", help="cầu ngày trước")
+        p.add_argument("--offline", action="store_true", help="chỉ dùng dữ liệu đã lưu, không gọi API")
+        p.add_argument("--top", type=int, default=0, help="chỉ lấy N dòng đầu")
+
+    def output(p):
+        p.add_argument("--format", choices=["json", "csv"], default="json")
+        p.add_argument("--out", default=None, help="ghi ra file thay vì stdout")
+
+    p = sub.add_parser("scan", help="quét cầu đang thông")
+    common(p); output(p)
+    p.add_argument("--method", choices=["positions", "prizes"], default="positions")
+    p.add_argument("--min-streak", type=int, default=1)
+    p.add_argument("--backtest", action="store_true", help="kèm số ngày trúng trong cửa sổ")
+    p.set_defaults(run=cmd_scan)
+
+    p = sub.add_parser("backtest", help="backtest toàn bộ cặp vị trí")
+    common(p); output(p)
+    p.add_argument("--min-longest", type=int, default=0, help="chỉ giữ cặp có Max Streak >= N")
+    p.set_defaults(run=cmd_backtest)
+
+    p = sub.add_parser("parse", help="parse văn bản kết quả (file hoặc stdin) thành chuỗi 107 số")
+    output(p)
+    p.add_argument("file", nargs="?")
+    p.add_argument("--no-gdb", action="store_true", help="văn bản không có giải đặc biệt")
+    p.set_defaults(run=cmd_parse)
+
+    p = sub.add_parser("live", help="lấy kết quả live từ các nguồn")
+    output(p)
+    p.set_defaults(run=cmd_live)
+
+    p = sub.add_parser("sweep", help="quét + backtest mọi cấu hình, lưu bảng xếp hạng")
+    output(p)
+    p.add_argument("--windows", type=int, nargs="+", default=[30, 50, 100, 200, 365], help="các cửa sổ số ngày")
+    p.add_argument("--workers", type=int, default=None, help="số tiến trình (mặc định = số nhân CPU)")
+    p.add_argument("--min-streak", type=int, default=1, help="chỉ in cầu có streak >= N")
+    p.add_argument("--top", type=int, default=50, help="số dòng in ra (0 = tất cả)")
+    p.add_argument("--offline", action="store_true", help="chỉ dùng dữ liệu đã lưu, không gọi API")
+    p.set_defaults(run=cmd_sweep)
+
+    p = sub.add_parser("walkforward", help="backtest ngoài mẫu: chọn cầu chỉ bằng các ngày trước ngày kiểm tra")
+    common(p); output(p)
+    p.add_argument("--method", choices=["positions", "prizes"], default="positions")
+    p.add_argument("--min-streak", type=int, default=1)
+    p.add_argument("--test-days", type=int, default=200, help="số ngày kiểm tra gần nhất")
+    p.set_defaults(run=cmd_walkforward)
+
+    p = sub.add_parser("multi", help="quét cầu k vị trí (2 trong k vị trí ghép ra đề)")
+    common(p); output(p)
+    p.add_argument("--k", type=int, default=3, help="số vị trí mỗi cầu (3-5)")
+    p.add_argument("--min-streak", type=int, default=2)
+    p.add_argument("--budget", type=float, default=30.0, help="giới hạn thời gian (giây, 0 = không giới hạn)")
+    p.add_argument("--max-rows", type=int, default=2_000_000, help="số dòng ứng viên tối đa mỗi lô (giới hạn bộ nhớ)")
+    p.add_argument("--workers", type=int, default=None, help="số tiến trình (mặc định 1)")
+    p.set_defaults(run=cmd_multi)
+
+    p = sub.add_parser("region", help="quét song song các đài của một miền trong một tối")
+    common(p); output(p)
+    p.add_argument("--region", choices=["mb", "mn", "mt"], default="mb", help="mn / mt cần SOICAU_UNVERIFIED_REGIONS=1")
+    p.add_argument("--weekday", type=int, choices=range(7), default=None, help="0 = thứ Hai ... 6 = Chủ nhật (mặc định hôm nay)")
+    p.add_argument("--method", choices=["positions", "prizes"], default="positions")
+    p.add_argument("--min-streak", type=int, default=1)
+    p.add_argument("--workers", type=int, default=None, help="số tiến trình quét (mặc định = số đài, tối đa số nhân CPU)")
+    p.set_defaults(run=cmd_region)
+
+    p = sub.add_parser("api", help="chạy API HTTP/JSON (lịch sử, cầu, backtest, dự đoán live)")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8080)
+    p.add_argument("--offline", action="store_true", help="chỉ dùng dữ liệu đã lưu, không gọi API")
+    p.set_defaults(run=cmd_api, format="json", out=None)
+    return ap
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    t0 = time.perf_counter()
+    try:
+        meta, rows = args.run(args)
+    except Exception as e:
+        print(f"Lỗi: {e}", file=sys.stderr)
+        return 1
+    meta = {"command": args.command, **meta, "elapsed_s": round(time.perf_counter() - t0, 3)}
+    write_output(meta, rows, args.format, args.out)
+    return 0
@@ -0,0 +1,320 @@
+"""Thuật toán soi cầu XSMB thuần Python (không phụ thuộc Streamlit)."""
+import json
+import os
+import re
+from collections import Counter
+from functools import lru_cache
+
+# -----------------------------------------------------------------------------
+# 1. CẤU TRÚC & HẰNG SỐ
+# -----------------------------------------------------------------------------
+# Thư mục lưu kho kết quả và chỉ mục trên đĩa
+CACHE_DIR = os.environ.get("SOICAU_CACHE_DIR", ".soicau_cache")
+# Gốc API lịch sử; trỏ sang server giả lập (bench/fakeserver.py) khi chạy thử
+API_BASE = os.environ.get("SOICAU_API_BASE", "https://www.kqxs88.live")
+
+def get_api_url(limit=50, game_code="miba"):
+    return f"{API_BASE}/api/front/open/lottery/history/list/game?limitNum={limit}&gameCode={game_code}"
+
+XSMB_STRUCTURE = [
+    ("GĐB", 1, 5), ("G1", 1, 5), ("G2", 2, 5), ("G3", 6, 5),
+    ("G4", 4, 4), ("G5", 6, 4), ("G6", 3, 3), ("G7", 4, 2)
+]
+# Miền Nam / Miền Trung (mỗi đài): 18 giải, 82 số, GĐB 6 số, thêm G8
+XSMN_STRUCTURE = [
+    ("GĐB", 1, 6), ("G1", 1, 5), ("G2", 1, 5), ("G3", 2, 5),
+    ("G4", 7, 5), ("G5", 1, 4), ("G6", 3, 4), ("G7", 1, 3), ("G8", 1, 2)
+]
+
+def body_len(structure=XSMB_STRUCTURE): return sum(c * l for _, c, l in structure)
+
+# Đề = 2 số cuối GĐB (GĐB đứng đầu body)
+def de_offset(structure=XSMB_STRUCTURE): return structure[0][2] - 2
+
+BO_DE_DICT = {
+    "00": ["00","55","05","50"], "11": ["11","66","16","61"], "22": ["22","77","27","72"], "33": ["33","88","38","83"],
+    "44": ["44","99","49","94"], "01": ["01","10","06","60","51","15","56","65"], "02": ["02","20","07","70","52","25","57","75"],
+    "03": ["03","30","08","80","53","35","58","85"], "04": ["04","40","09","90","54","45","59","95"],
+    "12": ["12","21","17","71","62","26","67","76"], "13": ["13","31","18","81","63","36","68","86"],
+    "14": ["14","41","19","91","64","46","69","96"], "23": ["23","32","28","82","73","37","78","87"],
+    "24": ["24","42","29","92","74","47","79","97"], "34": ["34","43","39","93","84","48","89", "98"]
+}
+NUMBER_TO_SET_MAP = {str(n): s for s, nums in BO_DE_DICT.items() for n in nums}
+
+# -----------------------------------------------------------------------------
+# 2. XỬ LÝ DỮ LIỆU
+# -----------------------------------------------------------------------------
+def parse_detail_json(d_str):
+    try: return "".join([g.replace(",", "").strip() for g in json.loads(d_str)])
+    except: return ""
+
+def get_set(n): return NUMBER_TO_SET_MAP.get(str(n), "?")
+
+@lru_cache(maxsize=8192)
+def pair_table(val, mode):
+    """Nhị hợp (kể cả kép) hoặc bộ đào (mode "set", 2 chữ số khác vị trí) của chuỗi số ``val``.
+
+    Trả về (các giá trị đã sắp, các giá trị theo tần suất giảm dần), nhớ theo
+    (val, mode) để bảng Bước 1 và Bước 3 dùng chung.
+    """
+    idx = [(i, j) for i in range(len(val)) for j in range(len(val))]
+    if mode == "set": vals = [b for b in (get_set(val[i] + val[j]) for i, j in idx if i != j) if b != "?"]
+    else: vals = [val[i] + val[j] for i, j in idx]
+    return tuple(sorted(set(vals))), tuple(v for v, _ in Counter(vals).most_common())
+
+def make_draw(issue, body, de_at=3):
+    de = body[de_at:de_at + 2]
+    return {"issue": issue, "de": de, "de_rev": de[::-1], "de_set": get_set(de), "body": body}
+
+def process_data(raw, structure=XSMB_STRUCTURE):
+    p = []; n = body_len(structure); de_at = de_offset(structure)
+    for r in raw:
+        f = parse_detail_json(r.get('detail', ''))
+        if len(f) != n: continue
+        p.append(make_draw(r.get('turnNum'), f, de_at))
+    return p
+
+def get_pos_map(structure=XSMB_STRUCTURE):
+    m = []
+    for p, c, l in structure:
+        for i in range(1, c+1):
+            for j in range(1, l+1): m.append(f"{p}.{i}.{j}")
+    return m
+
+def get_prize_map_no_gdb(structure=XSMB_STRUCTURE):
+    m = {}; curr = 0
+    for p, c, l in structure:
+        for i in range(1, c+1):
+            s, e = curr, curr + l
+            if p != "GĐB": m[f"{p}" if c==1 else f"{p}.{i}"] = (s, e)
+            curr += l
+    return m
+
+# -----------------------------------------------------------------------------
+# 3. THUẬT TOÁN
+# -----------------------------------------------------------------------------
+def scan_positions_auto(data, mode, allow_rev, bridge_type="same_day", min_streak=2):
+    if not data: return []
+    results = []
+    
+    # Xác định phạm vi quét
+    # same_day: Quét trên chính bản ghi đó (bỏ qua GĐB vì GĐB là kết quả) -> start_idx = 5 (GĐB có 5 ký tự)
+    # cross_day: Quét trên bản ghi ngày hôm trước (lấy cả GĐB) -> start_idx = 0
+    start_idx = 5 if bridge_type == "same_day" else 0
+    
+    # Lấy mẫu để tìm candidates
+    # Nếu cross_day: Cần ít nhất 2 ngày dữ liệu (Hôm nay và Hôm qua) để check 1 nhịp
+    if bridge_type == "cross_day" and len(data) < 2: return []
+    
+    day0 = data[0] # Ngày hiện tại (Kết quả cần soi)
+    source_day = data[0] if bridge_type == "same_day" else data[1] # Nguồn dữ liệu để soi
+    
+    body = source_day['body']
+    cand = []
+    
+    # 1. Tìm Candidate: Cặp vị trí (i, j) trên source_day tạo ra kết quả của day0
+    for i in range(start_idx, len(body)):
+        for j in range(start_idx, len(body)):
+            if i == j: continue
+            val = body[i] + body[j]
+            match = False
+            
+            # So sánh với kết quả của day0
+            if mode == "straight":
+                if val == day0['de']: match = True
+                elif allow_rev and val == day0['de_rev']: match = True
+            else: # mode == "set"
+                if get_set(val) == day0['de_set']: match = True
+            
+            if match: cand.append((i, j))
+    
+    # 2. Check Streak cho từng candidate
+    for (i, j) in cand:
+        streak = 0
+        max_k = len(data) - 1 if bridge_type == "cross_day" else len(data)
+        
+        for k in range(max_k):
+            current_res_day = data[k]
+            current_src_day = data[k] if bridge_type == "same_day" else data[k+1]
+            
+            val = current_src_day['body'][i] + current_src_day['body'][j]
+            match = False
+            
+            if mode == "straight":
+                if val == current_res_day['de']: match = True
+                elif allow_rev and val == current_res_day['de_rev']: match = True
+            else:
+                if get_set(val) == current_res_day['de_set']: match = True
+            
+            if match: streak += 1
+            else: break 
+            
+        if streak >= min_streak:
+            results.append({"i": i, "j": j, "streak": streak})
+            
+    results.sort(key=lambda x: x['streak'], reverse=True)
+    return results
+
+def scan_prizes_auto(data, mode, bridge_type="same_day", min_streak=1):
+    pmap = get_prize_map_no_gdb(); res = []
+    
+    # Nếu cross_day: Cần ít nhất 2 ngày
+    if bridge_type == "cross_day" and len(data) < 2: return []
+    
+    max_k = len(data) - 1 if bridge_type == "cross_day" else len(data)
+
+    for p, (s, e) in pmap.items():
+        streak = 0
+        for k in range(max_k):
+            current_res_day = data[k]
+            current_src_day = data[k] if bridge_type == "same_day" else data[k+1]
+            
+            digits = set(current_src_day['body'][s:e])
+            match = False
+            if mode == "straight": match = (current_res_day['de'][0] in digits and current_res_day['de'][1] in digits)
+            else:
+                for n in BO_DE_DICT.get(get_set(current_res_day['de']), []):
+                    if n[0] in digits and n[1] in digits: match = True; break
+            if match: streak += 1
+            else: break
+        if streak >= min_streak: res.append({"prize": p, "streak": streak, "val": data[0]['body'][s:e] if bridge_type == "same_day" else data[1]['body'][s:e]})
+    res.sort(key=lambda x: x['streak'], reverse=True)
+    return res
+
+def backtest_positions(data, mode, allow_rev, bridge_type, candidates):
+    max_k = len(data) - 1 if bridge_type == "cross_day" else len(data)
+    out = []
+    for br in candidates:
+        i, j = br['i'], br['j']
+        hits = 0
+        for k in range(max_k):
+            current_res_day = data[k]
+            current_src_day = data[k] if bridge_type == "same_day" else data[k+1]
+            if i < len(current_src_day['body']) and j < len(current_src_day['body']):
+                val = current_src_day['body'][i] + current_src_day['body'][j]
+                match = False
+                if mode == "straight":
+                    if val == current_res_day['de']: match = True
+                    elif allow_rev and val == current_res_day['de_rev']: match = True
+                else:
+                    if get_set(val) == current_res_day['de_set']: match = True
+                if match: hits += 1
+        out.append({"i": i, "j": j, "hits": hits, "days": max_k})
+    out.sort(key=lambda x: x['hits'], reverse=True)
+    return out
+
+def backtest_prizes(data, mode, bridge_type, entries):
+    pmap = get_prize_map_no_gdb()
+    max_k = len(data) - 1 if bridge_type == "cross_day" else len(data)
+    out = []
+    for p in entries:
+        pname = p['prize']
+        s, e = pmap.get(pname)
+        hits = 0
+        for k in range(max_k):
+            current_res_day = data[k]
+            current_src_day = data[k] if bridge_type == "same_day" else data[k+1]
+            digits = set(current_src_day['body'][s:e])
+            match = False
+            if mode == "straight":
+                match = (current_res_day['de'][0] in digits and current_res_day['de'][1] in digits)
+            else:
+                for n in BO_DE_DICT.get(get_set(current_res_day['de']), []):
+                    if n[0] in digits and n[1] in digits:
+                        match = True
+                        break
+            if match: hits += 1
+        out.append({"prize": pname, "hits": hits, "days": max_k})
+    out.sort(key=lambda x: x['hits'], reverse=True)
+    return out
+
+# -----------------------------------------------------------------------------
+# 4. SMART PARSER
+# -----------------------------------------------------------------------------
+# Nhãn giải dạng "G1:", "G.7", "GĐB" (chữ số trong nhãn không phải kết quả)
+_PRIZE_LABEL_RE = re.compile(r'\bg\.?\s?(?:[1-7]|đb|db)\b')
+
+def parse_smart_text(text, has_gdb_checkbox):
+    text = text.lower()
+    buckets = {'db': '', '1': '', '2': '', '3': '', '4': '', '5': '', '6': '', '7': ''}
+    current_bucket = None
+    lines = text.split('\n')
+    for line in lines:
+        line_clean = line.strip()
+        if not line_clean: continue
+        if 'đặc biệt' in line_clean or 'đb' in line_clean or 'db' in line_clean: current_bucket = 'db'
+        elif 'nhất' in line_clean or 'g.1' in line_clean or 'g1' in line_clean: current_bucket = '1'
+        elif 'nhì' in line_clean or 'g.2' in line_clean or 'g2' in line_clean: current_bucket = '2'
+        elif 'ba' in line_clean or 'g.3' in line_clean or 'g3' in line_clean: current_bucket = '3'
+        elif 'tư' in line_clean or 'g.4' in line_clean or 'g4' in line_clean: current_bucket = '4'
+        elif 'năm' in line_clean or 'g.5' in line_clean or 'g5' in line_clean: current_bucket = '5'
+        elif 'sáu' in line_clean or 'g.6' in line_clean or 'g6' in line_clean: current_bucket = '6'
+        elif 'bảy' in line_clean or 'g.7' in line_clean or 'g7' in line_clean: current_bucket = '7'
+        if current_bucket:
+            nums = re.findall(r'\d+', _PRIZE_LABEL_RE.sub(' ', line_clean))
+            buckets[current_bucket] += "".join(nums)
+
+    RULES = [('db',1,5), ('1',1,5), ('2',2,5), ('3',6,5), ('4',4,4), ('5',6,4), ('6',3,3), ('7',4,2)]
+    full_str = ""
+    preview_list = []
+    for key, count, length in RULES:
+        raw_str = buckets[key]
+        if key == 'db' and not has_gdb_checkbox:
+            full_str += "?" * 5
+            preview_list.append(f"GĐB: (Bỏ qua)")
+            continue
+        current_segment = ""
+        display_segment = []
+        current_pos = 0
+        for i in range(count):
+            start = current_pos; end = start + length
+            val = "?" * length
+            if end <= len(raw_str):
+                val = raw_str[start:end]; current_pos += length
+            elif start < len(raw_str):
+                partial = raw_str[start:]; val = partial.ljust(length, '?'); current_pos += len(partial)
+            current_segment += val
+            display_segment.append(val)
+        full_str += current_segment
+        status = "✅" if '?' not in current_segment else "⏳"
+        label = "ĐB" if key == 'db' else key
+        preview_list.append(f"G{label} ({status}): {', '.join(display_segment)}")
+    return full_str, preview_list
+
+# -----------------------------------------------------------------------------
+# 5. DÀN SỐ
+# -----------------------------------------------------------------------------
+def make_copy_text(pred_set, mode, simple=False):
+    """Dàn số để copy (ô COPY DÀN SỐ): số, hoặc bộ + số khi soi bộ."""
+    if not pred_set: return ""
+    sorted_list = sorted(list(pred_set))
+
+    # Nếu simple=True (cho 1 ngày) hoặc soi thẳng / lô -> Chỉ hiện số
+    if mode != "set" or simple:
+        count = len(sorted_list)
+        chunk_size = 15
+        chunks = [sorted_list[i:i+chunk_size] for i in range(0, count, chunk_size)]
+        rows = [", ".join(c) for c in chunks]
+        content = ",\n".join(rows)
+        return f"(SL: {count}) {content}"
+    else:
+        # Mode Bộ
+        sets = set()
+        nums = set()
+        for n in pred_set:
+            s = get_set(n)
+            sets.add(s)
+            if s in BO_DE_DICT: nums.update(BO_DE_DICT[s])
+
+        sorted_sets = sorted(list(sets))
+        sorted_nums = sorted(list(nums))
+
+        set_chunks = [sorted_sets[i:i+15] for i in range(0, len(sorted_sets), 15)]
+        set_rows = [", ".join(c) for c in set_chunks]
+        set_str = ",\n".join(set_rows)
+
+        num_chunks = [sorted_nums[i:i+15] for i in range(0, len(sorted_nums), 15)]
+        num_rows = [", ".join(c) for c in num_chunks]
+        num_str = ",\n".join(num_rows)
+
+        return f"BỘ ({len(sorted_sets)}): {set_str}\n\nSỐ ({len(sorted_nums)}): {num_str}"
@@ -0,0 +1,331 @@
+"""Engine NumPy cho thuật toán soi cầu.
+
+Lịch sử được giữ dưới dạng ma trận chữ số (số ngày × 107) kiểu uint8, mọi
+phép so khớp (i, j, ngày) được tính một lượt trên mảng. Kết quả trả về giống
+hệt các hàm thuần Python trong ``soicau.core``. Vị trí GĐB/đề/các giải lấy
+theo Layout ứng với số cột của ma trận (107: Miền Bắc, 82: một đài MN/MT).
+
+Mode: "straight" (đề), "set" (bộ của đề), "lo" (lô: cầu trúng nếu số của
+cầu nằm trong 2 số cuối của bất kỳ giải nào, 27 số với Miền Bắc). Tập lô
+mỗi ngày là mặt nạ 100 bit (2 từ uint64), so khớp bằng phép dịch bit.
+"""
+import numpy as np
+
+from .core import BO_DE_DICT, NUMBER_TO_SET_MAP
+from .history import BODY_LEN, layout_of
+
+# Bộ của số "ab" chỉ phụ thuộc cặp không thứ tự {a % 5, b % 5}, nên mã hoá
+# mỗi chữ số thành 1 bit: bộ(ab) == bộ(xy) <=> bit(a) | bit(b) == bit(x) | bit(y)
+SET_KEY_DIGIT = (1 << (np.arange(10) % 5)).astype(np.uint8)
+
+# Số ngày xử lý mỗi lượt khi tính streak (dừng sớm khi không còn cầu sống)
+STREAK_CHUNK = 16
+
+
+def digit_matrix(data):
+    """Ma trận (số ngày × 107) uint8 từ DrawHistory hoặc danh sách bản ghi của process_data."""
+    if not len(data): return np.zeros((0, BODY_LEN), dtype=np.uint8)
+    # DrawHistory đã mang sẵn ma trận
+    digits = getattr(data, "digits", None)
+    if digits is not None and len(digits) == len(data): return digits
+    buf = "".join(d['body'] for d in data).encode('ascii')
+    return np.frombuffer(buf, dtype=np.uint8).reshape(len(data), -1) - 48
+
+
+def _targets(digits):
+    # Đề = 2 số cuối GĐB (vị trí 3, 4 với Miền Bắc)
+    a, b = layout_of(digits.shape[1]).de_pos
+    de = digits[:, a] * 10 + digits[:, b]
+    de_rev = digits[:, b] * 10 + digits[:, a]
+    return de, de_rev, SET_KEY_DIGIT[digits[:, a]] | SET_KEY_DIGIT[digits[:, b]]
+
+
+def lo_masks(digits):
+    """Mặt nạ lô (số ngày × 2) uint64: bit n (0-99) bật nếu số n về trong ngày."""
+    a, b = layout_of(digits.shape[1]).lo_pos.T
+    nums = digits[:, a].astype(np.uint64) * np.uint64(10) + digits[:, b]
+    bits = np.left_shift(np.uint64(1), nums & np.uint64(63))
+    zero = np.uint64(0)
+    return np.stack([np.bitwise_or.reduce(np.where(nums < 64, bits, zero), axis=1),
+                     np.bitwise_or.reduce(np.where(nums >= 64, bits, zero), axis=1)], axis=1)
+
+
+def _in_lo(val, w0, w1):
+    # Số ``val`` có trong mặt nạ lô (w0 = bit 0-63, w1 = bit 64-99, broadcast theo val)
+    v = val.astype(np.uint64)
+    w = np.where(v < 64, w0, w1)
+    return ((w >> (v & np.uint64(63))) & np.uint64(1)).astype(bool)
+
+
+def _split(digits, bridge_type):
+    # Trả về (nguồn, kết quả) theo từng ngày k: same_day dùng chính ngày k,
+    # cross_day lấy nguồn từ ngày k+1 (hôm trước)
+    if bridge_type == "cross_day": return digits[1:], digits[:-1]
+    return digits, digits
+
+
+def pair_values(src):
+    """Giá trị 2 số body[i] + body[j] cho mọi (ngày, i, j): mảng (K, 107, 107)."""
+    return src[:, :, None] * 10 + src[:, None, :]
+
+
+def match_tensor(src, res, mode, allow_rev):
+    """Mảng bool (K, 107, 107): cặp (i, j) của ngày nguồn k có ra đề (lô) ngày k không."""
+    if mode == "lo":
+        lo = lo_masks(res)[:, None, None, :]
+        val = pair_values(src)
+        m = _in_lo(val, lo[..., 0], lo[..., 1])
+        if allow_rev: m |= _in_lo(val.transpose(0, 2, 1), lo[..., 0], lo[..., 1])
+        return m
+    de, de_rev, de_set = _targets(res)
+    if mode == "straight":
+        val = pair_values(src)
+        m = val == de[:, None, None]
+        if allow_rev: m |= val == de_rev[:, None, None]
+        return m
+    key = SET_KEY_DIGIT[src]
+    return (key[:, :, None] | key[:, None, :]) == de_set[:, None, None]
+
+
+def pair_mask(bridge_type, body_len=BODY_LEN, mode=None):
+    """Các cặp (i, j) hợp lệ: i != j, same_day bỏ qua GĐB (5 số đầu với Miền Bắc).
+
+    Soi lô trong ngày bỏ thêm cặp chính là 2 số cuối của một giải (luôn trúng).
+    """
+    lay = layout_of(body_len)
+    start_idx = lay.gdb_len if bridge_type == "same_day" else 0
+    m = ~np.eye(body_len, dtype=bool)
+    m[:start_idx, :] = False
+    m[:, :start_idx] = False
+    if mode == "lo" and bridge_type == "same_day":
+        a, b = lay.lo_pos.T
+        m[a, b] = m[b, a] = False
+    return m
+
+
+def position_streaks(digits, mode, allow_rev, bridge_type="same_day"):
+    """Streak hiện tại (107 × 107) của mọi cặp vị trí.
+
+    Streak = số ngày liên tiếp tính từ ngày mới nhất mà cặp đều khớp, lấy bằng
+    phép "đúng từ đầu tới giờ" (logical_and.accumulate) theo trục ngày.
+    """
+    src, res = _split(digits, bridge_type)
+    n = digits.shape[1]
+    streak = np.zeros((n, n), dtype=np.int32)
+    alive = pair_mask(bridge_type, n, mode)
+    for s in range(0, len(res), STREAK_CHUNK):
+        m = match_tensor(src[s:s + STREAK_CHUNK], res[s:s + STREAK_CHUNK], mode, allow_rev)
+        m &= alive
+        run = np.logical_and.accumulate(m, axis=0)
+        streak += run.sum(axis=0, dtype=np.int32)
+        alive = run[-1]
+        if not alive.any(): break
+    return streak
+
+
+def scan_positions_auto(data, mode, allow_rev, bridge_type="same_day", min_streak=2):
+    if not data: return []
+    if bridge_type == "cross_day" and len(data) < 2: return []
+    streak = position_streaks(digit_matrix(data), mode, allow_rev, bridge_type)
+    return rank_position_streaks(streak, min_streak)
+
+
+def rank_position_streaks(streak, min_streak):
+    """Danh sách cầu {"i", "j", "streak"} từ ma trận streak (107 × 107)."""
+    # Giống bản gốc: chỉ giữ cặp khớp ngày 0, sắp xếp ổn định theo (i, j)
+    flat = streak.ravel()
+    idx = np.flatnonzero(flat >= max(min_streak, 1))
+    idx = idx[np.argsort(-flat[idx], kind='stable')]
+    n = streak.shape[1]
+    return [{"i": int(k // n), "j": int(k % n), "streak": int(flat[k])} for k in idx]
+
+
+# Số ô tối đa (cặp × ngày) của ma trận hit tạm trong một khối
+BLOCK_CELLS = 16_000_000
+
+# Số bit 1 của mỗi byte, dùng để đếm hit trên ma trận đã pack bit
+POPCOUNT_TABLE = np.array([bin(n).count("1") for n in range(256)], dtype=np.uint8)
+
+
+def pair_index(bridge_type="same_day", body_len=BODY_LEN, mode=None):
+    """Hai mảng (ii, jj) liệt kê các cặp vị trí hợp lệ theo thứ tự (i, j)."""
+    return np.nonzero(pair_mask(bridge_type, body_len, mode))
+
+
+def pair_match_matrix(src, res, mode, allow_rev, ii, jj):
+    """Giống match_tensor nhưng theo từng cặp: mảng bool (số cặp, K).
+
+    Trục ngày nằm cuối (liền bộ nhớ) để pack bit và tìm chuỗi theo ngày nhanh.
+    """
+    cols = np.ascontiguousarray(src.T)
+    if mode == "lo":
+        lo = lo_masks(res)
+        m = _in_lo(cols[ii] * 10 + cols[jj], lo[:, 0], lo[:, 1])
+        if allow_rev: m |= _in_lo(cols[jj] * 10 + cols[ii], lo[:, 0], lo[:, 1])
+        return m
+    de, de_rev, de_set = _targets(res)
+    if mode == "straight":
+        val = cols[ii] * 10 + cols[jj]
+        m = val == de
+        if allow_rev: m |= val == de_rev
+        return m
+    key = SET_KEY_DIGIT[cols]
+    return (key[ii] | key[jj]) == de_set
+
+
+def _run_stats(m):
+    # Streak dài nhất và streak hiện tại (tính từ ngày 0) của từng hàng.
+    # Chuỗi dài >= L+1 khi AND của L+1 ngày liền nhau còn True: thu hẹp dần
+    # ma trận, hàng nào hết True thì bỏ đi.
+    n, days = m.shape
+    current = np.where(m.all(axis=1), days, np.argmin(m, axis=1)).astype(np.int32)
+    longest = np.zeros(n, dtype=np.int32)
+    rows, a, length = np.arange(n), m, 0
+    while a.shape[1]:
+        alive = a.any(axis=1)
+        if not alive.any(): break
+        length += 1
+        rows, a = rows[alive], a[alive]
+        longest[rows] = length
+        a = a[:, :-1] & a[:, 1:]
+    return longest, current
+
+
+def position_backtest_matrix(digits, mode, allow_rev, bridge_type="same_day", ii=None, jj=None):
+    """Backtest các cặp (ii[p], jj[p]) (mặc định: mọi cặp hợp lệ) trong một lượt.
+
+    Ma trận hit (cặp × ngày) được pack bit theo trục ngày, số hit lấy bằng
+    popcount; kèm streak dài nhất và streak hiện tại của từng cặp.
+    """
+    if ii is None: ii, jj = pair_index(bridge_type, digits.shape[1], mode)
+    src, res = _split(digits, bridge_type)
+    # Chia theo khối cặp để ma trận tạm không quá ~BLOCK_CELLS ô (vd. 10.000 ngày)
+    block = max(256, BLOCK_CELLS // max(len(res), 1))
+    parts = []
+    for s in range(0, max(len(ii), 1), block):
+        m = pair_match_matrix(src, res, mode, allow_rev, ii[s:s + block], jj[s:s + block])
+        packed = np.packbits(m, axis=1)
+        parts.append((packed, POPCOUNT_TABLE[packed].sum(axis=1, dtype=np.int32)) + _run_stats(m))
+    packed, hits, longest, current = (np.concatenate(x) for x in zip(*parts))
+    return {"i": ii, "j": jj, "hits": hits, "longest": longest, "current": current, "days": len(res), "packed": packed}
+
+
+def backtest_positions(data, mode, allow_rev, bridge_type, candidates):
+    days = max(len(data) - 1, 0) if bridge_type == "cross_day" else len(data)
+    ii = np.array([br['i'] for br in candidates], dtype=np.intp)
+    jj = np.array([br['j'] for br in candidates], dtype=np.intp)
+    if days: hits = position_backtest_matrix(digit_matrix(data), mode, allow_rev, bridge_type, ii, jj)["hits"]
+    else: hits = np.zeros(len(candidates), dtype=np.int32)
+    out = [{"i": br['i'], "j": br['j'], "hits": int(h), "days": days} for br, h in zip(candidates, hits)]
+    out.sort(key=lambda x: x['hits'], reverse=True)
+    return out
+
+
+def backtest_all_positions(data, mode, allow_rev, bridge_type="same_day"):
+    """Backtest toàn bộ cặp vị trí hợp lệ (107×106 hoặc 102×101 với same_day).
+
+    Mỗi phần tử: i, j, hits, days, rate (0-1), longest, current. Sắp theo
+    hits giảm dần, rồi streak dài nhất.
+    """
+    if not data or (bridge_type == "cross_day" and len(data) < 2): return []
+    bt = position_backtest_matrix(digit_matrix(data), mode, allow_rev, bridge_type)
+    days, ii, jj = bt["days"], bt["i"], bt["j"]
+    hits, longest, current = bt["hits"], bt["longest"], bt["current"]
+    order = np.lexsort((-longest, -hits))
+    return [
+        {"i": int(ii[k]), "j": int(jj[k]), "hits": int(hits[k]), "days": days,
+         "rate": float(hits[k]) / days, "longest": int(longest[k]), "current": int(current[k])}
+        for k in order
+    ]
+
+
+# -----------------------------------------------------------------------------
+# Cầu giải (nhị hợp): mặt nạ 10 bit các chữ số có mặt trong từng giải
+# -----------------------------------------------------------------------------
+def _required_masks(mode):
+    # Mặt nạ cần có cho từng đề 00-99: straight 1 mặt nạ (2 chữ số của đề),
+    # set mọi số trong bộ của đề
+    out = []
+    for n in range(100):
+        nums = [f"{n:02d}"] if mode == "straight" else BO_DE_DICT[NUMBER_TO_SET_MAP[f"{n:02d}"]]
+        out.append({(1 << int(x[0])) | (1 << int(x[1])) for x in nums})
+    return out
+
+
+def _prize_hit_table(mode):
+    # (1024, 100) bool: giải có tập chữ số ``mask`` có ra đề n không
+    masks = np.arange(1024, dtype=np.uint16)[:, None]
+    table = np.zeros((1024, 100), dtype=bool)
+    for n, reqs in enumerate(_required_masks(mode)):
+        for r in reqs: table[:, n] |= (masks[:, 0] & r) == r
+    return table
+
+
+PRIZE_HIT_TABLE = {"straight": _prize_hit_table("straight"), "set": _prize_hit_table("set")}
+
+
+def prize_masks(digits):
+    """Mặt nạ chữ số (số ngày × số giải) uint16 của các giải không tính GĐB."""
+    starts = layout_of(digits.shape[1]).prize_starts
+    bits = np.left_shift(np.uint16(1), digits[:, starts[0]:].astype(np.uint16))
+    return np.bitwise_or.reduceat(bits, starts - starts[0], axis=1) if len(digits) else np.zeros((0, len(starts)), dtype=np.uint16)
+
+
+def prize_match_matrix(digits, mode, bridge_type="same_day"):
+    """Mảng bool (số ngày kết quả × số giải): giải của ngày nguồn có ra đề ngày k không.
+
+    Mode "lo": giải trúng nếu ghép được ít nhất một số lô của ngày k (trong
+    ngày thì không tính lô của chính giải đó).
+    """
+    src, res = _split(digits, bridge_type)
+    if mode == "lo":
+        a, b = layout_of(digits.shape[1]).lo_pos.T
+        lo = res[:, a].astype(np.intp) * 10 + res[:, b]
+        m = PRIZE_HIT_TABLE["straight"][prize_masks(src)[:, :, None], lo[:, None, :]]  # (ngày, giải, lô)
+        if bridge_type == "same_day":
+            p = np.arange(m.shape[1])
+            m[:, p, p + 1] = False  # lô 0 là GĐB
+        return m.any(axis=2)
+    a, b = layout_of(digits.shape[1]).de_pos
+    de = res[:, a].astype(np.intp) * 10 + res[:, b]
+    return PRIZE_HIT_TABLE[mode][prize_masks(src), de[:, None]]
+
+
+def prize_streaks(digits, mode, bridge_type="same_day"):
+    """Streak hiện tại của từng giải; tính theo khối ngày, dừng khi không còn giải sống."""
+    n = len(layout_of(digits.shape[1]).prize_names)
+    streak = np.zeros(n, dtype=np.int32)
+    alive = np.ones(n, dtype=bool)
+    days = len(digits) - 1 if bridge_type == "cross_day" else len(digits)
+    off = 1 if bridge_type == "cross_day" else 0
+    for s in range(0, days, STREAK_CHUNK):
+        m = prize_match_matrix(digits[s:s + STREAK_CHUNK + off], mode, bridge_type) & alive
+        run = np.logical_and.accumulate(m, axis=0)
+        streak += run.sum(axis=0, dtype=np.int32)
+        alive = run[-1]
+        if not alive.any(): break
+    return streak
+
+
+def scan_prizes_auto(data, mode, bridge_type="same_day", min_streak=1):
+    if bridge_type == "cross_day" and len(data) < 2: return []
+    if not data: return []
+    digits = digit_matrix(data)
+    streak = prize_streaks(digits, mode, bridge_type)
+    off = 1 if bridge_type == "cross_day" else 0
+    pmap = layout_of(digits.shape[1]).prize_map
+    res = [{"prize": p, "streak": int(streak[k]), "val": data[off]['body'][s:e]}
+           for k, (p, (s, e)) in enumerate(pmap.items()) if streak[k] >= min_streak]
+    res.sort(key=lambda x: x['streak'], reverse=True)
+    return res
+
+
+def backtest_prizes(data, mode, bridge_type, entries):
+    days = max(len(data) - 1, 0) if bridge_type == "cross_day" else len(data)
+    digits = digit_matrix(data)
+    names = layout_of(digits.shape[1] if len(data) else BODY_LEN).prize_names
+    if days: hits = prize_match_matrix(digits, mode, bridge_type).sum(axis=0)
+    else: hits = np.zeros(len(names), dtype=np.int64)
+    out = [{"prize": p['prize'], "hits": int(hits[names.index(p['prize'])]), "days": days} for p in entries]
+    out.sort(key=lambda x: x['hits'], reverse=True)
+    return out
@@ -0,0 +1,99 @@
+"""Lịch sử kết quả dạng mảng, thay cho danh sách dict chuỗi của process_data.
+
+DrawHistory giữ các kỳ (mới nhất trước) trong vài mảng liền bộ nhớ: ma trận
+chữ số (số kỳ × số chữ số) uint8, đề dạng số 0-99 và id bộ (0-14) tra từ
+bảng 100 phần tử. Engine đọc thẳng các mảng này. Truy cập ``history[k]`` vẫn
+trả về dict giống process_data (tạo khi cần) để mã cũ và bản thuần Python
+trong ``soicau.core`` dùng được như danh sách.
+
+Cấu trúc giải (Layout) suy ra từ số chữ số mỗi kỳ: 107 là Miền Bắc, 82 là
+một đài Miền Nam / Miền Trung.
+"""
+import numpy as np
+
+from .core import BO_DE_DICT, NUMBER_TO_SET_MAP, XSMB_STRUCTURE, XSMN_STRUCTURE, get_pos_map, get_prize_map_no_gdb
+
+BODY_LEN = 107
+
+# Bảng tra số (0-99) -> id bộ, thay cho get_set() trên chuỗi
+SET_NAMES = sorted(BO_DE_DICT)
+SET_ID_TABLE = np.array([SET_NAMES.index(NUMBER_TO_SET_MAP[f"{n:02d}"]) for n in range(100)], dtype=np.uint8)
+
+
+class Layout:
+    """Vị trí các giải trong body của một cấu trúc giải."""
+    __slots__ = ("structure", "body_len", "gdb_len", "de_pos", "pos_map", "prize_map", "prize_names", "prize_starts", "lo_pos")
+
+    def __init__(self, structure):
+        self.structure = structure
+        self.body_len = sum(c * l for _, c, l in structure)
+        self.gdb_len = structure[0][2]
+        self.de_pos = (self.gdb_len - 2, self.gdb_len - 1)  # 2 số cuối GĐB
+        self.pos_map = get_pos_map(structure)
+        self.prize_map = get_prize_map_no_gdb(structure)
+        self.prize_names = list(self.prize_map)
+        self.prize_starts = np.array([s for s, _ in self.prize_map.values()], dtype=np.intp)
+        # Lô: 2 số cuối của mọi giải kể cả GĐB (27 số với Miền Bắc), mảng (số giải, 2)
+        ends = [self.gdb_len] + [e for _, e in self.prize_map.values()]
+        self.lo_pos = np.array([(e - 2, e - 1) for e in ends], dtype=np.intp)
+
+
+LAYOUTS = {lay.body_len: lay for lay in (Layout(XSMB_STRUCTURE), Layout(XSMN_STRUCTURE))}
+
+
+def layout_of(body_len):
+    return LAYOUTS[body_len]
+
+
+class DrawHistory:
+    __slots__ = ("issues", "digits", "de", "set_id")
+
+    def __init__(self, issues, digits, body_len=BODY_LEN):
+        self.issues = [str(x) for x in issues]
+        digits = np.asarray(digits, dtype=np.uint8)
+        if digits.ndim == 2: body_len = digits.shape[1]
+        self.digits = np.ascontiguousarray(digits).reshape(len(self.issues), body_len)
+        a, b = layout_of(body_len).de_pos
+        self.de = self.digits[:, a] * np.uint8(10) + self.digits[:, b]
+        self.set_id = SET_ID_TABLE[self.de]
+
+    @classmethod
+    def from_bodies(cls, issues, bodies, body_len=BODY_LEN):
+        if bodies: body_len = len(bodies[0])
+        buf = "".join(bodies).encode("ascii")
+        return cls(issues, np.frombuffer(buf, dtype=np.uint8).reshape(-1, body_len) - 48)
+
+    @property
+    def layout(self):
+        return layout_of(self.digits.shape[1])
+
+    @classmethod
+    def from_draws(cls, draws):
+        """Từ danh sách dict của process_data."""
+        return cls.from_bodies([d['issue'] for d in draws], [d['body'] for d in draws])
+
+    def __len__(self):
+        return len(self.issues)
+
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            out = DrawHistory.__new__(DrawHistory)
+            out.issues, out.digits, out.de, out.set_id = self.issues[k], self.digits[k], self.de[k], self.set_id[k]
+            return out
+        return self.draw(k)
+
+    def __iter__(self):
+        return (self.draw(k) for k in range(len(self)))
+
+    def body(self, k):
+        return (self.digits[k] + 48).tobytes().decode("ascii")
+
+    def draw(self, k):
+        """Bản ghi thứ k dạng dict như process_data."""
+        de = f"{self.de[k]:02d}"
+        return {"issue": self.issues[k], "de": de, "de_rev": de[::-1], "de_set": SET_NAMES[self.set_id[k]], "body": self.body(k)}
+
+
+def issue_list(data):
+    """Các kỳ của ``data`` (DrawHistory hoặc danh sách dict)."""
+    return list(data.issues) if isinstance(data, DrawHistory) else [d['issue'] for d in data]
@@ -0,0 +1,189 @@
+"""Chỉ mục streak/hit theo kỳ quay (turnNum), cập nhật tăng dần.
+
+Mỗi chỉ mục ứng với một bộ tham số (loại cầu, mode, đảo AB, bridge_type, số
+ngày). Khi có kỳ mới chỉ cần tính hit của đúng ngày đó cho mọi mục tiêu
+(cặp vị trí hoặc giải) rồi trượt cửa sổ: O(số cặp) thay vì quét lại cả lịch
+sử. Chỉ dựng lại toàn bộ khi đổi tham số hoặc không khớp được kỳ cũ.
+Chỉ mục được giữ trong bộ nhớ tiến trình (dùng chung mọi session, tối đa
+MAX_INDEXES mục, bỏ mục lâu không dùng nhất) và lưu ra đĩa để lần khởi động
+sau dùng lại (tối đa MAX_FILES file). Mỗi chỉ mục có khoá riêng: đồng bộ và
+đọc kết quả của một bộ tham số không chặn các bộ tham số khác.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from . import engine
+from .core import CACHE_DIR, get_prize_map_no_gdb
+from .history import issue_list
+
+# Số kỳ mới tối đa được cập nhật tăng dần; nhiều hơn thì dựng lại
+MAX_ADVANCE = 7
+
+# Số chỉ mục giữ trong bộ nhớ / số file .npz giữ trên đĩa
+MAX_INDEXES = int(os.environ.get("SOICAU_INDEX_MAX", "32"))
+MAX_FILES = 128
+
+_INDEXES = OrderedDict()
+_LOCK = threading.Lock()  # chỉ giữ khi tra / thêm / bỏ mục trong _INDEXES
+
+
+def prize_match_rows(data, mode, bridge_type, days):
+    """Hit (days × số giải) của các ngày kết quả 0..days-1, theo thứ tự get_prize_map_no_gdb."""
+    off = 1 if bridge_type == "cross_day" else 0
+    return engine.prize_match_matrix(engine.digit_matrix(data[:days + off]), mode, bridge_type)[:days]
+
+
+class StreakIndex:
+    def __init__(self, kind, mode, allow_rev, bridge_type, window):
+        self.kind = kind  # "positions" | "prizes"
+        self.mode = mode
+        self.allow_rev = bool(allow_rev) if kind == "positions" else False
+        self.bridge_type = bridge_type
+        self.window = window
+        self.issues = []  # kỳ của các ngày kết quả trong cửa sổ, mới nhất trước
+        self.rows = None  # (số ngày, số byte) uint8: hit từng ngày, pack bit theo mục tiêu
+        self.hits = None
+        self.current = None
+        self.lock = threading.Lock()  # giữ khi đồng bộ hoặc đọc các mảng
+
+    @property
+    def key(self):
+        return (self.kind, self.mode, self.allow_rev, self.bridge_type, self.window)
+
+    @property
+    def size(self):
+        return engine.BODY_LEN * engine.BODY_LEN if self.kind == "positions" else len(get_prize_map_no_gdb())
+
+    @property
+    def path(self):
+        return os.path.join(CACHE_DIR, "streak_" + "_".join(str(k) for k in self.key) + ".npz")
+
+    # ------------------------------------------------------------------
+    def _match_rows(self, data, days):
+        # Hit (days × số mục tiêu) của các ngày kết quả 0..days-1
+        if self.kind == "positions":
+            digits = engine.digit_matrix(data[:days + 1] if self.bridge_type == "cross_day" else data[:days])
+            src, res = engine._split(digits, self.bridge_type)
+            m = engine.match_tensor(src, res, self.mode, self.allow_rev)
+            m &= engine.pair_mask(self.bridge_type, mode=self.mode)
+            return m.reshape(days, -1)
+        return prize_match_rows(data, self.mode, self.bridge_type, days)
+
+    def _days(self, data):
+        return max(len(data) - 1, 0) if self.bridge_type == "cross_day" else len(data)
+
+    def rebuild(self, data):
+        days = self._days(data)
+        m = self._match_rows(data, days)
+        self.issues = issue_list(data[:days])
+        self.rows = np.packbits(m, axis=1)
+        self.hits = m.sum(axis=0, dtype=np.int32)
+        prefix = np.logical_and.accumulate(m, axis=0) if days else m
+        self.current = prefix.sum(axis=0, dtype=np.int32)
+
+    def advance(self, data, n):
+        """Trượt cửa sổ thêm ``n`` kỳ mới nhất của ``data`` (cũ trước, mới sau)."""
+        days = len(self.issues)
+        new = self._match_rows(data, n)
+        for t in range(n - 1, -1, -1):
+            row = new[t]
+            dropped = np.unpackbits(self.rows[-1], count=self.size).astype(bool)
+            self.rows = np.concatenate([np.packbits(row)[None], self.rows[:-1]])
+            self.hits += row.astype(np.int32) - dropped
+            self.current = np.where(row, np.minimum(self.current + 1, days), 0).astype(np.int32)
+        self.issues = issue_list(data[:days])
+
+    def sync(self, data):
+        """Đưa chỉ mục về khớp với ``data``; trả về "hit", "advance" hoặc "rebuild"."""
+        days = self._days(data)
+        issues = issue_list(data[:days])
+        if self.rows is not None and days == len(self.issues) and days > 0:
+            if issues == self.issues: return "hit"
+            for n in range(1, min(MAX_ADVANCE, days - 1) + 1):
+                if issues[n:] == self.issues[:days - n]:
+                    self.advance(data, n)
+                    return "advance"
+        self.rebuild(data)
+        return "rebuild"
+
+    # ------------------------------------------------------------------
+    def save(self):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        # Tên tạm riêng từng luồng: mục đã bị bỏ khỏi _INDEXES có thể đang ghi cùng file
+        tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+        np.savez(tmp, issues=np.array(self.issues, dtype=str), rows=self.rows, hits=self.hits, current=self.current)
+        os.replace(tmp, self.path)
+
+    def load(self):
+        try:
+            with np.load(self.path) as f:
+                self.issues = [str(x) for x in f['issues']]
+                self.rows, self.hits, self.current = f['rows'], f['hits'], f['current']
+            os.utime(self.path)  # đánh dấu vừa dùng cho prune_files
+            return True
+        except (OSError, KeyError, ValueError):
+            return False
+
+    def refresh(self, data):
+        """Nạp từ đĩa nếu cần, đồng bộ với ``data`` và lưu lại; gọi khi giữ ``self.lock``."""
+        if self.rows is None: self.load()
+        if self.sync(data) != "hit":
+            try:
+                self.save()
+                prune_files()
+            except OSError: pass
+
+    # ------------------------------------------------------------------
+    def scan(self, data, min_streak):
+        """Kết quả giống engine/core scan_*_auto, đọc từ streak đã lưu."""
+        if self.kind == "positions":
+            return engine.rank_position_streaks(self.current.reshape(engine.BODY_LEN, engine.BODY_LEN), min_streak)
+        off = 1 if self.bridge_type == "cross_day" else 0
+        res = [
+            {"prize": p, "streak": int(self.current[k]), "val": data[off]['body'][s:e]}
+            for k, (p, (s, e)) in enumerate(get_prize_map_no_gdb().items())
+            if self.current[k] >= min_streak
+        ]
+        res.sort(key=lambda x: x['streak'], reverse=True)
+        return res
+
+
+def prune_files(keep=MAX_FILES):
+    """Xoá các file chỉ mục lâu không dùng nhất (theo mtime), giữ ``keep`` file."""
+    try: names = [os.path.join(CACHE_DIR, n) for n in os.listdir(CACHE_DIR)
+                  if n.startswith("streak_") and n.endswith(".npz") and ".tmp." not in n]
+    except OSError: return
+    stamped = []
+    for p in names:
+        try: stamped.append((os.path.getmtime(p), p))
+        except OSError: pass
+    stamped.sort()
+    for _, p in stamped[:max(len(stamped) - keep, 0)]:
+        try: os.remove(p)
+        except OSError: pass
+
+
+def get_index(data, kind, mode, allow_rev, bridge_type):
+    """Chỉ mục dùng chung của tiến trình cho bộ tham số này (chưa đồng bộ).
+
+    Đồng bộ và đọc dưới ``idx.lock`` (xem scan_incremental).
+    """
+    idx = StreakIndex(kind, mode, allow_rev, bridge_type, len(data))
+    with _LOCK:
+        idx = _INDEXES.setdefault(idx.key, idx)
+        _INDEXES.move_to_end(idx.key)
+        while len(_INDEXES) > MAX_INDEXES: _INDEXES.popitem(last=False)
+    return idx
+
+
+def scan_incremental(data, kind, mode, allow_rev, bridge_type="same_day", min_streak=1):
+    """Thay cho scan_positions_auto / scan_prizes_auto, dùng chỉ mục tăng dần."""
+    if not data: return []
+    if bridge_type == "cross_day" and len(data) < 2: return []
+    idx = get_index(data, kind, mode, allow_rev, bridge_type)
+    with idx.lock:
+        idx.refresh(data)
+        return idx.scan(data, min_streak)
@@ -0,0 +1,323 @@
+"""Lấy kết quả XSMB trực tiếp từ các trang tường thuật (Minh Ngọc, Đại Phát).
+
+Các nguồn được gọi song song; nguồn đầu tiên trả về đủ 27 giải, hoặc đã
+theo kịp lần lấy trước, thắng ngay; không thì chờ các nguồn khác thêm một
+chút rồi lấy kết quả nhiều số nhất.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from . import net
+
+log = logging.getLogger("soicau.live")
+
+# Ghi đè bằng biến môi trường để chạy với server giả lập (bench/fakeserver.py)
+DAIPHAT_URL = os.environ.get("SOICAU_DAIPHAT_URL", "https://xosodaiphat.com/xsmb-truc-tiep.html")
+MINHNGOC_URL = os.environ.get("SOICAU_MINHNGOC_URL", "https://www.minhngoc.net.vn/xo-so-truc-tiep/mien-bac.html")
+
+def parse_daiphat_html_bs4(content):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(content, 'html.parser')
+    
+    mapping = {
+        'ĐB': 'DB', 'G1': '1', 'G2': '2', 'G3': '3',
+        'G4': '4', 'G5': '5', 'G6': '6', 'G7': '7'
+    }
+    
+    results = []
+    for label, code in mapping.items():
+        nums = []
+        idx = 0
+        while True:
+            # ID pattern: mb_prize_DB_item_0, mb_prize_1_item_0, ...
+            element_id = f"mb_prize_{code}_item_{idx}"
+            span = soup.find('span', id=element_id)
+            if span:
+                text = span.get_text(strip=True)
+                if text and text.isdigit():
+                    nums.append(text)
+                idx += 1
+            else:
+                break
+        
+        if nums:
+            results.append(f"{label}: {', '.join(nums)}")
+            
+    return "\n".join(results)
+
+def parse_minhngoc_html_bs4(content):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(content, 'html.parser')
+    
+    mapping = {
+        'ĐB': 'giaidb', 'G1': 'giai1', 'G2': 'giai2', 'G3': 'giai3',
+        'G4': 'giai4', 'G5': 'giai5', 'G6': 'giai6', 'G7': 'giai7'
+    }
+    
+    results = []
+    box = soup.find('div', class_='box_kqxs')
+    if box:
+        for label, cls in mapping.items():
+            row = box.find(class_=cls)
+            if row:
+                nums = [span.get_text(strip=True) for span in row.find_all('div', recursive=True) if span.get_text(strip=True).isdigit()]
+                if not nums:
+                    tmp = []
+                    for s in row.find_all(string=True):
+                        s_text = str(s).strip()
+                        if s_text.isdigit() and len(s_text) > 1:
+                            tmp.append(s_text)
+                    nums = tmp
+                if nums:
+                    results.append(f"{label}: {', '.join(nums)}")
+        
+    return "\n".join(results)
+
+# -----------------------------------------------------------------------------
+# BỘ TÁCH NHANH: MỘT LƯỢT REGEX TRÊN BYTES, KHÔNG DỰNG CÂY DOM
+# Cho kết quả giống hệt parse_*_html_bs4 ở trên (xem bench/bench_live_parse.py)
+# -----------------------------------------------------------------------------
+_TAG_RE = re.compile(rb'<[^>]*>')
+_DP_SPAN_RE = re.compile(rb'<span\b[^>]*?\bid\s*=\s*["\']mb_prize_(DB|\d)_item_(\d+)["\'][^>]*>', re.I)
+_MN_BOX_RE = re.compile(rb'<div\b[^>]*?\bclass\s*=\s*["\'](?:[^"\']*\s)?box_kqxs(?:\s[^"\']*)?["\']', re.I)
+_MN_CELL_RE = re.compile(rb'<(\w+)\b[^>]*?\bclass\s*=\s*["\'](?:[^"\']*\s)?(giaidb|giai[1-7])(?:\s[^"\']*)?["\'][^>]*>', re.I)
+_TEXT_NODE_RE = re.compile(rb'>([^<]*)<')
+_SAME_TAG_RE = {}
+
+DAIPHAT_CODES = {'ĐB': b'DB', 'G1': b'1', 'G2': b'2', 'G3': b'3', 'G4': b'4', 'G5': b'5', 'G6': b'6', 'G7': b'7'}
+MINHNGOC_CLASSES = {'ĐB': b'giaidb', 'G1': b'giai1', 'G2': b'giai2', 'G3': b'giai3', 'G4': b'giai4', 'G5': b'giai5', 'G6': b'giai6', 'G7': b'giai7'}
+
+
+def _text(fragment):
+    # Như get_text(strip=True): bỏ khoảng trắng từng đoạn text rồi nối lại
+    return b''.join(t.strip() for t in _TAG_RE.split(fragment)).decode('utf-8', 'ignore').strip()
+
+
+def _tags(tag):
+    r = _SAME_TAG_RE.get(tag.lower())
+    if r is None:
+        r = _SAME_TAG_RE[tag.lower()] = re.compile(rb'<(/?)' + re.escape(tag) + rb'\b[^>]*?(/?)>', re.I)
+    return r
+
+
+def _element_end(content, tag, start, end):
+    """Vị trí thẻ đóng của phần tử tag có nội dung bắt đầu ở start.
+
+    Đếm độ sâu các thẻ cùng tên lồng bên trong (bỏ thẻ tự đóng); không thấy
+    thẻ đóng thì phần tử kéo tới end, như html.parser tự đóng thẻ.
+    """
+    depth = 1
+    for m in _tags(tag).finditer(content, start, end):
+        if m.group(1):
+            depth -= 1
+            if not depth: return m.start()
+        elif not m.group(2):
+            depth += 1
+    return end
+
+
+def _elements(content, tag, start, end):
+    """Nội dung mọi phần tử tag trong [start, end), kể cả lồng nhau, theo thứ tự mở thẻ (như find_all)."""
+    out = []
+    for m in _tags(tag).finditer(content, start, end):
+        if not m.group(1) and not m.group(2):
+            out.append(content[m.end():_element_end(content, tag, m.end(), end)])
+    return out
+
+
+def parse_daiphat_html(content):
+    # Lấy span đầu tiên của mỗi id mb_prize_<giải>_item_<n>, như soup.find
+    found = {}
+    for m in _DP_SPAN_RE.finditer(content):
+        key = (m.group(1), int(m.group(2)))
+        if key not in found and not m.group(0).endswith(b'/>'):
+            found[key] = content[m.end():_element_end(content, b'span', m.end(), len(content))]
+    results = []
+    for label, code in DAIPHAT_CODES.items():
+        nums = []
+        idx = 0
+        while (code, idx) in found:
+            text = _text(found[(code, idx)])
+            if text and text.isdigit(): nums.append(text)
+            idx += 1
+        if nums: results.append(f"{label}: {', '.join(nums)}")
+    return "\n".join(results)
+
+
+def parse_minhngoc_html(content):
+    box = _MN_BOX_RE.search(content)
+    if not box: return ""
+    # Chỉ xét box_kqxs đầu tiên: dừng ở box kế tiếp (nếu có)
+    nxt = _MN_BOX_RE.search(content, box.end())
+    end = nxt.start() if nxt else len(content)
+    cells = {}
+    for m in _MN_CELL_RE.finditer(content, box.end(), end):
+        cls = m.group(2).lower()
+        if cls in cells: continue
+        # Ô có thể chứa phần tử cùng tên (div trong div): đếm độ sâu để lấy đúng thẻ đóng
+        cells[cls] = content[m.end():_element_end(content, m.group(1), m.end(), end)]
+    results = []
+    for label, cls in MINHNGOC_CLASSES.items():
+        cell = cells.get(cls)
+        if cell is None: continue
+        nums = [t for t in (_text(d) for d in _elements(cell, b'div', 0, len(cell))) if t.isdigit()]
+        if not nums:
+            nums = [t for t in (x.decode('utf-8', 'ignore').strip() for x in _TEXT_NODE_RE.findall(b'>' + cell + b'<')) if t.isdigit() and len(t) > 1]
+        if nums: results.append(f"{label}: {', '.join(nums)}")
+    return "\n".join(results)
+
+
+def fetch_daiphat_live():
+    try: return net.get_parsed(DAIPHAT_URL, parse_daiphat_html, timeout=5)
+    except Exception as e: return ""
+
+def fetch_minhngoc_live():
+    try: return net.get_parsed(MINHNGOC_URL, parse_minhngoc_html, timeout=5)
+    except Exception as e: return ""
+
+
+# Thứ tự ưu tiên khi hai nguồn ngang nhau; thêm nguồn mới vào đây
+LIVE_SOURCES = {
+    "Minh Ngọc": fetch_minhngoc_live,
+    "Đại Phát": fetch_daiphat_live,
+}
+
+FULL_DIGITS = 107
+LIVE_TIMEOUT = 6
+# Có kết quả đầu tiên nhưng còn ít số hơn lần trước: chờ thêm các nguồn khác tối đa chừng này (giây)
+LIVE_GRACE = 0.5
+
+_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="live")
+
+
+def count_digits(text):
+    """Số chữ số kết quả trong text dạng "G1: 12345, ..." (bỏ qua nhãn giải)."""
+    return sum(len(n) for line in text.splitlines() for n in re.findall(r'\d+', line.split(':', 1)[-1]))
+
+
+def fetch_live_result(sources=None, timeout=LIVE_TIMEOUT, min_digits=0, grace=LIVE_GRACE):
+    """Gọi song song mọi nguồn, trả về dict:
+
+    text (chuỗi kết quả, "" nếu không nguồn nào có), source (nguồn thắng),
+    digits (số chữ số lấy được), timings ({nguồn: giây}, None nếu bị bỏ hoặc
+    lỗi). Nguồn ném lỗi được ghi log rồi bỏ qua.
+
+    Trả về ngay khi có kết quả đủ 107 số hoặc có ít nhất ``min_digits`` số (số
+    chữ số của lần lấy trước); kết quả đầu tiên còn ít hơn thì chờ các nguồn
+    khác thêm tối đa ``grace`` giây rồi lấy bản nhiều số nhất.
+    """
+    sources = sources or LIVE_SOURCES
+    names = list(sources)
+    t0 = time.perf_counter()
+    timings = {name: None for name in names}
+
+    def run(name):
+        text = sources[name]()
+        timings[name] = round(time.perf_counter() - t0, 3)
+        return text
+
+    futures = {_POOL.submit(run, name): name for name in names}
+    best = {"text": "", "source": None, "digits": 0}
+    pending = set(futures)
+    first = None
+    while pending:
+        now = time.perf_counter()
+        left = timeout - (now - t0)
+        if first is not None: left = min(left, grace - (now - first))
+        if left <= 0: break
+        done, pending = wait(pending, timeout=left, return_when=FIRST_COMPLETED)
+        for fut in done:
+            name = futures[fut]
+            try: text = fut.result() or ""
+            except Exception:
+                # Nguồn tự thêm có thể ném lỗi: bỏ nguồn đó, giữ kết quả các nguồn khác
+                log.warning("Nguồn live %s lỗi", name, exc_info=True)
+                continue
+            n = count_digits(text)
+            if n and first is None: first = time.perf_counter()
+            if n > best["digits"] or (n and n == best["digits"] and names.index(name) < names.index(best["source"])):
+                best = {"text": text, "source": name, "digits": n}
+        if best["digits"] and (best["digits"] >= FULL_DIGITS or best["digits"] >= min_digits): break
+    # Nguồn chậm: không chờ nữa. cancel() chỉ bỏ được nguồn chưa bắt đầu (pool
+    # đầy); nguồn đang chạy vẫn chạy nốt tới timeout của request, kết quả bị bỏ
+    for fut in pending: fut.cancel()
+    best["timings"] = dict(timings)
+    return best
+
+
+def fetch_live_data():
+    return fetch_live_result()["text"]
+
+
+# -----------------------------------------------------------------------------
+# POLLER NỀN: MỘT LUỒNG CHO CẢ TIẾN TRÌNH
+# -----------------------------------------------------------------------------
+LIVE_INTERVAL = 10
+# Không session nào hỏi trong khoảng này (giây) thì ngừng gọi nguồn
+LIVE_IDLE_AFTER = 60
+# Kết quả cũ hơn khoảng này (giây) coi như của ngày trước, nhận kết quả mới ít số hơn
+LIVE_STALE_AFTER = 6 * 3600
+
+
+class LivePoller:
+    """Gọi fetch_live_result() theo chu kỳ trong luồng nền, giữ bản mới nhất.
+
+    ``snapshot`` là dict (text, source, digits, timings, version, updated_at);
+    ``version`` chỉ tăng khi có số mới, để UI biết lúc nào cần vẽ lại.
+    ``fetch(min_digits=...)`` nhận số chữ số của snapshot hiện tại để trả về
+    sớm khi một nguồn đã theo kịp.
+    """
+
+    def __init__(self, fetch=fetch_live_result, interval=LIVE_INTERVAL, idle_after=LIVE_IDLE_AFTER):
+        self.fetch = fetch
+        self.interval = interval
+        self.idle_after = idle_after
+        self.snapshot = {"text": "", "source": None, "digits": 0, "timings": {}, "version": 0, "updated_at": None}
+        self._last_touch = 0.0
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def touch(self):
+        """Session đang theo dõi live: đảm bảo poller chạy, trả về snapshot hiện tại."""
+        self._last_touch = time.time()
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="live-poller", daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return self.snapshot
+
+    def poll_once(self):
+        snap = self.snapshot
+        stale = snap["updated_at"] is None or time.time() - snap["updated_at"] > LIVE_STALE_AFTER
+        res = self.fetch(min_digits=0 if stale else snap["digits"])
+        if res["text"] and res["text"] != snap["text"] and (res["digits"] >= snap["digits"] or stale):
+            # Gán dict mới (không sửa tại chỗ) để session đọc luôn thấy bản trọn vẹn
+            self.snapshot = dict(res, version=snap["version"] + 1, updated_at=time.time())
+        return self.snapshot
+
+    def _run(self):
+        while True:
+            if time.time() - self._last_touch > self.idle_after:
+                self._wake.clear()
+                self._wake.wait()
+                continue
+            try: self.poll_once()
+            except Exception: pass
+            time.sleep(self.interval)
+
+
+_POLLER = None
+_POLLER_LOCK = threading.Lock()
+
+
+def get_poller():
+    global _POLLER
+    with _POLLER_LOCK:
+        if _POLLER is None: _POLLER = LivePoller()
+        return _POLLER
@@ -0,0 +1,166 @@
+"""Cache kết quả quét/backtest dùng chung mọi session trong tiến trình.
+
+Khoá gồm tên phép tính, kỳ mới nhất (turnNum) và số ngày của cửa sổ cùng
+các tham số (mode, allow_rev, bridge_type, min_streak...): có kỳ mới thì khoá
+tự đổi, không cần xoá cache. Giới hạn số mục, bỏ mục lâu không dùng nhất
+(LRU). Nhiều session cùng hỏi một khoá chưa có thì chỉ một session tính, các
+session khác chờ kết quả đó (single-flight); lỗi thường chuyển cho bên chờ,
+còn ngắt điều khiển (rerun / stop của session tính) thì bên chờ tự tính lại.
+
+Kết quả được trả về cho mọi bên gọi: không sửa tại chỗ. Kết quả dở dang
+(quét hết giờ, complete = False) chỉ trả cho các bên đang chờ, không nhớ:
+lần hỏi sau tính lại.
+"""
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+MAXSIZE = int(os.environ.get("SOICAU_MEMO_SIZE", "256"))
+_RETRY = object()
+
+
+class ResultCache:
+    def __init__(self, maxsize=MAXSIZE):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "waits": 0}
+
+    def get_or_compute(self, key, fn, keep=None):
+        """Giá trị của key, tính bằng fn() nếu chưa có; keep(value) sai thì không nhớ."""
+        while True:
+            with self._lock:
+                if key in self._items:
+                    self._items.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return self._items[key]
+                fut = self._inflight.get(key)
+                owner = fut is None
+                if owner:
+                    fut = self._inflight[key] = Future()
+                    self.stats["misses"] += 1
+                else:
+                    self.stats["waits"] += 1
+            if owner: break
+            value = fut.result()
+            # Bên tính bị ngắt giữa chừng: một bên chờ nhận lượt tính lại
+            if value is not _RETRY: return value
+        try:
+            value = fn()
+        except Exception as e:
+            with self._lock: del self._inflight[key]
+            fut.set_exception(e)
+            raise
+        except BaseException:
+            # Ngắt điều khiển (rerun / stop của Streamlit, Ctrl-C, thoát) chỉ thuộc
+            # luồng đang tính: không chuyển cho bên chờ, đánh thức để bên chờ tự tính
+            with self._lock: del self._inflight[key]
+            fut.set_result(_RETRY)
+            raise
+        with self._lock:
+            if keep is None or keep(value):
+                self._items[key] = value
+                while len(self._items) > self.maxsize: self._items.popitem(last=False)
+            del self._inflight[key]
+        fut.set_result(value)
+        return value
+
+    def get(self, key, default=None):
+        """Giá trị đã nhớ của key (không tính)."""
+        with self._lock:
+            if key not in self._items: return default
+            self._items.move_to_end(key)
+            self.stats["hits"] += 1
+            return self._items[key]
+
+    def clear(self):
+        with self._lock: self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+RESULTS = ResultCache()
+
+
+def _key(name, data, params):
+    return (name, data[0]['issue'], len(data)) + tuple(params)
+
+
+def cached(name, data, params, fn, keep=None):
+    """``fn()`` nhớ theo (name, kỳ mới nhất, số ngày, *params) trong RESULTS."""
+    if not data: return fn()
+    return RESULTS.get_or_compute(_key(name, data, params), fn, keep)
+
+
+def complete(snap):
+    """Snapshot quét đã xong (không bị cắt vì hết giờ) thì mới nhớ."""
+    return snap is None or snap.get('complete', True)
+
+
+class _Job:
+    """Một lần chạy bộ sinh snapshot trên luồng nền, các session cùng theo dõi."""
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.snap, self.version, self.finished, self.error = None, 0, False, None
+
+    def publish(self, snap):
+        with self.cond:
+            self.snap, self.version = snap, self.version + 1
+            self.cond.notify_all()
+
+    def run(self, key, gen_fn):
+        def drain():
+            snap = None
+            for snap in gen_fn(): self.publish(snap)
+            return snap
+        try:
+            self.publish(RESULTS.get_or_compute(key, drain, complete))
+        except Exception as e:
+            self.error = e
+        finally:
+            with _jobs_lock: _JOBS.pop(key, None)
+            with self.cond:
+                self.finished = True
+                self.cond.notify_all()
+
+    def wait(self, version, timeout=1.0):
+        with self.cond:
+            self.cond.wait_for(lambda: self.version != version or self.finished, timeout)
+            return self.snap, self.version, self.finished
+
+
+_JOBS = {}
+_jobs_lock = threading.Lock()
+
+
+def streamed(name, data, params, gen_fn, show):
+    """Như cached() cho bộ sinh snapshot (soicau.stream): gọi ``show(snap)`` với
+    từng snapshot để vẽ dần; trả về snapshot cuối, chỉ nhớ khi snapshot đó complete.
+
+    Bộ sinh chạy hết trên một luồng nền dùng chung theo khoá, ngoài luồng
+    script của mọi session: ``show`` (st.*) chỉ chạy ở session gọi nó, session
+    bị rerun / đóng giữa chừng không làm dừng hay hỏng lần quét của session khác.
+    """
+    if not data:
+        snap = None
+        for snap in gen_fn(): show(snap)
+        return snap
+    key = _key(name, data, params)
+    snap = RESULTS.get(key)
+    if snap is not None: return snap
+    with _jobs_lock:
+        job = _JOBS.get(key)
+        if job is None:
+            job = _JOBS[key] = _Job()
+            threading.Thread(target=job.run, args=(key, gen_fn), daemon=True, name=f"memo-{name}").start()
+    version, finished = 0, False
+    while not finished:
+        snap, v, finished = job.wait(version)
+        if v != version and snap is not None and not finished: show(snap)
+        version = v
+    if job.error is not None: raise job.error
+    return snap
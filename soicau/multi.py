@@ -0,0 +1,197 @@
+"""Cầu nhiều vị trí: bộ k vị trí (k = 3-5), trúng nếu 2 trong k vị trí ghép ra đề.
+
+Bộ (p1, ..., pk) trúng ngày t nếu có cặp (pa, pb), a < b, khớp ngày t theo
+đúng luật cầu 2 vị trí (mode, đảo AB, loại cầu). Khi cặp đối xứng (đảo AB
+hoặc soi bộ) thứ tự trong bộ không quan trọng nên chỉ xét bộ tăng dần;
+ngược lại xét mọi thứ tự (107³ ≈ 1,2 triệu bộ ba).
+
+Không duyệt toàn bộ không gian: bộ có streak >= 1 phải chứa một cặp trúng
+ngày 0, nên sinh ứng viên từ từng cặp trúng ngày 0 (hạt giống) ghép với các
+vị trí còn lại. Mỗi bộ chỉ được sinh một lần, từ cặp trúng đầu tiên của nó.
+Streak của cả lô ứng viên tính bằng tra ma trận hit cặp từng ngày, bỏ dần
+bộ đã gãy. Các hạt giống chia cho pool tiến trình; ngân sách thời gian
+(``budget_s``) và số dòng ứng viên mỗi lô (``max_rows``) giữ cho lần quét
+không treo giao diện: hết giờ thì trả về phần đã quét với complete = False.
+``iter_scan_multi`` trả top-K từng phần trong lúc quét (xem soicau.stream).
+"""
+import itertools
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from . import engine
+from .stream import TopK
+
+K_MIN, K_MAX = 3, 5
+# Số dòng ứng viên tối đa của một hạt giống (bộ nhớ ~ max_rows × k × 8 byte)
+MAX_ROWS = 2_000_000
+BUDGET_S = 5.0
+# Số cầu tối đa trả về (cầu streak cao nhất)
+TOP = 5000
+# Khoảng giữa hai snapshot khi quét từng phần (giây)
+STREAM_INTERVAL = 0.25
+
+
+def symmetric(mode, allow_rev):
+    """Cặp (i, j) khớp <=> (j, i) khớp: đảo AB hoặc soi bộ."""
+    return allow_rev or mode == "set"
+
+
+class _DayHits:
+    # Ma trận hit cặp (n × n) của ngày d, tính theo khối STREAK_CHUNK ngày khi cần
+    def __init__(self, digits, mode, allow_rev, bridge_type):
+        self.src, self.res = engine._split(digits, bridge_type)
+        self.mode, self.allow_rev = mode, allow_rev
+        self.mask = engine.pair_mask(bridge_type, digits.shape[1], mode)
+        self.days = len(self.res)
+        self.chunks = {}
+
+    def __getitem__(self, d):
+        c, step = d // engine.STREAK_CHUNK, engine.STREAK_CHUNK
+        if c not in self.chunks:
+            s = c * step
+            self.chunks[c] = engine.match_tensor(self.src[s:s + step], self.res[s:s + step], self.mode, self.allow_rev) & self.mask
+        return self.chunks[c][d % step]
+
+
+def _others(valid, k, sym, max_rows):
+    # Các cách chọn k-2 vị trí còn lại: tổ hợp (bộ tăng dần) hoặc chỉnh hợp
+    gen = itertools.combinations if sym else itertools.permutations
+    n = len(valid)
+    size = 1
+    for r in range(k - 2): size = size * (n - r) // (r + 1 if sym else 1)
+    if size > max_rows: raise ValueError(f"Bộ {k} vị trí cần {size} dòng ứng viên mỗi lô, vượt ngân sách {max_rows}")
+    return np.array(list(gen(valid.tolist(), k - 2)), dtype=np.intp).reshape(-1, k - 2)
+
+
+def seeds(digits, k, mode, allow_rev, bridge_type="same_day"):
+    """Hạt giống: (q, x, y) với cặp (x, y) trúng ngày 0; q là chỉ số cặp khe (a, b) trong bộ, -1 nếu đối xứng."""
+    h0 = _DayHits(digits, mode, allow_rev, bridge_type)[0]
+    if symmetric(mode, allow_rev):
+        xs, ys = np.nonzero(np.triu(h0))
+        return [(-1, int(x), int(y)) for x, y in zip(xs, ys)]
+    xs, ys = np.nonzero(h0)
+    return [(q, int(x), int(y)) for q in range(k * (k - 1) // 2) for x, y in zip(xs, ys)]
+
+
+class _SeedScanner:
+    # Quét lần lượt các hạt giống; giữ ma trận hit và bảng vị trí còn lại giữa các lượt
+    def __init__(self, digits, k, mode, allow_rev, bridge_type, min_streak, max_rows):
+        self.hits = _DayHits(digits, mode, allow_rev, bridge_type)
+        self.sym = symmetric(mode, allow_rev)
+        self.n, self.k, self.min_streak = digits.shape[1], k, min_streak
+        self.others = _others(np.flatnonzero(self.hits.mask.any(axis=1)), k, self.sym, max_rows)
+        self.a, self.b = (np.array(x, dtype=np.intp) for x in zip(*itertools.combinations(range(k), 2)))
+
+    def _candidates(self, q, x, y):
+        # Các bộ sinh từ hạt giống, chỉ giữ bộ có cặp trúng ngày 0 đầu tiên là hạt giống này
+        a, b, n, h0 = self.a, self.b, self.n, self.hits[0]
+        rest = self.others[~((self.others == x) | (self.others == y)).any(axis=1)]
+        if self.sym:
+            rows = np.sort(np.concatenate([np.full((len(rest), 2), (x, y)), rest], axis=1), axis=1)
+            key = np.where(h0[rows[:, a], rows[:, b]], rows[:, a] * n + rows[:, b], n * n)
+            return rows[key.min(axis=1) == x * n + y]  # (x, y) là cặp trúng nhỏ nhất của bộ
+        rows = np.empty((len(rest), self.k), dtype=np.intp)
+        free = [s for s in range(self.k) if s not in (a[q], b[q])]
+        rows[:, a[q]], rows[:, b[q]], rows[:, free] = x, y, rest
+        return rows[np.argmax(h0[rows[:, a], rows[:, b]], axis=1) == q]  # cặp khe trúng đầu tiên là q
+
+    def run(self, seed_list, deadline, pause=None):
+        """Quét ``seed_list`` theo thứ tự; trả về (mảng bộ, mảng streak, số hạt giống đã xong).
+
+        Quá ``deadline`` thì bỏ dở hạt giống đang quét; quá ``pause`` thì dừng
+        sau hạt giống hiện tại (để trả kết quả từng phần).
+        """
+        a, b, hits = self.a, self.b, self.hits
+        found, streaks, done = [], [], 0
+        for q, x, y in seed_list:
+            if time.time() > deadline or (done and pause is not None and time.time() > pause): break
+            rows, part, d = self._candidates(q, x, y), [], 1
+            while len(rows) and d < hits.days:
+                if time.time() > deadline: break
+                alive = hits[d][rows[:, a], rows[:, b]].any(axis=1)
+                if d >= self.min_streak and not alive.all(): part.append((rows[~alive], d))
+                rows, d = rows[alive], d + 1
+            else:
+                # Hạt giống xong trọn vẹn mới được tính (hết giờ giữa chừng thì bỏ)
+                if len(rows) and d >= self.min_streak: part.append((rows, d))
+                found += [r.astype(np.uint8) for r, _ in part]
+                streaks += [np.full(len(r), s, dtype=np.int32) for r, s in part]
+                done += 1
+                continue
+            break
+        if not found: return np.zeros((0, self.k), dtype=np.uint8), np.zeros(0, dtype=np.int32), done
+        return np.concatenate(found), np.concatenate(streaks), done
+
+
+def _scan_chunk(args, seed_list, deadline, max_rows):
+    # Việc của một tiến trình worker
+    return _SeedScanner(*args, max_rows).run(seed_list, deadline)
+
+
+def iter_scan_multi(data, k=3, mode="straight", allow_rev=True, bridge_type="same_day", min_streak=2,
+                    budget_s=BUDGET_S, max_rows=MAX_ROWS, workers=None, top=TOP, interval=STREAM_INTERVAL):
+    """Như scan_multi_positions nhưng là bộ sinh: cứ khoảng ``interval`` giây
+    (hoặc mỗi phần việc của pool) trả về một snapshot top-K hiện có."""
+    if not K_MIN <= k <= K_MAX: raise ValueError(f"k phải trong khoảng {K_MIN}-{K_MAX}")
+    t0 = time.time()
+    snap = {"k": k, "results": [], "complete": True, "seeds": 0, "seeds_done": 0, "elapsed_s": 0.0}
+    if not data or (bridge_type == "cross_day" and len(data) < 2):
+        yield snap
+        return
+    digits = engine.digit_matrix(data)
+    seed_list = seeds(digits, k, mode, allow_rev, bridge_type)
+    deadline = t0 + budget_s if budget_s else float("inf")
+    args = (digits, k, mode, allow_rev, bridge_type, max(min_streak, 1))
+    heap, done = TopK(top), 0
+
+    def update(part):
+        nonlocal done
+        rows, streak, n_done = part
+        codes = np.zeros(len(rows), dtype=np.int64)
+        for c in range(k): codes = codes * digits.shape[1] + rows[:, c]  # thứ tự từ điển của bộ
+        heap.push([streak], codes, lambda i: {"pos": rows[i].tolist(), "streak": int(streak[i])})
+        done += n_done
+        return {**snap, "results": heap.items(),
+                "complete": done == len(seed_list), "seeds": len(seed_list), "seeds_done": done,
+                "elapsed_s": round(time.time() - t0, 3)}
+
+    if workers and workers > 1 and len(seed_list) > 1:
+        chunks = min(len(seed_list), workers * 4)
+        with ProcessPoolExecutor(max_workers=min(workers, chunks)) as pool:
+            futures = [pool.submit(_scan_chunk, args, seed_list[c::chunks], deadline, max_rows) for c in range(chunks)]
+            for fut in as_completed(futures): yield update(fut.result())
+        return
+    scanner = _SeedScanner(*args, max_rows)
+    while True:
+        snap = update(scanner.run(seed_list[done:], deadline, time.time() + interval))
+        yield snap
+        if snap['complete'] or time.time() > deadline: return
+
+
+def scan_multi_positions(data, k=3, mode="straight", allow_rev=True, bridge_type="same_day", min_streak=2,
+                         budget_s=BUDGET_S, max_rows=MAX_ROWS, workers=None, top=TOP):
+    """Quét cầu k vị trí; trả về dict:
+
+    results: [{"pos": [p1, ..., pk], "streak"}] sắp theo streak giảm dần, tối
+    đa ``top`` cầu (None: tất cả); complete: đã quét hết hạt giống trong ngân
+    sách chưa; seeds / seeds_done: số hạt giống; elapsed_s. ``workers`` > 1
+    chia hạt giống cho pool tiến trình. Bộ quá lớn so với ``max_rows`` ném
+    ValueError.
+    """
+    for snap in iter_scan_multi(data, k, mode, allow_rev, bridge_type, min_streak, budget_s, max_rows, workers, top, interval=float("inf")):
+        pass
+    return snap
+
+
+def predictions(bridges, live_str, allow_rev):
+    """Các số "ab" ghép được từ chuỗi live (có thể còn '?') của các cầu k vị trí."""
+    out = set()
+    for br in bridges:
+        vals = [live_str[p] if p < len(live_str) else '?' for p in br['pos']]
+        for x, y in itertools.combinations(vals, 2):
+            if x.isdigit() and y.isdigit():
+                out.add(x + y)
+                if allow_rev: out.add(y + x)
+    return out
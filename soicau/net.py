@@ -0,0 +1,70 @@
+"""Lớp HTTP dùng chung: Session có pool keep-alive và request có điều kiện.
+
+Mọi lần gọi API/trang live đi qua một ``requests.Session`` duy nhất của
+tiến trình (giữ kết nối TCP+TLS, giới hạn số kết nối mỗi host). Với mỗi URL
+lưu lại ETag/Last-Modified và hash nội dung cùng kết quả đã parse: server
+trả 304 hoặc nội dung không đổi thì dùng lại kết quả cũ, không parse lại.
+"""
+import hashlib
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+HEADERS = {'User-Agent': 'Mozilla/5.0'}
+# Số kết nối giữ sẵn tối đa cho mỗi host
+POOL_PER_HOST = 4
+
+_session = None
+_session_lock = threading.Lock()
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            s = requests.Session()
+            s.headers.update(HEADERS)
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=POOL_PER_HOST, pool_block=True)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            _session = s
+        return _session
+
+
+def get(url, timeout=10, **kwargs):
+    return get_session().get(url, timeout=timeout, **kwargs)
+
+
+def fetch_parsed(url, parse, timeout=10):
+    """Tải ``url`` và trả về ``(parse(content), status)``.
+
+    status: "new" (đã parse nội dung mới), "same" (nội dung trùng lần trước)
+    hoặc "not-modified" (server trả 304). Hai trường hợp sau dùng lại kết quả
+    parse cũ. Kết quả parse được lưu theo cả ``parse`` nên một URL dùng được
+    cho nhiều bộ parse khác nhau.
+    """
+    key = (url, parse)
+    with _cache_lock: entry = _cache.get(key)
+    headers = {}
+    if entry:
+        if entry["etag"]: headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]: headers["If-Modified-Since"] = entry["last_modified"]
+    r = get(url, timeout=timeout, headers=headers)
+    if r.status_code == 304 and entry: return entry["value"], "not-modified"
+    r.raise_for_status()
+    digest = hashlib.blake2b(r.content, digest_size=16).digest()
+    if entry and entry["hash"] == digest: return entry["value"], "same"
+    value = parse(r.content)
+    with _cache_lock:
+        _cache[key] = {
+            "etag": r.headers.get("ETag"), "last_modified": r.headers.get("Last-Modified"),
+            "hash": digest, "value": value,
+        }
+    return value, "new"
+
+
+def get_parsed(url, parse, timeout=10):
+    return fetch_parsed(url, parse, timeout)[0]
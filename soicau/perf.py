@@ -0,0 +1,126 @@
+"""Đo thời gian từng bước của mỗi lần rerun (bật bằng biến môi trường).
+
+    SOICAU_PERF=1                  bật đo, log JSON mỗi rerun, panel ở sidebar
+    SOICAU_PERF_PROFILE_DIR=dir    thêm: dump cProfile mỗi rerun vào dir
+    SOICAU_PERF_HISTORY=20         số rerun gần nhất giữ lại cho panel (mỗi session)
+
+Khi tắt, mọi hàm chỉ kiểm tra một biến cờ rồi trả về ngay.
+
+Dùng theo kiểu mốc: ``mark(tên)`` ghi thời gian kể từ mốc trước vào bước
+``tên``; ``count(tên, n)`` cộng bộ đếm. Lần rerun hiện tại gắn với luồng
+đang chạy script (mỗi session Streamlit một luồng); lịch sử do người gọi
+giữ (app để trong st.session_state) nên mỗi session chỉ thấy lần chạy của mình.
+
+cProfile bật cho cả tiến trình, hai profiler cùng lúc sẽ giẫm lên nhau nên
+khi dump profile các rerun chạy lần lượt qua một khóa: chậm hơn, nhưng mỗi
+file .prof chỉ chứa một rerun.
+"""
+import cProfile
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+ENABLED = os.environ.get("SOICAU_PERF", "") not in ("", "0")
+PROFILE_DIR = os.environ.get("SOICAU_PERF_PROFILE_DIR") if ENABLED else None
+HISTORY_SIZE = int(os.environ.get("SOICAU_PERF_HISTORY", "20"))
+
+log = logging.getLogger("soicau.perf")
+_local = threading.local()
+_seq = 0
+_seq_lock = threading.Lock()
+_profile_lock = threading.Lock()
+
+
+def new_history():
+    return deque(maxlen=HISTORY_SIZE)
+
+
+class Run:
+    def __init__(self, name, history=None):
+        global _seq
+        with _seq_lock:
+            _seq += 1
+            self.seq = _seq
+        self.name = name
+        self.history = history
+        self.started = time.time()
+        self.t0 = self.last = time.perf_counter()
+        self.stages = {}
+        self.counters = {}
+        self.profile = None
+        if PROFILE_DIR:
+            # Một profiler một lúc; thời gian chờ khóa không tính vào rerun
+            _profile_lock.acquire()
+            self.started = time.time()
+            self.t0 = self.last = time.perf_counter()
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + (now - self.last)
+        self.last = now
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def finish(self):
+        self.mark("rest")
+        total = time.perf_counter() - self.t0
+        rec = {
+            "event": "rerun", "name": self.name, "seq": self.seq, "thread": threading.current_thread().name,
+            "time": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started)),
+            "total_ms": round(total * 1000, 2),
+            "stages_ms": {k: round(v * 1000, 2) for k, v in self.stages.items()},
+            "counters": self.counters,
+        }
+        if self.profile:
+            try:
+                self.profile.disable()
+                os.makedirs(PROFILE_DIR, exist_ok=True)
+                rec["profile"] = os.path.join(PROFILE_DIR, f"{self.name}-{time.strftime('%Y%m%d-%H%M%S')}-{self.seq}.prof")
+                self.profile.dump_stats(rec["profile"])
+            finally:
+                _profile_lock.release()
+        if self.history is not None: self.history.append(rec)
+        log.info(json.dumps(rec, ensure_ascii=False))
+        return rec
+
+
+@contextmanager
+def _run(name, history):
+    _local.run = Run(name, history)
+    try:
+        yield _local.run
+    finally:
+        run, _local.run = _local.run, None
+        run.finish()
+
+
+def run(name="main", history=None):
+    """Context bao một lần rerun: ``with perf.run(history=h): main()``; bản ghi thêm vào h (new_history())."""
+    return _run(name, history) if ENABLED else nullcontext()
+
+
+def mark(stage):
+    if not ENABLED: return
+    r = getattr(_local, "run", None)
+    if r: r.mark(stage)
+
+
+def count(name, n=1):
+    if not ENABLED: return
+    r = getattr(_local, "run", None)
+    if r: r.count(name, n)
+
+
+if ENABLED and not log.handlers:
+    _h = logging.StreamHandler()
+    _h.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(_h)
+    log.setLevel(logging.INFO)
+    log.propagate = False
@@ -0,0 +1,122 @@
+"""Miền Bắc / Miền Nam / Miền Trung: lịch quay, kho riêng từng đài, quét song song.
+
+Miền Bắc là một đài (gameCode "miba", 107 số). Miền Nam và Miền Trung mỗi
+tối quay 2-4 đài, mỗi đài 18 giải / 82 số (XSMN_STRUCTURE, có G8); mỗi đài
+có kho SQLite + file nhị phân riêng trong CACHE_DIR. Quét một tối: đồng bộ
+các đài song song bằng luồng (chờ mạng), rồi quét song song trong pool tiến
+trình, mỗi worker đọc file nhị phân mmap của đài mình. Tổng thời gian xấp xỉ
+thời gian của một đài.
+
+Mã đài là tham số ``gameCode`` của API lịch sử. Mã các đài Miền Nam / Miền
+Trung mới đặt theo kiểu "miba", chưa đối chiếu với API thật: hai miền này
+chỉ bật khi SOICAU_UNVERIFIED_REGIONS=1 (REGIONS khi tắt chỉ có Miền Bắc).
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+from . import archive, binfile
+from .core import CACHE_DIR, XSMB_STRUCTURE, XSMN_STRUCTURE, body_len
+
+# Mã đài MN / MT chưa kiểm chứng với API: tắt mặc định
+UNVERIFIED = os.environ.get("SOICAU_UNVERIFIED_REGIONS", "") not in ("", "0")
+REGIONS = {"mb": "Miền Bắc", "mn": "Miền Nam", "mt": "Miền Trung"} if UNVERIFIED else {"mb": "Miền Bắc"}
+STRUCTURES = {"mb": XSMB_STRUCTURE, "mn": XSMN_STRUCTURE, "mt": XSMN_STRUCTURE}
+
+# mã đài -> (tên, miền, các thứ quay: 0 = thứ Hai ... 6 = Chủ nhật)
+PROVINCES = {
+    "miba": ("Miền Bắc", "mb", [0, 1, 2, 3, 4, 5, 6]),
+    # Miền Nam
+    "tphcm": ("TP. Hồ Chí Minh", "mn", [0, 5]), "dongthap": ("Đồng Tháp", "mn", [0]), "camau": ("Cà Mau", "mn", [0]),
+    "bentre": ("Bến Tre", "mn", [1]), "vungtau": ("Vũng Tàu", "mn", [1]), "baclieu": ("Bạc Liêu", "mn", [1]),
+    "dongnai": ("Đồng Nai", "mn", [2]), "cantho": ("Cần Thơ", "mn", [2]), "soctrang": ("Sóc Trăng", "mn", [2]),
+    "tayninh": ("Tây Ninh", "mn", [3]), "angiang": ("An Giang", "mn", [3]), "binhthuan": ("Bình Thuận", "mn", [3]),
+    "vinhlong": ("Vĩnh Long", "mn", [4]), "binhduong": ("Bình Dương", "mn", [4]), "travinh": ("Trà Vinh", "mn", [4]),
+    "longan": ("Long An", "mn", [5]), "binhphuoc": ("Bình Phước", "mn", [5]), "haugiang": ("Hậu Giang", "mn", [5]),
+    "tiengiang": ("Tiền Giang", "mn", [6]), "kiengiang": ("Kiên Giang", "mn", [6]), "dalat": ("Đà Lạt", "mn", [6]),
+    # Miền Trung
+    "hue": ("Thừa Thiên Huế", "mt", [0, 6]), "phuyen": ("Phú Yên", "mt", [0]),
+    "daklak": ("Đắk Lắk", "mt", [1]), "quangnam": ("Quảng Nam", "mt", [1]),
+    "danang": ("Đà Nẵng", "mt", [2, 5]), "khanhhoa": ("Khánh Hòa", "mt", [2, 6]),
+    "binhdinh": ("Bình Định", "mt", [3]), "quangtri": ("Quảng Trị", "mt", [3]), "quangbinh": ("Quảng Bình", "mt", [3]),
+    "gialai": ("Gia Lai", "mt", [4]), "ninhthuan": ("Ninh Thuận", "mt", [4]),
+    "quangngai": ("Quảng Ngãi", "mt", [5]), "daknong": ("Đắk Nông", "mt", [5]),
+    "kontum": ("Kon Tum", "mt", [6]),
+}
+
+
+def provinces_on(region, weekday):
+    """Mã các đài của miền quay vào thứ ``weekday`` (0 = thứ Hai)."""
+    return [code for code, (_, r, days) in PROVINCES.items() if r == region and weekday in days]
+
+
+_ARCHIVES = {}
+_ARCHIVES_LOCK = threading.Lock()
+
+
+def get_archive(code):
+    """Kho của một đài (Miền Bắc dùng kho mặc định của archive)."""
+    if code == "miba": return archive.get_archive()
+    with _ARCHIVES_LOCK:
+        if code not in _ARCHIVES:
+            _ARCHIVES[code] = archive.DrawArchive(
+                path=os.path.join(CACHE_DIR, f"draws_{code}.sqlite"),
+                fetch=partial(archive.fetch_history_page, game_code=code),
+                bin_path=os.path.join(CACHE_DIR, f"draws_{code}.bin"),
+                body_len=body_len(STRUCTURES[PROVINCES[code][1]]),
+            )
+        return _ARCHIVES[code]
+
+
+def scan_province(bin_path, kind, mode, allow_rev, bridge_type, days, min_streak):
+    """Quét cầu của một đài từ file nhị phân; chạy được trong tiến trình worker."""
+    from . import engine
+    data = binfile.open_file(bin_path).window(days)
+    if kind == "positions":
+        pos_map = data.layout.pos_map
+        rows = engine.scan_positions_auto(data, mode, allow_rev, bridge_type, min_streak)
+        rows = [{**r, "pos_i": pos_map[r['i']], "pos_j": pos_map[r['j']]} for r in rows]
+    else:
+        rows = engine.scan_prizes_auto(data, mode, bridge_type, min_streak)
+    return {"latest": data.issues[0] if len(data) else None, "days": len(data), "results": rows}
+
+
+def scan_region(region, weekday, kind, mode, allow_rev, bridge_type="same_day", days=50, min_streak=1,
+                sync=True, workers=None, processes=True):
+    """Quét mọi đài của miền trong tối ``weekday``; trả về {mã đài: kết quả}.
+
+    Mỗi kết quả có name, latest, days, results; đài lỗi (mạng, chưa có dữ
+    liệu) có ``error`` thay cho results. ``processes=False`` dùng pool luồng
+    (vd. trong Streamlit, tránh fork tiến trình đang chạy nhiều luồng).
+    """
+    if region not in REGIONS:
+        raise ValueError(f"Miền {region} chưa bật: mã đài chưa kiểm chứng với API (SOICAU_UNVERIFIED_REGIONS=1 để thử)")
+    codes = provinces_on(region, weekday)
+    out = {code: {"name": PROVINCES[code][0]} for code in codes}
+    if not codes: return out
+
+    def prepare(code):
+        arc = get_archive(code)
+        if sync:
+            try: arc.sync(days)
+            except Exception as e:
+                if arc.count() == 0: raise
+                out[code]["warning"] = str(e)
+        if not os.path.exists(arc.bin_path): arc.export_binary()
+        return arc.bin_path
+
+    paths = {}
+    with ThreadPoolExecutor(max_workers=len(codes)) as pool:
+        for code, fut in [(c, pool.submit(prepare, c)) for c in codes]:
+            try: paths[code] = fut.result()
+            except Exception as e: out[code]["error"] = str(e)
+
+    executor = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with executor(max_workers=workers or min(len(paths), os.cpu_count() or 1) or 1) as pool:
+        futures = {code: pool.submit(scan_province, path, kind, mode, allow_rev, bridge_type, days, min_streak)
+                   for code, path in paths.items()}
+        for code, fut in futures.items():
+            try: out[code].update(fut.result())
+            except Exception as e: out[code]["error"] = str(e)
+    return out
@@ -0,0 +1,87 @@
+"""Quét từng phần có hạn chót: vẽ dần top-K cầu tốt nhất thay vì chờ quét xong.
+
+Các hàm ``iter_*`` là bộ sinh: sau mỗi khối ứng viên trả về một snapshot
+dict với ``results`` là top-K hiện có (đã sắp), ``done`` / ``total`` (số ứng
+viên đã xét / tổng), ``complete`` và ``elapsed_s``. Quá ``deadline``
+(time.time()) thì dừng; snapshot cuối khi đó có complete = False. Khi quét
+hết, top-K trùng với K dòng đầu của bản quét toàn bộ.
+"""
+import heapq
+import time
+
+import numpy as np
+
+from . import engine
+
+# Số cặp vị trí mỗi khối: ~10 snapshot cho 107×106 cặp
+STREAM_PAIRS = 1200
+
+
+class TopK:
+    """K mục có khoá lớn nhất (K = None: giữ tất cả).
+
+    Khoá là bộ cột so theo thứ tự; bằng nhau thì mã nhỏ trước (thứ tự quét
+    gốc). Mỗi khối được lọc trước bằng lexsort nên heap chỉ nhận <= K mục.
+    """
+
+    def __init__(self, k):
+        self.k = k
+        self.heap = []
+
+    def push(self, cols, codes, make):
+        """Thêm một khối: ``cols`` các mảng khoá, ``codes`` mã thứ tự, ``make(k)`` tạo mục thứ k (chỉ gọi cho mục lọt top)."""
+        if not len(codes): return
+        order = np.lexsort((codes,) + tuple(-np.asarray(c) for c in cols[::-1]))
+        if self.k: order = order[:self.k]
+        keys = list(zip(*(np.asarray(c)[order].tolist() for c in cols)))
+        for key, code, k in zip(keys, np.asarray(codes)[order].tolist(), order.tolist()):
+            if not self.k or len(self.heap) < self.k: heapq.heappush(self.heap, (key, -code, make(k)))
+            elif (key, -code) > self.heap[0][:2]: heapq.heapreplace(self.heap, (key, -code, make(k)))
+            else: break  # khối đã sắp: các mục sau còn nhỏ hơn
+
+    def __len__(self):
+        return len(self.heap)
+
+    def items(self):
+        """Các payload theo thứ tự khoá giảm dần."""
+        return [p for _, _, p in sorted(self.heap, key=lambda x: x[:2], reverse=True)]
+
+
+SORT_COLUMNS = {"hits": ("hits", "longest"), "longest": ("longest", "hits"), "current": ("current", "hits", "longest")}
+
+
+def iter_positions(data, mode, allow_rev, bridge_type="same_day", by="hits", top=500,
+                   min_rate=0.0, min_longest=0, deadline=None, block=STREAM_PAIRS):
+    """Backtest mọi cặp vị trí theo khối, giữ top-K theo ``by`` (hits / longest / current).
+
+    Mỗi dòng giống backtest_all_positions: i, j, hits, days, rate, longest,
+    current. ``min_rate`` (0-1) và ``min_longest`` lọc trước khi xếp hạng.
+    """
+    t0 = time.time()
+    heap = TopK(top)
+    snap = {"results": [], "done": 0, "total": 0, "complete": True, "elapsed_s": 0.0}
+    if not data or (bridge_type == "cross_day" and len(data) < 2):
+        yield snap
+        return
+    digits = engine.digit_matrix(data)
+    n = digits.shape[1]
+    src, res = engine._split(digits, bridge_type)
+    days = len(res)
+    ii, jj = engine.pair_index(bridge_type, n, mode)
+    block = max(1, min(block, engine.BLOCK_CELLS // max(days, 1)))
+    snap.update(total=len(ii), complete=not len(ii))
+    for s in range(0, len(ii), block):
+        if deadline is not None and time.time() > deadline: break
+        bi, bj = ii[s:s + block], jj[s:s + block]
+        m = engine.pair_match_matrix(src, res, mode, allow_rev, bi, bj)
+        hits = m.sum(axis=1, dtype=np.int32)
+        longest, current = engine._run_stats(m)
+        stats = {"hits": hits, "longest": longest, "current": current}
+        keep = np.flatnonzero((hits >= min_rate * days) & (longest >= min_longest))
+        heap.push([stats[c][keep] for c in SORT_COLUMNS[by]], bi[keep] * n + bj[keep], lambda k: {
+            "i": int(bi[keep[k]]), "j": int(bj[keep[k]]), "hits": int(hits[keep[k]]), "days": days,
+            "rate": float(hits[keep[k]]) / days, "longest": int(longest[keep[k]]), "current": int(current[keep[k]])})
+        snap = {"results": heap.items(), "done": s + len(bi), "total": len(ii), "complete": s + len(bi) == len(ii),
+                "elapsed_s": round(time.time() - t0, 3)}
+        yield snap
+    if snap["done"] == 0: yield {**snap, "elapsed_s": round(time.time() - t0, 3)}  # hết giờ trước khối đầu
@@ -0,0 +1,103 @@
+"""Quét toàn bộ lưới tham số song song, lưu bảng xếp hạng cầu.
+
+Mỗi cấu hình (phương pháp, soi thẳng / bộ / lô, đảo AB, loại cầu, số ngày)
+là một việc chạy trong ProcessPoolExecutor với số tiến trình bằng số nhân
+CPU: quét cầu đang thông (min streak 1) rồi backtest chính các cầu đó trên
+cùng cửa sổ.
+Worker đọc lịch sử qua file nhị phân mmap (binfile) nên không phải truyền hay
+parse lại dữ liệu. Min streak không nằm trong lưới: mỗi dòng giữ streak của
+cầu, lọc ``streak >= min_streak`` khi đọc.
+
+Kết quả ghi vào ``leaderboard.json`` trong CACHE_DIR để app đọc ngay, không
+phải tính lại.
+"""
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from . import binfile
+from .core import CACHE_DIR, get_pos_map
+
+LEADERBOARD_PATH = os.environ.get("SOICAU_LEADERBOARD", os.path.join(CACHE_DIR, "leaderboard.json"))
+WINDOWS = [30, 50, 100, 200, 365]
+# (phương pháp, mode, allow_rev) giống các lựa chọn hợp lệ trên giao diện
+METHODS = [
+    ("positions", "straight", True), ("positions", "straight", False), ("positions", "set", True),
+    ("positions", "lo", True), ("positions", "lo", False),
+    ("prizes", "straight", True), ("prizes", "set", True), ("prizes", "lo", True),
+]
+BRIDGE_TYPES = ["same_day", "cross_day"]
+FIELDS = ["method", "mode", "allow_rev", "bridge_type", "days", "bridge", "i", "j", "prize", "streak", "hits", "bt_days", "rate"]
+
+
+def grid(windows=WINDOWS):
+    return [
+        {"method": m, "mode": mode, "allow_rev": rev, "bridge_type": bt, "days": days}
+        for m, mode, rev in METHODS for bt in BRIDGE_TYPES for days in windows
+    ]
+
+
+def run_config(bin_path, cfg):
+    """Quét + backtest một cấu hình; trả về các dòng của bảng xếp hạng."""
+    from . import engine
+    data = binfile.open_file(bin_path).window(cfg['days'])
+    mode, rev, bt = cfg['mode'], cfg['allow_rev'], cfg['bridge_type']
+    out = []
+    if cfg['method'] == "positions":
+        bridges = engine.scan_positions_auto(data, mode, rev, bt, 1)
+        hits = {(b['i'], b['j']): b for b in engine.backtest_positions(data, mode, rev, bt, bridges)} if bridges else {}
+        pos_map = get_pos_map()
+        for b in bridges:
+            h = hits[(b['i'], b['j'])]
+            out.append({**cfg, "bridge": f"{pos_map[b['i']]} + {pos_map[b['j']]}", "i": b['i'], "j": b['j'], "prize": None,
+                        "streak": b['streak'], "hits": h['hits'], "bt_days": h['days']})
+    else:
+        prizes = engine.scan_prizes_auto(data, mode, bt, 1)
+        hits = {p['prize']: p for p in engine.backtest_prizes(data, mode, bt, prizes)}
+        for p in prizes:
+            h = hits[p['prize']]
+            out.append({**cfg, "bridge": p['prize'], "i": None, "j": None, "prize": p['prize'],
+                        "streak": p['streak'], "hits": h['hits'], "bt_days": h['days']})
+    for r in out: r["rate"] = round(r['hits'] / r['bt_days'], 4) if r['bt_days'] else 0.0
+    return out
+
+
+def run_sweep(windows=WINDOWS, workers=None, bin_path=binfile.BIN_PATH, path=LEADERBOARD_PATH):
+    """Chạy cả lưới và ghi bảng xếp hạng ra ``path``; trả về dict đã ghi.
+
+    File nhị phân phải có sẵn (archive.sync() tạo/cập nhật nó).
+    """
+    f = binfile.open_file(bin_path)
+    windows = sorted({min(w, len(f)) for w in windows if w > 0})
+    configs = sorted(grid(windows), key=lambda c: -c['days'])  # việc lớn chạy trước cho đều tải
+    workers = workers or os.cpu_count() or 1
+    t0 = time.perf_counter()
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_config, bin_path, cfg) for cfg in configs]
+        for fut in as_completed(futures): rows.extend(fut.result())
+    rows.sort(key=lambda r: (-r['rate'], -r['streak'], r['method'], r['days'], r['bridge']))
+    board = {
+        "meta": {"latest": str(f.latest_issue()), "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+                 "windows": windows, "configs": len(configs), "workers": workers,
+                 "elapsed_s": round(time.perf_counter() - t0, 3)},
+        "rows": rows,
+    }
+    save(board, path)
+    return board
+
+
+def save(board, path=LEADERBOARD_PATH):
+    if os.path.dirname(path): os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh: json.dump(board, fh, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def load(path=LEADERBOARD_PATH):
+    """Bảng xếp hạng đã lưu, None nếu chưa chạy sweep."""
+    try:
+        with open(path, encoding="utf-8") as fh: return json.load(fh)
+    except (OSError, ValueError):
+        return None
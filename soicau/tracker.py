@@ -0,0 +1,78 @@
+"""Theo dõi cầu vị trí khi kết quả live về dần (Bước 3).
+
+LiveTracker giữ chuỗi 107 số của lần cập nhật trước, so sánh với chuỗi mới
+để biết vị trí nào vừa có số, rồi qua chỉ mục ngược vị trí -> cầu chỉ tính
+lại các cầu dùng những vị trí đó. Mỗi lần cập nhật trả về phần chênh lệch:
+cầu vừa nổ và các số dự đoán lần đầu xuất hiện trong từng nhóm.
+"""
+import numpy as np
+
+BODY_LEN = 107
+
+
+def live_digits(live_str):
+    """Chuỗi 107 ký tự ('?' là chưa có) -> mảng int16, -1 ở vị trí chưa có số."""
+    s = live_str[:BODY_LEN].ljust(BODY_LEN, '?')
+    d = np.frombuffer(s.encode('ascii', 'replace'), dtype=np.uint8).astype(np.int16) - 48
+    d[(d < 0) | (d > 9)] = -1
+    return d
+
+
+class LiveTracker:
+    def __init__(self, bridges, groups):
+        """``bridges``: danh sách cầu {"i", "j", ...}; ``groups[k]``: nhóm của cầu k
+        (vd. "vip", "1d")."""
+        self.bridges = bridges
+        self.group_names = sorted(set(groups))
+        n = len(bridges)
+        self.ii = np.array([b['i'] for b in bridges], dtype=np.intp)
+        self.jj = np.array([b['j'] for b in bridges], dtype=np.intp)
+        self.group = np.array([self.group_names.index(g) for g in groups], dtype=np.intp)
+        # Chỉ mục ngược: cầu của vị trí p là by_pos[starts[p]:starts[p + 1]]
+        pos = np.concatenate([self.ii, self.jj])
+        ids = np.concatenate([np.arange(n), np.arange(n)])
+        order = np.argsort(pos, kind='stable')
+        self.by_pos = ids[order]
+        self.starts = np.searchsorted(pos[order], np.arange(BODY_LEN + 1))
+        self.digits = np.full(BODY_LEN, -1, dtype=np.int16)
+        self.pred = np.full(n, -1, dtype=np.int16)  # số dự đoán của từng cầu, -1 = chưa đủ 2 số
+        self.counts = np.zeros((len(self.group_names), 100), dtype=np.int32)
+
+    def update(self, live_str):
+        """Cập nhật theo chuỗi live mới; trả về dict:
+
+        filled (vị trí vừa có số), completed (chỉ số các cầu vừa nổ hoặc đổi
+        số), new_numbers ({nhóm: các số "ab" lần đầu xuất hiện}).
+        """
+        d = live_digits(live_str)
+        changed = np.flatnonzero(d != self.digits)
+        self.digits = d
+        delta = {"filled": [int(p) for p in changed if d[p] >= 0], "completed": [], "new_numbers": {g: [] for g in self.group_names}}
+        if not len(changed) or not len(self.bridges): return delta
+        touched = np.unique(np.concatenate([self.by_pos[self.starts[p]:self.starts[p + 1]] for p in changed]))
+        a, b = d[self.ii[touched]], d[self.jj[touched]]
+        new = np.where((a >= 0) & (b >= 0), a * 10 + b, -1).astype(np.int16)
+        diff = new != self.pred[touched]
+        touched, new = touched[diff], new[diff]
+        old = self.pred[touched]
+        g = self.group[touched]
+        before = self.counts > 0
+        np.subtract.at(self.counts, (g[old >= 0], old[old >= 0]), 1)
+        np.add.at(self.counts, (g[new >= 0], new[new >= 0]), 1)
+        self.pred[touched] = new
+        appeared = (self.counts > 0) & ~before
+        for k, name in enumerate(self.group_names):
+            delta["new_numbers"][name] = [f"{v:02d}" for v in np.flatnonzero(appeared[k])]
+        delta["completed"] = [int(k) for k in touched[new >= 0]]
+        return delta
+
+    def predictions(self, group):
+        """Tập số dự đoán hiện có của nhóm (giống collected_predictions cũ)."""
+        if group not in self.group_names: return set()
+        return {f"{v:02d}" for v in np.flatnonzero(self.counts[self.group_names.index(group)])}
+
+    def matches(self, group):
+        """Các cầu đã nổ của nhóm theo thứ tự ban đầu: [(chỉ số, "ab"), ...]."""
+        if group not in self.group_names: return []
+        ks = np.flatnonzero((self.group == self.group_names.index(group)) & (self.pred >= 0))
+        return [(int(k), f"{self.pred[k]:02d}") for k in ks]
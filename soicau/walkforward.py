@@ -0,0 +1,77 @@
+"""Backtest walk-forward (ngoài mẫu) cho cầu vị trí và cầu giải.
+
+Với mỗi ngày t trong lịch sử: chọn cầu chỉ bằng ``window`` ngày trước t (cùng
+luật với scan_positions_auto / scan_prizes_auto: streak trong cửa sổ >=
+min_streak), rồi xem các cầu đó có trúng đề ngày t không.
+
+Không quét lại cửa sổ cho từng ngày: streak trong cửa sổ tính từ ngày t+1
+bằng min(chuỗi khớp liên tiếp từ t+1, số ngày kết quả của cửa sổ), nên chỉ
+cần đi một lượt từ ngày cũ nhất tới mới nhất, giữ vector chuỗi khớp của mọi
+cặp: O(số cặp × số ngày) thay vì O(số ngày² × số cặp). Ma trận hit tính theo
+khối ngày để bộ nhớ không phụ thuộc độ dài lịch sử.
+"""
+import numpy as np
+
+from . import engine
+from .core import get_prize_map_no_gdb
+from .history import issue_list
+from .index import prize_match_rows
+
+
+def _match_blocks(data, kind, mode, allow_rev, bridge_type, days):
+    # Sinh (k0, m) với m là ma trận hit (số cầu × khối ngày k0..), từ ngày cũ về mới
+    if kind == "prizes":
+        m = prize_match_rows(data, mode, bridge_type, days).T
+        yield 0, m
+        return
+    digits = engine.digit_matrix(data)
+    src, res = engine._split(digits, bridge_type)
+    ii, jj = engine.pair_index(bridge_type, mode=mode)
+    block = max(engine.BLOCK_CELLS // len(ii), 1)
+    for k0 in range(((days - 1) // block) * block, -1, -block):
+        k1 = min(k0 + block, days)
+        yield k0, engine.pair_match_matrix(src[k0:k1], res[k0:k1], mode, allow_rev, ii, jj)
+
+
+def walk_forward(data, kind, mode, allow_rev, bridge_type="same_day", window=50, min_streak=1, test_days=None):
+    """Đường hit ngoài mẫu theo ngày.
+
+    ``data`` là lịch sử mới nhất trước, cần dài hơn ``window``. Ngày t được
+    kiểm tra khi có đủ ``window`` ngày trước nó; ``test_days`` giới hạn số ngày
+    kiểm tra gần nhất. Trả về dict:
+
+    days: [{"issue", "bridges" (số cầu được chọn), "hits" (số cầu trúng),
+    "rate", "hit" (có cầu trúng)}] mới nhất trước; summary: tổng hợp.
+    """
+    if kind == "prizes": allow_rev = False
+    off = 1 if bridge_type == "cross_day" else 0
+    days = max(len(data) - off, 0)  # số ngày kết quả
+    n_test = max(len(data) - window, 0)
+    if test_days is not None: n_test = min(n_test, test_days)
+    cap = window - off  # số ngày kết quả trong một cửa sổ
+    rows = []
+    issues = issue_list(data[:n_test])
+    if n_test and cap > 0:
+        size = engine.pair_index(bridge_type, mode=mode)[0].size if kind == "positions" else len(get_prize_map_no_gdb())
+        run = np.zeros(size, dtype=np.int32)
+        for k0, m in _match_blocks(data, kind, mode, allow_rev, bridge_type, days):
+            for k in range(m.shape[1] - 1, -1, -1):
+                t, hit = k0 + k, m[:, k]
+                if t < n_test:
+                    sel = np.minimum(run, cap) >= max(min_streak, 1)
+                    n_sel = int(sel.sum())
+                    n_hit = int((hit & sel).sum())
+                    rows.append({"issue": issues[t], "bridges": n_sel, "hits": n_hit,
+                                 "rate": n_hit / n_sel if n_sel else 0.0, "hit": n_hit > 0})
+                run = np.where(hit, run + 1, 0)
+        rows.reverse()
+    active = [r for r in rows if r['bridges']]
+    total_sel = sum(r['bridges'] for r in active)
+    summary = {
+        "test_days": len(rows), "active_days": len(active),
+        "hit_days": sum(r['hit'] for r in active),
+        "day_hit_rate": sum(r['hit'] for r in active) / len(active) if active else 0.0,
+        "bridge_hit_rate": sum(r['hits'] for r in active) / total_sel if total_sel else 0.0,
+        "avg_bridges": total_sel / len(active) if active else 0.0,
+    }
+    return {"days": rows, "summary": summary}
@@ -0,0 +1,42 @@
+"""parse_smart_text: chữ số trong nhãn giải ("G1:", "G.7", "GĐB") không được
+tính vào kết quả. Chạy: python -m pytest tests"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from soicau import live
+from soicau.core import parse_smart_text
+
+FIXTURES = os.path.join(ROOT, "fixtures", "synthetic_live")
+BODY = ("10433" "21819" "6001338908" "386379402654235116155940781618" "4959310341316475"
+        "255341928327648350305641" "395376724" "23884969")
+
+
+def test_live_source_labels():
+    # Dạng text của fetch_live_result: "G1: 21819" trước đây thành "12181"
+    for name, parse in (("minhngoc_full.html", live.parse_minhngoc_html), ("daiphat_full.html", live.parse_daiphat_html)):
+        with open(os.path.join(FIXTURES, name), "rb") as f: text = parse(f.read())
+        live_str, preview = parse_smart_text(text, True)
+        assert live_str == BODY
+        assert preview[1] == "G1 (✅): 21819"
+
+
+def test_dotted_labels():
+    text = "GĐB: 10433\nG.1: 21819\nG2: 60013 38908\ng.7 23 88 49 69"
+    live_str, _ = parse_smart_text(text, True)
+    assert live_str.startswith("10433" "21819" "6001338908")
+    assert live_str.endswith("23884969")
+
+
+def test_partial_draw():
+    live_str, _ = parse_smart_text("ĐB: 10433\nG1: 21819\nG2: 600", True)
+    assert live_str[:13] == "10433" "21819" "600"
+    assert set(live_str[13:]) == {"?"}
+    assert len(live_str) == len(BODY)
+
+
+def test_word_labels_unchanged():
+    live_str, _ = parse_smart_text("Đặc biệt 10433\nGiải nhất 21819", False)
+    assert live_str[:10] == "?????" "21819"